@@ -68,6 +68,8 @@ class Settings(BaseSettings):
 
     MONAI_LABEL_DATASTORE_AUTO_RELOAD: bool = True
     MONAI_LABEL_DATASTORE_READ_ONLY: bool = False
+    MONAI_LABEL_DATASTORE_ENGINE: str = "json"  # json | sqlite
+    MONAI_LABEL_DATASTORE_EVENT_DEBOUNCE: float = 1.0
     MONAI_LABEL_DATASTORE_FILE_EXT: List[str] = [
         "*.nii.gz",
         "*.nii",
@@ -89,7 +91,28 @@ class Settings(BaseSettings):
     MONAI_LABEL_SESSION_EXPIRY: int = 3600
 
     MONAI_LABEL_INFER_CONCURRENCY: int = -1
+    MONAI_LABEL_INFER_PIPELINE: bool = False
     MONAI_LABEL_INFER_TIMEOUT: int = 600
+    MONAI_LABEL_INFER_BATCH_SIZE: int = 0  # needs MONAI_LABEL_ENDPOINT_INFER_WORKERS > 1 (concurrent /infer)
+    MONAI_LABEL_INFER_BATCH_WAIT: float = 0.01
+    MONAI_LABEL_INFER_WRITER_FAST: bool = False
+    MONAI_LABEL_INFER_WRITER_COMPRESS_LEVEL: int = 1
+    MONAI_LABEL_INFER_WRITER_THREADS: int = 0
+    MONAI_LABEL_INFER_OUTPUT_DIR: str = ""  # e.g. /dev/shm (tmpfs) for local clients
+    MONAI_LABEL_TRANSFORM_CACHE_MEM_MB: int = 4096
+    MONAI_LABEL_TRANSFORM_CACHE_DISK_MB: int = 4096  # in_memory=False entries + spills (~/.cache/monailabel)
+    MONAI_LABEL_MODEL_CACHE_BUDGET: Dict[str, int] = {}  # MB per device; e.g. {"cuda": 8000, "cpu": 16000}
+    MONAI_LABEL_WSI_MAX_HANDLES: int = 8
+    MONAI_LABEL_WSI_CACHE_MEM_MB: int = 0  # decoded WSI regions; 0 to disable
+    MONAI_LABEL_WSI_BATCH_SIZE: int = 4  # tiles per forward pass; 0 to run infer() per tile
+    MONAI_LABEL_WSI_DEVICE_WORKERS: int = 1  # concurrent forward passes per device
+
+    MONAI_LABEL_ENDPOINT_INFER_WORKERS: int = 1
+    MONAI_LABEL_ENDPOINT_INFER_QUEUE: int = 32
+    MONAI_LABEL_ENDPOINT_WSI_WORKERS: int = 1  # long running /infer/wsi* requests (separate from /infer)
+    MONAI_LABEL_ENDPOINT_WSI_QUEUE: int = 8
+    MONAI_LABEL_ENDPOINT_WORKERS: int = 8
+    MONAI_LABEL_ENDPOINT_QUEUE: int = 128
     MONAI_LABEL_TRACKING_ENABLED: bool = True
     MONAI_LABEL_TRACKING_URI: str = ""
 
@@ -9,6 +9,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bisect
 import copy
 import fnmatch
 import io
@@ -18,9 +19,12 @@ import os
 import pathlib
 import shutil
 import tempfile
+import threading
 import time
 import zipfile
-from typing import Any, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from filelock import FileLock
 from pydantic import BaseModel
@@ -28,12 +32,16 @@ from watchdog.events import PatternMatchingEventHandler
 from watchdog.observers import Observer
 from watchdog.observers.polling import PollingObserver
 
+from monailabel.datastore.utils.archive import ZipStream
 from monailabel.interfaces.datastore import Datastore, DefaultLabelTag
 from monailabel.interfaces.exception import ImageNotFoundException, LabelNotFoundException
 from monailabel.utils.others.generic import file_ext, remove_file
 
 logger = logging.getLogger(__name__)
 
+# datastores (ids) deferring updates in the current context (thread or tasks submitted with a copy of the context)
+_deferred: ContextVar[Tuple[int, ...]] = ContextVar("deferred_datastores", default=())
+
 
 class DataModel(BaseModel):
     ext: str = ""
@@ -105,6 +113,7 @@ class LocalDatastore(Datastore):
         extensions=("*.nii.gz", "*.nii"),
         auto_reload=False,
         read_only=False,
+        event_debounce: float = 1.0,
     ):
         """
         Creates a `LocalDataset` object
@@ -116,6 +125,9 @@ class LocalDatastore(Datastore):
 
         `datastore_config: str`
             optional file name of the dataset configuration file (by default `dataset.json`)
+
+        `event_debounce: float`
+            file events (auto reload) received within this interval (in seconds) are applied together as one batch
         """
         self._datastore_path = datastore_path
         self._datastore_config_path = os.path.join(datastore_path, datastore_config)
@@ -124,6 +136,17 @@ class LocalDatastore(Datastore):
         self._ignore_event_config = False
         self._config_ts = 0
         self._auto_reload = auto_reload
+        self._event_debounce = event_debounce
+        self._events: List[str] = []
+        self._events_refresh = False  # directory events (e.g. folder moved in/out) need a full rescan
+        self._events_lock = threading.Lock()
+        self._events_timer: Optional[threading.Timer] = None
+        self._deferred_ops: List[Callable[[], None]] = []  # deferred updates; replayed if datastore file is reloaded
+        self._deferred_lock = threading.Lock()
+        self._revision = 0
+        self._journal: List[Tuple[int, str]] = []
+        self._journal_start = 0
+        self._journal_lock = threading.Lock()
 
         logging.getLogger("filelock").setLevel(logging.ERROR)
 
@@ -159,12 +182,16 @@ class LocalDatastore(Datastore):
             for label_dir in label_dirs.values():
                 include_patterns.extend(f"{label_dir}{os.path.sep}{ext}" for ext in [*extensions])
 
+            # Label Tag Dir(s) created/removed/renamed later
+            include_patterns.append(f"{self._datastore.label_path(None)}{os.path.sep}*")
+
             # Config
             include_patterns.append(self._datastore_config_path)
 
             self._handler = PatternMatchingEventHandler(patterns=include_patterns)
             self._handler.on_created = self._on_any_event
             self._handler.on_deleted = self._on_any_event
+            self._handler.on_moved = self._on_any_event
             self._handler.on_modified = self._on_modify_event
 
             try:
@@ -231,15 +258,17 @@ class LocalDatastore(Datastore):
     def _to_bytes(self, file):
         return io.BytesIO(pathlib.Path(file).read_bytes())
 
-    def datalist(self, full_path=True) -> List[Dict[str, Any]]:
+    def datalist(self, full_path=True, label_tag: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Return a dictionary of image and label pairs corresponding to the 'image' and 'label'
         keys respectively
 
+        :param full_path: return full path of image/label files
+        :param label_tag: tag of the labels to include (default: final)
         :return: the {'label': image, 'label': label} pairs for training
         """
 
-        tag = DefaultLabelTag.FINAL
+        tag = label_tag if label_tag else DefaultLabelTag.FINAL
         image_path = self._datastore.image_path()
         label_path = self._datastore.label_path(tag)
 
@@ -398,13 +427,33 @@ class LocalDatastore(Datastore):
                         path = d[key]
                         archive.write(path, arcname=os.path.join(key, os.path.basename(path)))
                 # add metadata
-                datastore_metadata: str = self._datastore.json(exclude={"base_path"})
+                datastore_metadata: str = json.dumps(self.json(), default=str)
                 archive.writestr("metadata.json", datastore_metadata)
 
             assert archive.filename is not None, "ZIP archive could not be created"
 
             return archive.filename
 
+    def get_dataset_archive_stream(
+        self, limit_cases: Optional[int] = None, label_tag: Optional[str] = None, compress_level: int = 0
+    ) -> ZipStream:
+        """
+        ZIP archive of the dataset (images, labels and metadata) which is produced while it is being streamed
+
+        :param limit_cases: limit the included cases to this number
+        :param label_tag: tag of the labels to include (default: final)
+        :param compress_level: compression level for files which are not already compressed; 0 => store
+        :return: archive stream; see :class:`ZipStream`
+        """
+        dl = self.datalist(label_tag=label_tag)
+        if limit_cases and limit_cases in list(range(1, len(dl))):
+            logger.info(f"Number of cases in datalist reduced to: {limit_cases} of {len(dl)} case(s)")
+            dl = dl[:limit_cases]
+
+        files = [(os.path.join(key, os.path.basename(d[key])), d[key]) for d in dl for key in d.keys()]
+        metadata = json.dumps(self.json(), default=str).encode("utf-8")
+        return ZipStream(files, data=[("metadata.json", metadata)], compress_level=compress_level)
+
     def _on_any_event(self, event):
         if self._ignore_event_count:
             logger.debug(f"Ignoring event by count: {self._ignore_event_count} => {event}")
@@ -412,7 +461,36 @@ class LocalDatastore(Datastore):
             return
 
         logger.debug(f"Event: {event}")
-        self.refresh()
+        with self._events_lock:
+            self._events.append(event.src_path)
+            if getattr(event, "dest_path", None):
+                self._events.append(event.dest_path)
+            if getattr(event, "is_directory", False):
+                self._events_refresh = True
+            if self._events_timer is None:
+                self._events_timer = threading.Timer(self._event_debounce, self._flush_events)
+                self._events_timer.daemon = True
+                self._events_timer.start()
+
+    def _flush_events(self):
+        with self._events_lock:
+            paths = list(dict.fromkeys(self._events))
+            refresh = self._events_refresh
+            self._events.clear()
+            self._events_refresh = False
+            self._events_timer = None
+
+        if refresh:
+            logger.info(f"Apply {len(paths)} file event(s) to datastore; directory changed, running full reconcile")
+            self.refresh()
+            return
+
+        logger.info(f"Apply {len(paths)} file event(s) to datastore")
+        try:
+            self._reconcile_paths(paths)
+        except Exception:
+            logger.exception("Failed to apply file events; running full reconcile")
+            self.refresh()
 
     def _on_modify_event(self, event):
         # handle modify events only for config path; rest ignored
@@ -427,10 +505,97 @@ class LocalDatastore(Datastore):
 
     def refresh(self):
         """
-        Refresh the datastore based on the state of the files on disk
+        Refresh the datastore based on the state of the files on disk (full rescan)
         """
         self._reconcile_datastore()
 
+    def _reconcile_paths(self, paths: Sequence[str]) -> int:
+        """
+        Incrementally reconcile the datastore for the given (created/deleted) image/label files only.
+        Falls back to a full :meth:`refresh` for directories or files outside the image/label tag directories.
+
+        :return: number of records changed; -1 in case of full refresh
+        """
+        image_path = os.path.realpath(self._datastore.image_path())
+        labels_dir = os.path.realpath(self._datastore.label_path(None))
+        staging = os.path.realpath(os.path.join(self._datastore_path, ".staging"))
+
+        images: Dict[str, Tuple[str, bool]] = {}  # id => (ext, exists)
+        labels: Dict[Tuple[str, str], Tuple[str, bool]] = {}  # (id, tag) => (ext, exists)
+        for path in paths:
+            if path == self._datastore_config_path:
+                self._init_from_datastore_file()
+                continue
+
+            if os.path.isdir(path):
+                logger.info(f"Directory changed: {path}; running full reconcile")
+                self.refresh()
+                return -1
+
+            name = os.path.basename(path)
+            if not any(fnmatch.fnmatch(name, p) for p in self._extensions):
+                continue
+
+            file_id, ext = self._to_id(name)
+            parent = os.path.realpath(os.path.dirname(path))
+            if parent == image_path:
+                images[file_id] = (ext, os.path.exists(path))
+            elif os.path.dirname(parent) == labels_dir:
+                labels[(file_id, os.path.basename(parent))] = (ext, os.path.exists(path))
+            elif parent != staging:
+                logger.info(f"Unknown location: {path}; running full reconcile")
+                self.refresh()
+                return -1
+
+        if not images and not labels:
+            return 0
+        return self._apply_reconcile(images, labels)
+
+    def _apply_reconcile(
+        self, images: Dict[str, Tuple[str, bool]], labels: Dict[Tuple[str, str], Tuple[str, bool]]
+    ) -> int:
+        invalidate = 0
+        self._init_from_datastore_file()
+
+        now = int(time.time())
+        objects = self._datastore.objects
+        for image_id, (ext, exists) in images.items():
+            obj = objects.get(image_id)
+            if exists and not obj:
+                logger.info(f"Adding New Image: {image_id} => {self._filename(image_id, ext)}")
+                info = {"ts": now, "name": self._filename(image_id, ext)}
+                objects[image_id] = ImageLabelModel(image=DataModel(info=info, ext=ext))
+                invalidate += 1
+            elif not exists and obj and obj.image.ext == ext:
+                logger.info(f"Removing non existing Image Id: {image_id}")
+                objects.pop(image_id)
+                invalidate += 1
+
+        for (label_id, tag), (ext, exists) in labels.items():
+            obj = objects.get(label_id)
+            if not obj:
+                if exists:
+                    logger.warning(f"IGNORE:: No matching image exists for '{label_id}' to add [{tag}]")
+                continue
+
+            label = obj.labels.get(tag)
+            if exists and not label:
+                logger.info(f"Adding New Label: {tag} => {label_id} => {self._filename(label_id, ext)}")
+                info = {"ts": now, "name": self._filename(label_id, ext)}
+                obj.labels[tag] = DataModel(info=info, ext=ext)
+                invalidate += 1
+            elif not exists and label and label.ext == ext:
+                logger.info(f"Removing non existing Label Id: '{label_id}' for '{tag}'")
+                obj.labels.pop(tag)
+                invalidate += 1
+
+        logger.info(f"Invalidate count: {invalidate}")
+        if invalidate:
+            for image_id in {*images.keys(), *(label_id for label_id, _ in labels.keys())}:
+                self._record_change(image_id)
+            self._update_datastore_file()
+        return invalidate
+
     def add_image(self, image_id: str, image_filename: str, image_info: Dict[str, Any]) -> str:
         id, image_ext = self._to_id(os.path.basename(image_filename))
         if not image_id:
@@ -450,6 +615,7 @@ class LocalDatastore(Datastore):
             image_info["name"] = name
 
             self._datastore.objects[image_id] = ImageLabelModel(image=DataModel(info=image_info, ext=image_ext))
+            self._record_change(image_id)
             self._update_datastore_file(lock=False)
         logger.debug("Released the lock!")
         return image_id
@@ -468,10 +634,11 @@ class LocalDatastore(Datastore):
 
         # Remove Image
         name = self._filename(image_id, obj.image.ext)
-        remove_file(os.path.realpath(os.path.join(self._datastore.image_path(), name)))
+        path = os.path.realpath(os.path.join(self._datastore.image_path(), name))
+        remove_file(path)
 
         if not self._auto_reload:
-            self.refresh()
+            self._reconcile_paths([path])
 
     def save_label(self, image_id: str, label_filename: str, label_tag: str, label_info: Dict[str, Any]) -> str:
         """
@@ -494,30 +661,60 @@ class LocalDatastore(Datastore):
         logger.info(f"Adding Label: {image_id} => {label_tag} => {label_filename}")
         label_path = self._datastore.label_path(label_tag)
         name = self._filename(image_id, label_ext)
-        dest = os.path.join(label_path, name)
+        self._store_label_file(label_filename, os.path.join(label_path, name))
 
         with FileLock(self._lock_file):
             logger.debug("Acquired the lock!")
-            os.makedirs(label_path, exist_ok=True)
-            shutil.copy(label_filename, dest)
-
             label_info = label_info if label_info else {}
             label_info["ts"] = int(time.time())
             # label_info["checksum"] = file_checksum(dest)
             label_info["name"] = name
 
-            obj.labels[label_tag] = DataModel(info=label_info, ext=label_ext)
+            def update():
+                o = self._datastore.objects.get(image_id)
+                if o:
+                    o.labels[label_tag] = DataModel(info=label_info, ext=label_ext)
+
+            update()
             logger.info(f"Label Info: {label_info}")
-            self._update_datastore_file(lock=False)
+            self._record_change(image_id)
+            self._update_datastore_file(lock=False, replay=update)
         logger.debug("Release the lock!")
         return label_id
 
+    def get_label_staging_path(self) -> Optional[str]:
+        path = os.path.join(self._datastore_path, ".staging")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _store_label_file(self, label_filename: str, dest: str) -> None:
+        """
+        Place label file at dest; files from the staging path are moved, others are copied next to dest first.
+        In both cases dest is replaced atomically, so readers never see a partially written label.
+        """
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        staging = os.path.realpath(self.get_label_staging_path())
+        if os.path.dirname(os.path.realpath(label_filename)) == staging:
+            try:
+                os.replace(label_filename, dest)
+                return
+            except OSError as e:
+                logger.info(f"Failed to move staged label (fallback to copy): {e}")
+
+        tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copy(label_filename, tmp)
+            os.replace(tmp, dest)
+        finally:
+            remove_file(tmp)
+
     def remove_label(self, label_id: str, label_tag: str) -> None:
         logger.info(f"Removing label: {label_id} => {label_tag}")
-        remove_file(self.get_label_uri(label_id, label_tag))
+        path = self.get_label_uri(label_id, label_tag)
+        remove_file(path)
 
         if not self._auto_reload:
-            self.refresh()
+            self._reconcile_paths([path])
 
     def update_image_info(self, image_id: str, info: Dict[str, Any]) -> None:
         """
@@ -530,8 +727,14 @@ class LocalDatastore(Datastore):
         if not obj:
             raise ImageNotFoundException(f"Image {image_id} not found")
 
-        obj.image.info.update(info)
-        self._update_datastore_file()
+        def update():
+            o = self._datastore.objects.get(image_id)
+            if o:
+                o.image.info.update(info)
+
+        update()
+        self._record_change(image_id)
+        self._update_datastore_file(replay=update)
 
     def update_label_info(self, label_id: str, label_tag: str, info: Dict[str, Any]) -> None:
         """
@@ -545,8 +748,14 @@ class LocalDatastore(Datastore):
         if not label:
             raise LabelNotFoundException(f"Label: {label_id} Tag: {label_tag} not found")
 
-        label.info.update(info)
-        self._update_datastore_file()
+        def update():
+            lbl = self._datastore.label(label_id, label_tag)
+            if lbl:
+                lbl.info.update(info)
+
+        update()
+        self._record_change(label_id)
+        self._update_datastore_file(replay=update)
 
     def _list_files(self, path, patterns):
         files = os.listdir(path)
@@ -577,6 +786,7 @@ class LocalDatastore(Datastore):
         logger.info(f"Invalidate count: {invalidate}")
         if invalidate:
             logger.debug("Save datastore file to disk")
+            self._record_change(None)
             self._update_datastore_file()
         else:
             logger.debug("No changes needed to flush to disk")
@@ -666,20 +876,95 @@ class LocalDatastore(Datastore):
         try:
             with FileLock(self._lock_file):
                 logger.debug("Acquired the lock!")
-                if os.path.exists(self._datastore_config_path):
-                    ts = os.stat(self._datastore_config_path).st_mtime
-                    if self._config_ts != ts:
-                        logger.debug(f"Reload Datastore; old ts: {self._config_ts}; new ts: {ts}")
-                        self._datastore = LocalDatastoreModel.parse_file(self._datastore_config_path)
-                        self._datastore.base_path = self._datastore_path
-                        self._config_ts = ts
+                self._load_datastore_file()
             logger.debug("Release the Lock...")
         except ValueError as e:
             logger.error(f"+++ Failed to load datastore => {e}")
             if throw_exception:
                 raise e
 
-    def _update_datastore_file(self, lock=True):
+    def _load_datastore_file(self) -> bool:
+        """
+        Reload datastore file (if modified by others) and re-apply the deferred updates not yet committed;
+        caller holds the file lock
+        """
+        if not os.path.exists(self._datastore_config_path):
+            return False
+        ts = os.stat(self._datastore_config_path).st_mtime
+        if self._config_ts == ts:
+            return False
+
+        logger.debug(f"Reload Datastore; old ts: {self._config_ts}; new ts: {ts}")
+        self._datastore = LocalDatastoreModel.parse_file(self._datastore_config_path)
+        self._datastore.base_path = self._datastore_path
+        self._config_ts = ts
+        with self._deferred_lock:
+            ops = list(self._deferred_ops)
+        for op in ops:
+            op()
+        self._record_change(None)
+        return True
+
+    def _record_change(self, image_id: Optional[str]) -> None:
+        """
+        Record modification of image (or its labels) for :meth:`changes`; None if anything might have changed
+        """
+        with self._journal_lock:
+            self._revision += 1
+            if image_id is None:
+                self._journal.clear()
+                self._journal_start = self._revision
+                return
+
+            self._journal.append((self._revision, image_id))
+            if len(self._journal) > max(1024, 2 * len(self._datastore.objects)):
+                drop = len(self._journal) // 2
+                self._journal_start = self._journal[drop - 1][0]
+                del self._journal[:drop]
+
+    def changes(self, since: Optional[int] = None) -> Tuple[int, Optional[List[str]]]:
+        with self._journal_lock:
+            if since is None or since < self._journal_start:
+                return self._revision, None
+            idx = bisect.bisect_left(self._journal, (since + 1,))
+            return self._revision, list(dict.fromkeys(image_id for _, image_id in self._journal[idx:]))
+
+    @contextmanager
+    def deferred_updates(self):
+        """
+        Defer persisting datastore metadata for updates made in the calling context only (thread or tasks submitted
+        with :func:`contextvars.copy_context`); other writers (e.g. save label requests) keep writing through
+        """
+        token = _deferred.set(_deferred.get() + (id(self),))
+        try:
+            yield self
+        finally:
+            _deferred.reset(token)
+            if id(self) not in _deferred.get():
+                self.commit_updates()
+
+    def commit_updates(self) -> None:
+        with self._deferred_lock:
+            count = len(self._deferred_ops)
+        if not count:
+            return
+
+        logger.info(f"Commit {count} deferred datastore update(s)")
+        with FileLock(self._lock_file):
+            # datastore file might be saved by others (e.g. labels saved through server) since it was loaded
+            if self._load_datastore_file():
+                logger.info("Datastore file changed; deferred updates are merged into the latest")
+            self._update_datastore_file(lock=False, force=True)
+        with self._deferred_lock:
+            del self._deferred_ops[:count]
+
+    def _update_datastore_file(self, lock=True, force=False, replay: Optional[Callable[[], None]] = None):
+        # only updates which can be re-applied over the latest datastore file are deferred
+        if not force and replay and id(self) in _deferred.get():
+            with self._deferred_lock:
+                self._deferred_ops.append(replay)
+            return
+
         def _write_to_file():
             logger.debug("+++ Datastore is updated...")
             self._ignore_event_config = True
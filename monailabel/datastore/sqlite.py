@@ -0,0 +1,496 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from monailabel.datastore.local import LocalDatastore, LocalDatastoreModel
+from monailabel.interfaces.datastore import DefaultLabelTag
+from monailabel.interfaces.exception import ImageNotFoundException, LabelNotFoundException
+from monailabel.utils.others.generic import remove_file
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 3
+JOURNAL_LIMIT = 100000
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS images (id TEXT PRIMARY KEY, ext TEXT NOT NULL, info TEXT NOT NULL DEFAULT '{}')",
+    "CREATE TABLE IF NOT EXISTS labels ("
+    "  image_id TEXT NOT NULL REFERENCES images(id) ON DELETE CASCADE,"
+    "  tag TEXT NOT NULL,"
+    "  ext TEXT NOT NULL,"
+    "  info TEXT NOT NULL DEFAULT '{}',"
+    "  PRIMARY KEY (image_id, tag)"
+    ")",
+    "CREATE INDEX IF NOT EXISTS labels_tag ON labels (tag, image_id)",
+    # journal of modified images (by any process) to serve changes(since) incrementally
+    "CREATE TABLE IF NOT EXISTS changes (rev INTEGER PRIMARY KEY AUTOINCREMENT, image_id TEXT NOT NULL)",
+    *[
+        f"CREATE TRIGGER IF NOT EXISTS {table}_{op.lower()} AFTER {op} ON {table} "
+        f"BEGIN INSERT INTO changes (image_id) VALUES ({row}.{col}); END"
+        for table, col in (("images", "id"), ("labels", "image_id"))
+        for op, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD"))
+    ],
+    # keep the last JOURNAL_LIMIT (up to 1.5x) changes; trimmed by the writer (in its transaction)
+    f"CREATE TRIGGER IF NOT EXISTS changes_trim AFTER INSERT ON changes WHEN NEW.rev % {JOURNAL_LIMIT // 2} = 0 "
+    f"BEGIN DELETE FROM changes WHERE rev <= NEW.rev - {JOURNAL_LIMIT}; END",
+]
+META_KEYS = ("name", "description", "images_dir", "labels_dir")
+
+
+def _dumps(info: Dict[str, Any]) -> str:
+    return json.dumps(info if info else {}, default=str)
+
+
+class SQLiteDatastore(LocalDatastore):
+    """
+    Local datastore which keeps the records in SQLite (WAL mode) instead of a single JSON file.
+
+    Every add/save/update touches only the affected rows in its own transaction; so writers don't rewrite the whole
+    datastore and readers are never blocked.  Labeled/Unlabeled images and status are served by indexed queries.
+
+    Existing JSON datastore (``datastore_v2.json``) is imported when the database is created; use
+    :meth:`export_json` to write the records back in the same JSON format.
+    """
+
+    def __init__(
+        self,
+        datastore_path: str,
+        images_dir: str = ".",
+        labels_dir: str = "labels",
+        datastore_config: str = "datastore_v2.db",
+        extensions=("*.nii.gz", "*.nii"),
+        auto_reload=False,
+        read_only=False,
+        event_debounce: float = 1.0,
+        json_config: str = "datastore_v2.json",
+    ):
+        """
+        :param datastore_config: file name of the SQLite database
+        :param json_config: file name of the JSON datastore to import from (when database is created)
+        """
+        self._db_path = os.path.join(datastore_path, datastore_config)
+        self._json_config_path = os.path.join(datastore_path, json_config)
+        self._local = threading.local()
+        os.makedirs(datastore_path, exist_ok=True)
+
+        super().__init__(
+            datastore_path=datastore_path,
+            images_dir=images_dir,
+            labels_dir=labels_dir,
+            datastore_config=datastore_config,
+            extensions=extensions,
+            auto_reload=auto_reload,
+            read_only=read_only,
+            event_debounce=event_debounce,
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; sqlite connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _query(self, sql: str, *args) -> List[Tuple]:
+        return self._conn().execute(sql, args).fetchall()
+
+    def _image(self, image_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        rows = self._query("SELECT ext, info FROM images WHERE id = ?", image_id)
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    def _label(self, image_id: str, tag: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        rows = self._query("SELECT ext, info FROM labels WHERE image_id = ? AND tag = ?", image_id, tag)
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    def _image_file(self, image_id: str, ext: str) -> str:
+        return os.path.realpath(os.path.join(self._datastore.image_path(), self._filename(image_id, ext)))
+
+    def _label_file(self, image_id: str, tag: str, ext: str) -> str:
+        return os.path.realpath(os.path.join(self._datastore.label_path(tag), self._filename(image_id, ext)))
+
+    def datalist(self, full_path=True, label_tag: Optional[str] = None) -> List[Dict[str, Any]]:
+        tag = label_tag if label_tag else DefaultLabelTag.FINAL
+        rows = self._query(
+            "SELECT i.id, i.ext, l.ext FROM images i JOIN labels l ON l.image_id = i.id WHERE l.tag = ? "
+            "ORDER BY i.rowid",
+            tag,
+        )
+        ds = [{"image": self._image_file(k, i), "label": self._label_file(k, tag, e)} for k, i, e in rows]
+
+        if not full_path:
+            ds = json.loads(json.dumps(ds).replace(f"{self._datastore_path.rstrip(os.pathsep)}{os.pathsep}", ""))
+        return ds
+
+    def get_image_uri(self, image_id: str) -> str:
+        obj = self._image(image_id)
+        return str(self._image_file(image_id, obj[0])) if obj else ""
+
+    def get_image_info(self, image_id: str) -> Dict[str, Any]:
+        obj = self._image(image_id)
+        if not obj:
+            return {}
+
+        info = obj[1]
+        info["path"] = self._image_file(image_id, obj[0])
+        return info
+
+    def get_label_uri(self, label_id: str, label_tag: str) -> str:
+        label = self._label(label_id, label_tag)
+        return str(self._label_file(label_id, label_tag, label[0])) if label else ""
+
+    def get_labels_by_image_id(self, image_id: str) -> Dict[str, str]:
+        return {tag: image_id for tag, in self._query("SELECT tag FROM labels WHERE image_id = ?", image_id)}
+
+    def get_label_info(self, label_id: str, label_tag: str) -> Dict[str, Any]:
+        label = self._label(label_id, label_tag)
+        return label[1] if label else {}
+
+    def get_labeled_images(self, label_tag: Optional[str] = None, labels: Optional[List[str]] = None) -> List[str]:
+        # same as LocalDatastore; labeled means having a final label (label_tag/labels are ignored)
+        rows = self._query(
+            "SELECT i.id FROM images i JOIN labels l ON l.image_id = i.id WHERE l.tag = ? ORDER BY i.rowid",
+            DefaultLabelTag.FINAL,
+        )
+        return [r[0] for r in rows]
+
+    def get_unlabeled_images(self, label_tag: Optional[str] = None, labels: Optional[List[str]] = None) -> List[str]:
+        rows = self._query(
+            "SELECT id FROM images i WHERE NOT EXISTS (SELECT 1 FROM labels l WHERE l.image_id = i.id AND l.tag = ?) "
+            "ORDER BY i.rowid",
+            DefaultLabelTag.FINAL,
+        )
+        return [r[0] for r in rows]
+
+    def list_images(self) -> List[str]:
+        return [r[0] for r in self._query("SELECT id FROM images ORDER BY rowid")]
+
+    def add_image(self, image_id: str, image_filename: str, image_info: Dict[str, Any]) -> str:
+        id, image_ext = self._to_id(os.path.basename(image_filename))
+        if not image_id:
+            image_id = id
+
+        logger.info(f"Adding Image: {image_id} => {image_filename}")
+        name = self._filename(image_id, image_ext)
+        shutil.copy(image_filename, self._image_file(image_id, image_ext))
+
+        image_info = image_info if image_info else {}
+        image_info["ts"] = int(time.time())
+        image_info["name"] = name
+
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM labels WHERE image_id = ?", (image_id,))
+            conn.execute(
+                "INSERT INTO images (id, ext, info) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET ext = excluded.ext, info = excluded.info",
+                (image_id, image_ext, _dumps(image_info)),
+            )
+        return image_id
+
+    def remove_image(self, image_id: str) -> None:
+        logger.info(f"Removing Image: {image_id}")
+
+        obj = self._image(image_id)
+        if not obj:
+            raise ImageNotFoundException(f"Image {image_id} not found")
+
+        for tag in self.get_labels_by_image_id(image_id):
+            self.remove_label(image_id, tag)
+
+        remove_file(self._image_file(image_id, obj[0]))
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM images WHERE id = ?", (image_id,))
+
+    def save_label(self, image_id: str, label_filename: str, label_tag: str, label_info: Dict[str, Any]) -> str:
+        logger.info(f"Saving Label for Image: {image_id}; Tag: {label_tag}; Info: {label_info}")
+        if not self._image(image_id):
+            raise ImageNotFoundException(f"Image {image_id} not found")
+
+        _, label_ext = self._to_id(os.path.basename(label_filename))
+        label_id = image_id
+
+        logger.info(f"Adding Label: {image_id} => {label_tag} => {label_filename}")
+        label_path = self._datastore.label_path(label_tag)
+        name = self._filename(image_id, label_ext)
+
+        self._store_label_file(label_filename, os.path.join(label_path, name))
+
+        label_info = label_info if label_info else {}
+        label_info["ts"] = int(time.time())
+        label_info["name"] = name
+
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO labels (image_id, tag, ext, info) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (image_id, tag) DO UPDATE SET ext = excluded.ext, info = excluded.info",
+                (image_id, label_tag, label_ext, _dumps(label_info)),
+            )
+        logger.info(f"Label Info: {label_info}")
+        return label_id
+
+    def remove_label(self, label_id: str, label_tag: str) -> None:
+        logger.info(f"Removing label: {label_id} => {label_tag}")
+        remove_file(self.get_label_uri(label_id, label_tag))
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM labels WHERE image_id = ? AND tag = ?", (label_id, label_tag))
+
+    def update_image_info(self, image_id: str, info: Dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT info FROM images WHERE id = ?", (image_id,)).fetchall()
+            if not rows:
+                raise ImageNotFoundException(f"Image {image_id} not found")
+
+            i = json.loads(rows[0][0])
+            i.update(info)
+            conn.execute("UPDATE images SET info = ? WHERE id = ?", (_dumps(i), image_id))
+
+    def update_label_info(self, label_id: str, label_tag: str, info: Dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT info FROM labels WHERE image_id = ? AND tag = ?", (label_id, label_tag)
+            ).fetchall()
+            if not rows:
+                raise LabelNotFoundException(f"Label: {label_id} Tag: {label_tag} not found")
+
+            i = json.loads(rows[0][0])
+            i.update(info)
+            conn.execute("UPDATE labels SET info = ? WHERE image_id = ? AND tag = ?", (_dumps(i), label_id, label_tag))
+
+    def _reconcile_datastore(self):
+        logger.debug("reconcile datastore...")
+        invalidate = 0
+        now = int(time.time())
+
+        image_path = self._datastore.image_path()
+        labels_dir = self._datastore.label_path(None)
+        dir_tags = [f for f in os.listdir(labels_dir) if os.path.isdir(os.path.join(labels_dir, f))]
+        logger.debug(f"Labels Dir {labels_dir}; Label Tags: {dir_tags}")
+
+        with self._transaction() as conn:
+            # Images
+            files = set(os.listdir(image_path))
+            images = dict(conn.execute("SELECT id, ext FROM images").fetchall())
+
+            removed = [k for k, ext in images.items() if self._filename(k, ext) not in files]
+            for k in removed:
+                logger.info(f"Removing non existing Image Id: {k}")
+                images.pop(k)
+            conn.executemany("DELETE FROM images WHERE id = ?", [(k,) for k in removed])
+
+            added: Dict[str, str] = {}
+            for image_file in self._list_files(image_path, self._extensions):
+                image_id, image_ext = self._to_id(image_file)
+                if image_id not in images:
+                    logger.info(f"Adding New Image: {image_id} => {image_file}")
+                    added[image_id] = image_ext
+            conn.executemany(
+                "INSERT INTO images (id, ext, info) VALUES (?, ?, ?)",
+                [(k, e, _dumps({"ts": now, "name": self._filename(k, e)})) for k, e in sorted(added.items())],
+            )
+            images.update(added)
+            invalidate += len(removed) + len(added)
+
+            # Labels
+            db_tags = [r[0] for r in conn.execute("SELECT DISTINCT tag FROM labels").fetchall()]
+            for tag in sorted(set(dir_tags + db_tags)):
+                label_path = self._datastore.label_path(tag)
+                files = set(os.listdir(label_path)) if os.path.isdir(label_path) else set()
+                labels = dict(conn.execute("SELECT image_id, ext FROM labels WHERE tag = ?", (tag,)).fetchall())
+
+                removed = [k for k, ext in labels.items() if self._filename(k, ext) not in files]
+                for k in removed:
+                    logger.info(f"Removing non existing Label Id: '{k}' for '{tag}'")
+                    labels.pop(k)
+                conn.executemany("DELETE FROM labels WHERE image_id = ? AND tag = ?", [(k, tag) for k in removed])
+
+                added = {}
+                if os.path.isdir(label_path):
+                    for label_file in self._list_files(label_path, self._extensions):
+                        label_id, label_ext = self._to_id(label_file)
+                        if label_id not in images:
+                            logger.warning(f"IGNORE:: No matching image exists for '{label_id}' to add [{label_file}]")
+                        elif label_id not in labels:
+                            logger.info(f"Adding New Label: {tag} => {label_id} => {label_file}")
+                            added[label_id] = label_ext
+                conn.executemany(
+                    "INSERT INTO labels (image_id, tag, ext, info) VALUES (?, ?, ?, ?)",
+                    [(k, tag, e, _dumps({"ts": now, "name": self._filename(k, e)})) for k, e in added.items()],
+                )
+                invalidate += len(removed) + len(added)
+
+        logger.info(f"Invalidate count: {invalidate}")
+
+    def _apply_reconcile(
+        self, images: Dict[str, Tuple[str, bool]], labels: Dict[Tuple[str, str], Tuple[str, bool]]
+    ) -> int:
+        invalidate = 0
+        now = int(time.time())
+        with self._transaction() as conn:
+            for image_id, (ext, exists) in images.items():
+                if exists:
+                    name = self._filename(image_id, ext)
+                    c = conn.execute(
+                        "INSERT INTO images (id, ext, info) VALUES (?, ?, ?) ON CONFLICT (id) DO NOTHING",
+                        (image_id, ext, _dumps({"ts": now, "name": name})),
+                    )
+                else:
+                    c = conn.execute("DELETE FROM images WHERE id = ? AND ext = ?", (image_id, ext))
+                invalidate += c.rowcount
+
+            for (label_id, tag), (ext, exists) in labels.items():
+                if exists:
+                    if not conn.execute("SELECT 1 FROM images WHERE id = ?", (label_id,)).fetchone():
+                        logger.warning(f"IGNORE:: No matching image exists for '{label_id}' to add [{tag}]")
+                        continue
+                    name = self._filename(label_id, ext)
+                    c = conn.execute(
+                        "INSERT INTO labels (image_id, tag, ext, info) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (image_id, tag) DO NOTHING",
+                        (label_id, tag, ext, _dumps({"ts": now, "name": name})),
+                    )
+                else:
+                    c = conn.execute(
+                        "DELETE FROM labels WHERE image_id = ? AND tag = ? AND ext = ?", (label_id, tag, ext)
+                    )
+                invalidate += c.rowcount
+
+        logger.info(f"Invalidate count: {invalidate}")
+        return invalidate
+
+    def _init_from_datastore_file(self, throw_exception=False):
+        # records are always read from the database; only create schema (+import) and load the dataset meta
+        try:
+            with self._transaction() as conn:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                created = version == 0
+                if version < SCHEMA_VERSION:
+                    for sql in SCHEMA:
+                        conn.execute(sql)
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                if created:
+                    self._write_meta(conn, self._datastore)
+
+            if created and os.path.exists(self._json_config_path):
+                logger.info(f"Import Datastore from: {self._json_config_path}")
+                self.import_json(self._json_config_path)
+
+            meta = dict(self._query("SELECT key, value FROM meta"))
+            for k in META_KEYS:
+                if k in meta:
+                    setattr(self._datastore, k, meta[k])
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"+++ Failed to load datastore => {e}")
+            if throw_exception:
+                raise e
+
+    def changes(self, since: Optional[int] = None) -> Tuple[int, Optional[List[str]]]:
+        rows = self._query("SELECT seq FROM sqlite_sequence WHERE name = 'changes'")
+        revision = rows[0][0] if rows else 0
+        if since is None:
+            return revision, None
+
+        if since >= revision:
+            return revision, []
+        if since < revision - JOURNAL_LIMIT // 2:
+            return revision, None
+
+        rows = self._query("SELECT DISTINCT image_id FROM changes WHERE rev > ? AND rev <= ?", since, revision)
+
+        # journal is trimmed by writers; changes are complete only if nothing after since was trimmed (so far)
+        first = self._query("SELECT MIN(rev) FROM changes")[0][0]
+        if first is None or since < first - 1:
+            return revision, None
+        return revision, [r[0] for r in rows]
+
+    def _update_datastore_file(self, lock=True):
+        # records are persisted as they change; only the dataset meta (name, description...) is saved here
+        with self._transaction() as conn:
+            self._write_meta(conn, self._datastore)
+
+    def _write_meta(self, conn: sqlite3.Connection, model: LocalDatastoreModel):
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            [(k, getattr(model, k)) for k in META_KEYS],
+        )
+
+    def import_json(self, path: str) -> None:
+        """
+        Import records from JSON datastore file (see :class:`LocalDatastore`); existing records are replaced
+        """
+        model = LocalDatastoreModel.parse_file(path)
+        with self._transaction() as conn:
+            self._write_meta(conn, model)
+            conn.executemany(
+                "INSERT INTO images (id, ext, info) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET ext = excluded.ext, info = excluded.info",
+                [(k, v.image.ext, _dumps(v.image.info)) for k, v in model.objects.items()],
+            )
+            conn.executemany(
+                "INSERT INTO labels (image_id, tag, ext, info) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (image_id, tag) DO UPDATE SET ext = excluded.ext, info = excluded.info",
+                [(k, t, l.ext, _dumps(l.info)) for k, v in model.objects.items() for t, l in v.labels.items()],
+            )
+        logger.info(f"Imported {len(model.objects)} image(s) from: {path}")
+
+    def export_json(self, path: Optional[str] = None) -> str:
+        """
+        Export records into JSON datastore file (compatible with :class:`LocalDatastore`)
+
+        :param path: output file; defaults to ``json_config`` in datastore path
+        :return: path of the exported file
+        """
+        path = path if path else self._json_config_path
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps(self.json(), indent=2, default=str))
+        os.replace(tmp, path)
+        return path
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "total": self._query("SELECT COUNT(*) FROM images")[0][0],
+            "completed": self._query("SELECT COUNT(*) FROM labels WHERE tag = ?", DefaultLabelTag.FINAL)[0][0],
+            "label_tags": dict(self._query("SELECT tag, COUNT(*) FROM labels GROUP BY tag")),
+        }
+
+    def json(self):
+        objects: Dict[str, Any] = {}
+        for k, ext, info in self._query("SELECT id, ext, info FROM images ORDER BY rowid"):
+            objects[k] = {"image": {"ext": ext, "info": json.loads(info)}, "labels": {}}
+        for k, tag, ext, info in self._query("SELECT image_id, tag, ext, info FROM labels"):
+            objects[k]["labels"][tag] = {"ext": ext, "info": json.loads(info)}
+
+        d: Dict[str, Any] = {k: getattr(self._datastore, k) for k in META_KEYS}
+        d["objects"] = objects
+        return d
@@ -0,0 +1,397 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# files which are already compressed; these are always stored as-is
+COMPRESSED_EXTENSIONS = (".gz", ".zip", ".bz2", ".xz", ".zst", ".png", ".jpg", ".jpeg", ".svs", ".tif", ".tiff")
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_STORED = 0
+_DEFLATED = 8
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+_crc_cache: "OrderedDict[Tuple[str, int, int], int]" = OrderedDict()
+_crc_cache_lock = threading.Lock()
+_CRC_CACHE_SIZE = 100000
+
+
+def file_crc32(path: str, chunk_size: int = 1024 * 1024) -> int:
+    """
+    CRC32 of the file content; cached by path, size and modification time (e.g. for resumed downloads)
+    """
+    s = os.stat(path)
+    key = (path, s.st_size, s.st_mtime_ns)
+    with _crc_cache_lock:
+        crc = _crc_cache.get(key)
+        if crc is not None:
+            _crc_cache.move_to_end(key)
+            return crc
+
+    crc = 0
+    with open(path, "rb") as fp:
+        for buf in iter(lambda: fp.read(chunk_size), b""):
+            crc = zlib.crc32(buf, crc)
+
+    _cache_crc(key, crc)
+    return crc
+
+
+def _cache_crc(key: Tuple[str, int, int], crc: int):
+    with _crc_cache_lock:
+        _crc_cache[key] = crc
+        while len(_crc_cache) > _CRC_CACHE_SIZE:
+            _crc_cache.popitem(last=False)
+
+
+def _dos_time(ts: float) -> Tuple[int, int]:
+    t = time.localtime(max(ts, 315532800))  # dos time starts from 1980
+    dtime = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    ddate = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dtime, ddate
+
+
+class _Entry:
+    def __init__(self, arcname: str, path: Optional[str] = None, data: Optional[bytes] = None, deflate=False):
+        self.name = arcname.replace(os.sep, "/").encode("utf-8")
+        self.path = path
+        self.data = data
+        self.deflate = deflate
+
+        if data is not None:
+            self.size, self.mtime = len(data), 0.0
+            self.key = None
+        else:
+            s = os.stat(path)  # type: ignore
+            self.size, self.mtime = s.st_size, s.st_mtime
+            self.key = (path, s.st_size, s.st_mtime_ns)
+
+        # CRC of files is known only after reading them; so it follows the file data (data descriptor)
+        self.descriptor = data is None
+        self.crc = zlib.crc32(data) if data is not None else 0
+        self.has_crc = data is not None or self.size == 0
+        self.csize = self.size
+        self.offset = 0
+
+    def zip64(self) -> bool:
+        return self.size >= _ZIP64_LIMIT
+
+    def set_crc(self, crc: int):
+        self.crc, self.has_crc = crc, True
+        if self.key:
+            _cache_crc(self.key, crc)
+
+
+class ZipStream:
+    """
+    ZIP archive which is produced on the fly (e.g. into HTTP response) instead of being written to a temporary file.
+
+    Files are stored without compression (already compressed ones like ``.nii.gz`` are never recompressed), so the
+    archive layout and size are known upfront; this allows HTTP range requests to resume a download from any offset.
+    CRC32 of a file is computed while it is streamed and written after its data (data descriptor); so every file is
+    read only once.  For range requests, CRC32 of files which are not streamed in full is computed ahead in parallel
+    (and cached).  File data is read with a read-ahead of one chunk.
+
+    If ``compress_level > 0``, files which are not already compressed are deflated on the fly; archive size is not
+    known in this case and range requests are not supported.
+    """
+
+    def __init__(
+        self,
+        files: Sequence[Tuple[str, str]],
+        data: Sequence[Tuple[str, bytes]] = (),
+        compress_level: int = 0,
+        max_workers: int = 4,
+        chunk_size: int = 1024 * 1024,
+    ):
+        """
+        :param files: list of (arcname, path) to include
+        :param data: list of (arcname, bytes) to include (e.g. metadata)
+        :param compress_level: zlib compression level for files which are not compressed; 0 => store all files
+        :param max_workers: number of parallel readers computing CRC32 of files (not streamed in full) for a range
+        :param chunk_size: size of chunk to read/produce
+        """
+        self.compress_level = compress_level
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = chunk_size
+
+        self.entries: List[_Entry] = []
+        for arcname, path in files:
+            deflate = compress_level > 0 and not path.lower().endswith(COMPRESSED_EXTENSIONS)
+            self.entries.append(_Entry(arcname, path=path, deflate=deflate))
+        for arcname, d in data:
+            self.entries.append(_Entry(arcname, data=d))
+
+        self._seekable = not any(e.deflate for e in self.entries)
+        self._size: Optional[int] = self._layout() if self._seekable else None
+
+    def size(self) -> Optional[int]:
+        """
+        Total size of the archive in bytes; None if it is not known upfront (compression enabled)
+        """
+        return self._size
+
+    def etag(self) -> str:
+        """
+        Validator for the archive content (names, sizes and modification times of included files)
+        """
+        m = hashlib.md5()
+        for e in self.entries:
+            m.update(e.name)
+            m.update(f":{e.size}:{e.mtime if e.data is None else e.crc}|".encode())
+        return m.hexdigest()
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.stream()
+
+    def stream(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Produce the archive bytes in the range [start, end)
+        """
+        if not self._seekable:
+            if start or end is not None:
+                raise ValueError("Range is not supported for compressed archive")
+            return self._stream_deflate()
+
+        end = self._size if end is None else min(end, self._size)  # type: ignore
+        return self._stream_stored(start, end)
+
+    def _stream_stored(self, start: int, end: int) -> Iterator[bytes]:
+        segments: List[Tuple[int, int, Optional[_Entry], str]] = []  # (start, end, entry, part)
+        pos = 0
+        for e in self.entries:
+            for part, size in (("header", len(self._local_header(e))), ("data", e.size), ("desc", self._desc_size(e))):
+                segments.append((pos, pos + size, e, part))
+                pos += size
+        segments.append((pos, self._size, None, "central"))  # type: ignore
+
+        # CRC of files which are not streamed in full is needed for descriptors (and central directory) in the range
+        central = segments[-1][1] > start and segments[-1][0] < end
+        full = {id(e) for s, t, e, part in segments if part == "data" and start <= s and t <= end}
+        needed = {id(e): e for s, t, e, part in segments if part == "desc" and (central or (t > start and s < end))}
+
+        crc_pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="ZIP-CRC")
+        io_pool = ThreadPoolExecutor(1, thread_name_prefix="ZIP-IO")
+        crcs: Dict[int, Future] = {}
+        try:
+            for i, e in needed.items():
+                if not e.has_crc and i not in full:
+                    crcs[i] = crc_pool.submit(file_crc32, e.path)
+
+            def crc(e: _Entry):
+                if id(e) in crcs:
+                    e.set_crc(crcs.pop(id(e)).result())
+                return e.crc
+
+            for s, t, e, part in segments:
+                if t <= start or s >= end:
+                    continue
+
+                lo, hi = max(start, s) - s, min(end, t) - s
+                if e is None:
+                    for x in self.entries:
+                        crc(x)
+                    yield self._central_directory(s)[lo:hi]
+                elif part == "header":
+                    yield self._local_header(e)[lo:hi]
+                elif part == "data":
+                    if e.has_crc or id(e) not in full:
+                        yield from self._read(e, lo, hi, io_pool)
+                        continue
+                    c = 0
+                    for buf in self._read(e, lo, hi, io_pool):
+                        c = zlib.crc32(buf, c)
+                        yield buf
+                    e.set_crc(c)
+                else:
+                    crc(e)
+                    yield self._descriptor(e)[lo:hi]
+        finally:
+            for f in crcs.values():
+                f.cancel()
+            crc_pool.shutdown(wait=False)
+            io_pool.shutdown(wait=False)
+
+    def _stream_deflate(self) -> Iterator[bytes]:
+        io_pool = ThreadPoolExecutor(1, thread_name_prefix="ZIP-IO")
+        try:
+            pos = 0
+            for e in self.entries:
+                e.offset = pos
+                header = self._local_header(e)
+                yield header
+                if not e.descriptor:
+                    yield from self._read(e, 0, e.size, io_pool)
+                    pos += len(header) + e.size
+                    continue
+
+                c = zlib.compressobj(self.compress_level, zlib.DEFLATED, -15) if e.deflate else None
+                crc, csize = 0, 0
+                for buf in self._read(e, 0, e.size, io_pool):
+                    crc = zlib.crc32(buf, crc)
+                    out = c.compress(buf) if c else buf
+                    csize += len(out)
+                    if out:
+                        yield out
+                if c:
+                    out = c.flush()
+                    csize += len(out)
+                    yield out
+
+                e.set_crc(crc)
+                e.csize = csize
+                descriptor = self._descriptor(e)
+                yield descriptor
+                pos += len(header) + csize + len(descriptor)
+
+            yield self._central_directory(pos)
+        finally:
+            io_pool.shutdown(wait=False)
+
+    def _read(self, e: _Entry, lo: int, hi: int, pool: ThreadPoolExecutor) -> Iterator[bytes]:
+        if e.data is not None:
+            yield e.data[lo:hi]
+            return
+
+        with open(e.path, "rb") as fp:  # type: ignore
+            fp.seek(lo)
+            remaining = hi - lo
+            f = pool.submit(fp.read, min(self.chunk_size, remaining))
+            while remaining > 0:
+                buf = f.result()
+                if not buf:
+                    raise IOError(f"File is modified while creating archive: {e.path}")
+
+                remaining -= len(buf)
+                if remaining > 0:
+                    f = pool.submit(fp.read, min(self.chunk_size, remaining))
+                yield buf
+
+    def _layout(self) -> int:
+        pos = 0
+        for e in self.entries:
+            e.offset = pos
+            pos += len(self._local_header(e)) + e.size + self._desc_size(e)
+        return pos + len(self._central_directory(pos))
+
+    @staticmethod
+    def _desc_size(e: _Entry) -> int:
+        return (24 if e.zip64() else 16) if e.descriptor else 0
+
+    @staticmethod
+    def _descriptor(e: _Entry) -> bytes:
+        fmt = "<IIQQ" if e.zip64() else "<IIII"
+        return struct.pack(fmt, 0x08074B50, e.crc, e.csize, e.size)
+
+    def _local_header(self, e: _Entry) -> bytes:
+        flags = _FLAG_UTF8 | (_FLAG_DATA_DESCRIPTOR if e.descriptor else 0)
+        method = _DEFLATED if e.deflate else _STORED
+        dtime, ddate = _dos_time(e.mtime)
+        crc = 0 if e.descriptor else e.crc
+        size = 0 if e.deflate else e.size
+
+        extra = b""
+        if e.zip64():
+            extra = struct.pack("<HHQQ", 0x0001, 16, size, size)
+            size = _ZIP64_LIMIT
+
+        header = struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            45 if e.zip64() else 20,
+            flags,
+            method,
+            dtime,
+            ddate,
+            crc,
+            size,
+            size,
+            len(e.name),
+            len(extra),
+        )
+        return header + e.name + extra
+
+    def _central_directory(self, offset: int) -> bytes:
+        records = []
+        for e in self.entries:
+            flags = _FLAG_UTF8 | (_FLAG_DATA_DESCRIPTOR if e.descriptor else 0)
+            method = _DEFLATED if e.deflate else _STORED
+            dtime, ddate = _dos_time(e.mtime)
+
+            size, csize, pos = e.size, e.csize, e.offset
+            z64 = []
+            if size >= _ZIP64_LIMIT:
+                z64.append(size)
+                size = _ZIP64_LIMIT
+            if csize >= _ZIP64_LIMIT or (e.deflate and z64):
+                z64.append(csize)
+                csize = _ZIP64_LIMIT
+            if pos >= _ZIP64_LIMIT:
+                z64.append(pos)
+                pos = _ZIP64_LIMIT
+            extra = struct.pack(f"<HH{len(z64)}Q", 0x0001, 8 * len(z64), *z64) if z64 else b""
+
+            version = 45 if z64 else 20
+            records.append(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x02014B50,
+                    version | (3 << 8),  # made by unix
+                    version,
+                    flags,
+                    method,
+                    dtime,
+                    ddate,
+                    e.crc,
+                    csize,
+                    size,
+                    len(e.name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    0o100644 << 16,
+                    pos,
+                )
+                + e.name
+                + extra
+            )
+
+        cd = b"".join(records)
+        count, cd_size = len(self.entries), len(cd)
+        end = b""
+        if count >= 0xFFFF or cd_size >= _ZIP64_LIMIT or offset >= _ZIP64_LIMIT:
+            end += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, cd_size, offset)
+            end += struct.pack("<IIQI", 0x07064B50, 0, offset + cd_size, 1)
+        end += struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, 0xFFFF),
+            min(count, 0xFFFF),
+            min(cd_size, _ZIP64_LIMIT),
+            min(offset, _ZIP64_LIMIT),
+            0,
+        )
+        return cd + end
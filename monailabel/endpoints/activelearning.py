@@ -19,6 +19,7 @@ from monailabel.config import RBAC_USER, settings
 from monailabel.endpoints.user.auth import RBAC, User
 from monailabel.interfaces.app import MONAILabelApp
 from monailabel.interfaces.utils.app import app_instance
+from monailabel.utils.async_tasks.executor import run_in_executor
 
 logger = logging.getLogger(__name__)
 
@@ -67,4 +68,4 @@ async def api_sample(
     params: Optional[dict] = None,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return sample(strategy, params, user.username)
+    return await run_in_executor("datastore", sample, strategy, params, user.username)
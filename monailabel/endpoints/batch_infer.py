@@ -81,6 +81,7 @@ async def api_run(
         "label_tag": DefaultLabelTag.ORIGINAL,
         "max_workers": 1,
         "max_batch_size": 0,
+        "commit_size": 32,
     },
     run_sync: Optional[bool] = False,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ADMIN)),
@@ -13,20 +13,23 @@ import json
 import logging
 import os
 import pathlib
+import re
 import shutil
 import tempfile
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
 from fastapi.background import BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 from monailabel.config import RBAC_ADMIN, RBAC_ANNOTATOR, RBAC_USER, settings
+from monailabel.datastore.local import LocalDatastore
 from monailabel.endpoints.user.auth import RBAC, User
 from monailabel.interfaces.app import MONAILabelApp
 from monailabel.interfaces.datastore import Datastore, DefaultLabelTag
 from monailabel.interfaces.utils.app import app_instance
+from monailabel.utils.async_tasks.executor import run_in_executor
 from monailabel.utils.others.generic import file_checksum, get_mime_type, remove_file
 
 logger = logging.getLogger(__name__)
@@ -196,12 +199,61 @@ def download_dataset(limit_cases: Optional[int] = None):
     return FileResponse(path, media_type=get_mime_type(path), filename="dataset.zip")
 
 
+def download_dataset_stream(
+    limit_cases: Optional[int] = None,
+    label_tag: Optional[str] = None,
+    compress_level: int = 0,
+    range_header: Optional[str] = None,
+    if_range: Optional[str] = None,
+):
+    instance: MONAILabelApp = app_instance()
+    d = instance.datastore()
+    if not isinstance(d, LocalDatastore):
+        if label_tag and label_tag != DefaultLabelTag.FINAL:
+            raise HTTPException(status_code=400, detail=f"Label Tag '{label_tag}' is NOT supported by the datastore")
+        return download_dataset(limit_cases)
+
+    archive = d.get_dataset_archive_stream(limit_cases, label_tag, compress_level)
+    if not archive.entries:
+        raise HTTPException(status_code=404, detail="ZIP archive NOT Found; nothing to include")
+
+    size = archive.size()
+    etag = f'"{archive.etag()}"'
+    headers = {"Content-Disposition": 'attachment; filename="dataset.zip"', "ETag": etag}
+    if size is None:
+        return StreamingResponse(archive.stream(), media_type="application/zip", headers=headers)
+
+    headers["Accept-Ranges"] = "bytes"
+    r = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip()) if range_header else None
+    if r and (r.group(1) or r.group(2)) and (not if_range or if_range == etag):
+        if r.group(1):
+            start = int(r.group(1))
+            end = min(int(r.group(2)) + 1, size) if r.group(2) else size
+        else:
+            start, end = max(0, size - int(r.group(2))), size
+        if start >= end:
+            raise HTTPException(
+                status_code=416, detail="Range Not Satisfiable", headers={"Content-Range": f"bytes */{size}"}
+            )
+
+        logger.info(f"Stream dataset archive; Range: {start}-{end - 1}/{size}")
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        headers["Content-Length"] = str(end - start)
+        return StreamingResponse(
+            archive.stream(start, end), status_code=206, media_type="application/zip", headers=headers
+        )
+
+    logger.info(f"Stream dataset archive; Size: {size}")
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(archive.stream(), media_type="application/zip", headers=headers)
+
+
 @router.get("/", summary=f"{RBAC_USER}Get All Images/Labels from datastore")
 async def api_datastore(
     output: Optional[ResultType] = None,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return datastore(output)
+    return await run_in_executor("datastore", datastore, output)
 
 
 @router.put("/", summary=f"{RBAC_ANNOTATOR}Upload new Image", include_in_schema=False, deprecated=True)
@@ -213,7 +265,7 @@ async def api_add_image(
     file: UploadFile = File(...),
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ANNOTATOR)),
 ):
-    return add_image(background_tasks, image, params, file, user.username)
+    return await run_in_executor("datastore", add_image, background_tasks, image, params, file, user.username)
 
 
 @router.delete(
@@ -221,7 +273,7 @@ async def api_add_image(
 )
 @router.delete("/image", summary=f"{RBAC_ADMIN}Remove Image and corresponding labels")
 async def api_remove_image(id: str, user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ADMIN))):
-    return remove_image(id, user.username)
+    return await run_in_executor("datastore", remove_image, id, user.username)
 
 
 @router.head("/image", summary=f"{RBAC_USER}Check If Image Exists")
@@ -230,17 +282,17 @@ async def api_check_image(
     check_sum: Optional[str] = None,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return download_image(image, check_only=True, check_sum=check_sum)
+    return await run_in_executor("datastore", download_image, image, check_only=True, check_sum=check_sum)
 
 
 @router.get("/image", summary=f"{RBAC_USER}Download Image")
 async def api_download_image(image: str, user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER))):
-    return download_image(image)
+    return await run_in_executor("datastore", download_image, image)
 
 
 @router.get("/image/info", summary=f"{RBAC_USER}Get Image Info")
 async def api_get_image_info(image: str, user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER))):
-    return get_image_info(image)
+    return await run_in_executor("datastore", get_image_info, image)
 
 
 @router.put("/image/info", summary=f"{RBAC_ANNOTATOR}Update Image Info")
@@ -249,7 +301,7 @@ async def api_put_image_info(
     info: str = Form("{}"),
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ANNOTATOR)),
 ):
-    return update_image_info(image, info, user.username)
+    return await run_in_executor("datastore", update_image_info, image, info, user.username)
 
 
 @router.put("/label", summary=f"{RBAC_ANNOTATOR}Save Finished Label")
@@ -261,27 +313,27 @@ async def api_save_label(
     label: UploadFile = File(...),
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ANNOTATOR)),
 ):
-    return save_label(background_tasks, image, params, tag, label, user.username)
+    return await run_in_executor("datastore", save_label, background_tasks, image, params, tag, label, user.username)
 
 
 @router.delete("/label", summary=f"{RBAC_ADMIN}Remove Label")
 async def api_remove_label(id: str, tag: str, user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ADMIN))):
-    return remove_label(id, tag, user.username)
+    return await run_in_executor("datastore", remove_label, id, tag, user.username)
 
 
 @router.head("/label", summary=f"{RBAC_USER}Check If Label Exists")
 async def api_check_label(image: str, tag: str, user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER))):
-    return download_label(image, tag, check_only=True)
+    return await run_in_executor("datastore", download_label, image, tag, check_only=True)
 
 
 @router.get("/label", summary=f"{RBAC_USER}Download Label")
 async def api_download_label(label: str, tag: str, user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER))):
-    return download_label(label, tag)
+    return await run_in_executor("datastore", download_label, label, tag)
 
 
 @router.get("/label/info", summary=f"{RBAC_USER}Get Label Info")
 async def api_get_label_info(label: str, tag: str, user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER))):
-    return get_label_info(label, tag)
+    return await run_in_executor("datastore", get_label_info, label, tag)
 
 
 @router.put("/label/info", summary=f"{RBAC_ANNOTATOR}Update Label Info")
@@ -291,7 +343,7 @@ async def api_put_label_info(
     info: str = Form("{}"),
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ANNOTATOR)),
 ):
-    return update_label_info(label, tag, info, user.username)
+    return await run_in_executor("datastore", update_label_info, label, tag, info, user.username)
 
 
 @router.put("/updatelabelinfo", summary=f"{RBAC_ANNOTATOR}Update label info", include_in_schema=False, deprecated=True)
@@ -301,12 +353,28 @@ async def api_update_label_info(
     params: str = Form("{}"),
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ANNOTATOR)),
 ):
-    return update_label_info(label, tag, params, user.username)
+    return await run_in_executor("datastore", update_label_info, label, tag, params, user.username)
 
 
 @router.get("/dataset", summary=f"{RBAC_ANNOTATOR}Download full dataset as ZIP archive")
 async def api_download_dataset(
+    request: Request,
     limit_cases: Optional[int] = None,
+    stream: bool = False,
+    label_tag: Optional[str] = None,
+    compress_level: int = 0,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_ANNOTATOR)),
 ):
-    return download_dataset(limit_cases)
+    if not stream:
+        if label_tag and label_tag != DefaultLabelTag.FINAL:
+            raise HTTPException(status_code=400, detail="Label Tag is supported only for stream=true")
+        return await run_in_executor("datastore", download_dataset, limit_cases)
+    return await run_in_executor(
+        "datastore",
+        download_dataset_stream,
+        limit_cases,
+        label_tag,
+        compress_level,
+        request.headers.get("range"),
+        request.headers.get("if-range"),
+    )
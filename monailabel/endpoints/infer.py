@@ -15,13 +15,13 @@ import os
 import pathlib
 import shutil
 import tempfile
+import uuid
 from enum import Enum
 from typing import Optional
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from fastapi.background import BackgroundTasks
-from fastapi.responses import FileResponse, Response
-from requests_toolbelt import MultipartEncoder
+from fastapi.responses import FileResponse, StreamingResponse
 
 from monailabel.config import RBAC_USER, settings
 from monailabel.datastore.dicom import DICOMWebDatastore
@@ -29,6 +29,7 @@ from monailabel.datastore.utils.convert import binary_to_image, nifti_to_dicom_s
 from monailabel.endpoints.user.auth import RBAC, User
 from monailabel.interfaces.app import MONAILabelApp
 from monailabel.interfaces.utils.app import app_instance
+from monailabel.utils.async_tasks.executor import run_in_executor
 from monailabel.utils.others.generic import get_mime_type, remove_file
 
 logger = logging.getLogger(__name__)
@@ -75,6 +76,7 @@ class ResultType(str, Enum):
     json = "json"
     all = "all"
     dicom_seg = "dicom_seg"
+    sparse = "sparse"
 
 
 def send_response(datastore, result, output, background_tasks):
@@ -88,7 +90,7 @@ def send_response(datastore, result, output, background_tasks):
         else:
             background_tasks.add_task(remove_file, res_img)
 
-    if output == "json":
+    if output == "json" or output == "sparse":
         return res_json
 
     m_type = get_mime_type(res_img)
@@ -103,16 +105,47 @@ def send_response(datastore, result, output, background_tasks):
         else:
             return FileResponse(res_dicom_seg, media_type="application/dicom", filename=os.path.basename(res_dicom_seg))
 
-    res_fields = dict()
-    res_fields["params"] = (None, json.dumps(res_json), "application/json")
-    if res_img and os.path.exists(res_img):
-        res_fields["image"] = (os.path.basename(res_img), open(res_img, "rb"), m_type)
-    else:
+    if not res_img or not os.path.exists(res_img):
         logger.info(f"Return only Result Json as Result Image is not available: {res_img}")
         return res_json
 
-    return_message = MultipartEncoder(fields=res_fields)
-    return Response(content=return_message.to_string(), media_type=return_message.content_type)
+    return multipart_response(res_json, res_img, m_type)
+
+
+def multipart_response(params, file: str, media_type: str, chunk_size: int = 1024 * 1024) -> StreamingResponse:
+    """
+    Multipart (params + image) response where the image is streamed from the file in chunks
+    """
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="params"\r\n'
+        "Content-Type: application/json\r\n\r\n"
+        f"{json.dumps(params)}\r\n"
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="image"; filename="{os.path.basename(file)}"\r\n'
+        f"Content-Type: {media_type}\r\n\r\n"
+    ).encode("utf-8")
+    tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+    # file is opened before returning response; so it can be removed (background task) once streamed
+    fp = open(file, "rb")
+    size = len(head) + os.fstat(fp.fileno()).st_size + len(tail)
+
+    def stream():
+        try:
+            yield head
+            for buf in iter(lambda: fp.read(chunk_size), b""):
+                yield buf
+            yield tail
+        finally:
+            fp.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=f"multipart/form-data; boundary={boundary}",
+        headers={"Content-Length": str(size)},
+    )
 
 
 def run_inference(
@@ -162,6 +195,10 @@ def run_inference(
     p = json.loads(params) if params else {}
     request.update(p)
 
+    # label as cropped bbox + rle/bitpack in result json (optionally delta against previous result in session)
+    if output == ResultType.sparse:
+        request["result_sparse"] = True
+
     if session_id:
         session = instance.sessions().get_session(session_id)
         if session:
@@ -172,6 +209,8 @@ def run_inference(
     result = instance.infer(request)
     if result is None:
         raise HTTPException(status_code=500, detail="Failed to execute infer")
+    if output == ResultType.sparse and "label_sparse" not in (result.get("params") or {}):
+        logger.warning(f"Writer of '{model}' does not support sparse output; result has no 'label_sparse'")
 
     # Dicom Seg Integration
     if output == "dicom_seg":
@@ -184,7 +223,8 @@ def run_inference(
         image_uri = instance.datastore().get_image_uri(image)
         suffixes = [".nii", ".nii.gz", ".nrrd"]
         image_path = [image_uri.replace(suffix, "") for suffix in suffixes if image_uri.endswith(suffix)][0]
-        res_img = result.get("file") if result.get("file") else result.get("label")
+        res_img = result.get("file")
+        res_img = res_img if res_img else instance.datastore().get_label_uri(result.get("label"), result.get("tag"))
         dicom_seg_file = nifti_to_dicom_seg(image_path, res_img, p.get("label_info"), use_itk=True)
         result["dicom_seg"] = dicom_seg_file
 
@@ -203,4 +243,6 @@ async def api_run_inference(
     output: Optional[ResultType] = None,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return run_inference(background_tasks, model, image, session_id, params, file, label, output)
+    return await run_in_executor(
+        "infer", run_inference, background_tasks, model, image, session_id, params, file, label, output
+    )
@@ -23,6 +23,7 @@ from monailabel.config import RBAC_USER, settings
 from monailabel.endpoints.user.auth import RBAC, User
 from monailabel.interfaces.app import MONAILabelApp
 from monailabel.interfaces.utils.app import app_instance
+from monailabel.utils.async_tasks.executor import run_in_executor
 from monailabel.utils.others.generic import get_basename, get_mime_type, remove_file
 from monailabel.utils.sessions import Sessions
 
@@ -118,7 +119,7 @@ async def api_get_session(
     image: bool = False,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return get_session(session_id, update_ts, image)
+    return await run_in_executor("datastore", get_session, session_id, update_ts, image)
 
 
 @router.put("/", summary=f"{RBAC_USER}Create new session with Image")
@@ -129,7 +130,7 @@ async def api_create_session(
     files: List[UploadFile] = File(...),
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return create_session(background_tasks, uncompress, expiry, files)
+    return await run_in_executor("datastore", create_session, background_tasks, uncompress, expiry, files)
 
 
 @router.delete("/{session_id}", summary=f"{RBAC_USER}Delete Session")
@@ -137,4 +138,4 @@ async def api_remove_session(
     session_id: str,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return remove_session(session_id)
+    return await run_in_executor("datastore", remove_session, session_id)
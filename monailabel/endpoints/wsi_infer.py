@@ -26,6 +26,7 @@ from monailabel.config import RBAC_USER, settings
 from monailabel.endpoints.user.auth import RBAC, User
 from monailabel.interfaces.app import MONAILabelApp
 from monailabel.interfaces.utils.app import app_instance
+from monailabel.utils.async_tasks.executor import run_in_executor
 from monailabel.utils.others.generic import get_mime_type, remove_file
 
 logger = logging.getLogger(__name__)
@@ -49,6 +50,7 @@ class WSIInput(BaseModel):
 class ResultType(str, Enum):
     asap = "asap"
     dsa = "dsa"
+    geojson = "geojson"
     json = "json"
 
 
@@ -129,7 +131,9 @@ async def api_run_wsi_inference(
     output: Optional[ResultType] = None,
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
-    return run_wsi_inference(background_tasks, model, image, session_id, None, wsi, output)
+    return await run_in_executor(
+        "wsi", run_wsi_inference, background_tasks, model, image, session_id, None, wsi, output
+    )
 
 
 @router.post("/wsi_v2/{model}", summary=f"{RBAC_USER}Run WSI Inference for supported model")
@@ -144,4 +148,27 @@ async def api_run_wsi_v2_inference(
     user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
 ):
     w = WSIInput.parse_obj(json.loads(wsi))
-    return run_wsi_inference(background_tasks, model, image, session_id, file, w, output)
+    return await run_in_executor("wsi", run_wsi_inference, background_tasks, model, image, session_id, file, w, output)
+
+
+@router.get("/wsi_v2/status/{job_id}", summary=f"{RBAC_USER}Get progress/partial result of running WSI Inference")
+async def api_wsi_inference_status(
+    background_tasks: BackgroundTasks,
+    job_id: str,
+    partial: bool = False,
+    user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
+):
+    instance: MONAILabelApp = app_instance()
+    # own executor; wsi one is busy running the job (and partial snapshot copies the output written so far)
+    status = await run_in_executor("wsi_status", instance.infer_wsi_status, job_id, partial)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"WSI Inference for job '{job_id}' is not running")
+
+    res_file = status.pop("file", None)
+    if not res_file:
+        return status
+
+    background_tasks.add_task(remove_file, res_file)
+    m_type = get_mime_type(res_file)
+    headers = {"X-Progress": json.dumps(status)}
+    return FileResponse(res_file, media_type=m_type, filename=os.path.basename(res_file), headers=headers)
@@ -9,6 +9,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextvars
 import copy
 import logging
 import multiprocessing
@@ -17,10 +18,11 @@ import platform
 import random
 import shutil
 import tempfile
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
-from typing import Any, Callable, Dict, Optional, Sequence, Union
+from typing import Any, Callable, Dict, Optional, Sequence, Set, Union
 
 import requests
 import schedule
@@ -37,6 +39,7 @@ from monailabel.config import settings
 from monailabel.datastore.dicom import DICOMwebClientX, DICOMWebDatastore
 from monailabel.datastore.dsa import DSADatastore
 from monailabel.datastore.local import LocalDatastore
+from monailabel.datastore.sqlite import SQLiteDatastore
 from monailabel.datastore.xnat import XNATDatastore
 from monailabel.interfaces.datastore import Datastore, DefaultLabelTag
 from monailabel.interfaces.exception import MONAILabelError, MONAILabelException
@@ -45,9 +48,14 @@ from monailabel.interfaces.tasks.infer_v2 import InferTask
 from monailabel.interfaces.tasks.scoring import ScoringMethod
 from monailabel.interfaces.tasks.strategy import Strategy
 from monailabel.interfaces.tasks.train import TrainTask
-from monailabel.interfaces.utils.wsi import create_infer_wsi_tasks
+from monailabel.interfaces.utils.wsi import create_infer_wsi_tasks, filter_infer_wsi_tasks
 from monailabel.tasks.activelearning.random import Random
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+from monailabel.tasks.infer.pipeline import PipelinedInferExecutor
+from monailabel.tasks.infer.registry import model_registry, network_size
+from monailabel.tasks.infer.wsi import wsi_infer_engine
 from monailabel.tasks.train.bundle import BundleTrainTask
+from monailabel.transform.cache import cache_stats
 from monailabel.utils.async_tasks.task import AsyncTask
 from monailabel.utils.others.generic import (
     file_checksum,
@@ -56,7 +64,9 @@ from monailabel.utils.others.generic import (
     name_to_device,
     strtobool,
 )
-from monailabel.utils.others.pathology import create_asap_annotations_xml, create_dsa_annotations_json
+from monailabel.utils.others.pathology import AnnotationWriter, create_annotation_writer
+from monailabel.utils.others.polygon_merge import TilePolygonMerger
+from monailabel.utils.others.slide_cache import slide_request_stats
 from monailabel.utils.sessions import Sessions
 
 logger = logging.getLogger(__name__)
@@ -107,18 +117,32 @@ class MONAILabelApp:
         self._auto_update_scoring = settings.MONAI_LABEL_AUTO_UPDATE_SCORING
         self._sessions = self._load_sessions(load=settings.MONAI_LABEL_SESSIONS)
 
-        self._infers_threadpool = (
-            None
-            if settings.MONAI_LABEL_INFER_CONCURRENCY < 0
-            else ThreadPoolExecutor(max_workers=settings.MONAI_LABEL_INFER_CONCURRENCY, thread_name_prefix="INFER")
-        )
+        self._infers_threadpool = self._init_infers_threadpool()
 
         # control call back requests
         self._server_mode = bool(strtobool(conf.get("server_mode", "false")))
 
+        # model warm-up status (readiness)
+        self._warmup: Dict[str, Dict[str, Any]] = {}
+
+        # running wsi infer requests (job_id => annotation writer)
+        self._wsi_jobs: Dict[str, Dict[str, Any]] = {}  # job id => {writer, tiles, total}
+
     def init_infers(self) -> Dict[str, InferTask]:
         return {}
 
+    def _init_infers_threadpool(self):
+        concurrency = settings.MONAI_LABEL_INFER_CONCURRENCY
+        if concurrency < 0:
+            return None
+
+        if settings.MONAI_LABEL_INFER_PIPELINE:
+            logger.info(f"Using Pipelined Infer Executor; Max Workers (per stage): {concurrency}")
+            return PipelinedInferExecutor(
+                max_workers=concurrency, device_workers=max(1, settings.MONAI_LABEL_INFER_BATCH_SIZE)
+            )
+        return ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="INFER")
+
     def init_trainers(self) -> Dict[str, TrainTask]:
         return {}
 
@@ -137,11 +161,21 @@ class MONAILabelApp:
             self.studies = self.studies.rstrip("/").strip()
             return self.init_remote_datastore()
 
+        if settings.MONAI_LABEL_DATASTORE_ENGINE.lower() == "sqlite":
+            return SQLiteDatastore(
+                self.studies,
+                extensions=settings.MONAI_LABEL_DATASTORE_FILE_EXT,
+                auto_reload=settings.MONAI_LABEL_DATASTORE_AUTO_RELOAD,
+                read_only=settings.MONAI_LABEL_DATASTORE_READ_ONLY,
+                event_debounce=settings.MONAI_LABEL_DATASTORE_EVENT_DEBOUNCE,
+            )
+
         return LocalDatastore(
             self.studies,
             extensions=settings.MONAI_LABEL_DATASTORE_FILE_EXT,
             auto_reload=settings.MONAI_LABEL_DATASTORE_AUTO_RELOAD,
             read_only=settings.MONAI_LABEL_DATASTORE_READ_ONLY,
+            event_debounce=settings.MONAI_LABEL_DATASTORE_EVENT_DEBOUNCE,
         )
 
     def init_remote_datastore(self) -> Datastore:
@@ -224,6 +258,9 @@ class MONAILabelApp:
             "scoring": {k: v.info() for k, v in self._scoring_methods.items()},
             "train_stats": {k: v.stats() for k, v in self._trainers.items()},
             "datastore": self._datastore.status(),
+            "model_cache": model_registry().stats(),
+            "transform_cache": cache_stats(),
+            "warmup": copy.deepcopy(self._warmup),
         }
 
         # If labels are not provided, aggregate from all individual infers
@@ -295,29 +332,41 @@ class MONAILabelApp:
         else:
             request["save_label"] = False
 
-        if self._infers_threadpool:
+        # write result directly next to the datastore labels; save_label then moves it in place (no copies)
+        if request.get("save_label") and not request.get("result_output_dir"):
+            staging = datastore.get_label_staging_path()
+            if staging:
+                request["result_output_dir"] = staging
+
+        if isinstance(self._infers_threadpool, PipelinedInferExecutor):
+            f = self._infers_threadpool.submit(task, request)
+            result_file_name, result_json = f.result(request.get("timeout", settings.MONAI_LABEL_INFER_TIMEOUT))
+        elif self._infers_threadpool:
 
             def run_infer_in_thread(t, r):
                 handle_torch_linalg_multithread(r)
                 return t(r)
 
-            f = self._infers_threadpool.submit(run_infer_in_thread, t=task, r=request)
+            f = self._infers_threadpool.submit(contextvars.copy_context().run, run_infer_in_thread, task, request)
             result_file_name, result_json = f.result(request.get("timeout", settings.MONAI_LABEL_INFER_TIMEOUT))
         else:
             result_file_name, result_json = task(request)
 
         label_id = None
+        tag = DefaultLabelTag.ORIGINAL
         if result_file_name and os.path.exists(result_file_name):
-            tag = request.get("label_tag", DefaultLabelTag.ORIGINAL)
             save_label = request.get("save_label", False)
             if save_label:
-                label_id = datastore.save_label(
-                    image_id, result_file_name, tag, {"model": model, "params": result_json}
-                )
+                tag = request.get("label_tag", DefaultLabelTag.ORIGINAL)
+                params = {k: v for k, v in result_json.items() if k != "label_sparse"} if result_json else result_json
+                label_id = datastore.save_label(image_id, result_file_name, tag, {"model": model, "params": params})
+                # staged result is moved into datastore; refer to the label (don't clean up)
+                if not os.path.exists(result_file_name):
+                    result_file_name = None
             else:
                 label_id = result_file_name
 
-        return {"label": label_id, "tag": DefaultLabelTag.ORIGINAL, "file": result_file_name, "params": result_json}
+        return {"label": label_id, "tag": tag, "file": result_file_name, "params": result_json}
 
     def batch_infer(self, request, datastore=None):
         """
@@ -465,9 +514,79 @@ class MONAILabelApp:
 
         return res
 
+    def warmup(self, models=None, forward=True, devices=None):
+        """
+        Load infer models and (optionally) run synthetic forward pass to warm them up.
+        Warm-up status/latencies per model are reported as part of app info.
+
+        Models are loaded on the devices which requests resolve to (see :func:`name_to_device`).  A model is not
+        loaded on a device when it does not fit in what is left of the model cache budget of that device
+        (MONAI_LABEL_MODEL_CACHE_BUDGET), so warm-up does not cycle models through the cache.
+
+        Args:
+            models: list of model names to warm-up; None or "all" to warm-up all infer models
+            forward: run synthetic forward pass after loading the model
+            devices: list of devices to warm-up (default: ["cuda"], i.e. the default device of infer requests)
+        """
+        models = list(self._infers.keys()) if not models or models == "all" or "all" in models else models
+        models = [m for m in models if self._infers.get(m) and self._infers[m].is_valid()]
+        for m in models:
+            self._warmup[m] = {"status": "pending"}
+
+        registry = model_registry()
+        devices = list(dict.fromkeys(name_to_device(d) for d in (devices if devices else ["cuda"])))
+        full: Set[str] = set()
+
+        def displaced():
+            s = registry.stats()
+            return s["offloads"] + s["evictions"]
+
+        for m in models:
+            self._warmup[m]["status"] = "loading"
+            try:
+                latencies = {}
+                task = self._infers[m]
+                size = network_size(task.network) if isinstance(task, BasicInferTask) and task.network else 0
+                for device in devices:
+                    available = registry.available(device)
+                    if device in full or (available is not None and available < max(size, 1)):
+                        logger.info(f"Skip Model Warm-up: {m}; Not enough model cache budget for {device}")
+                        continue
+
+                    count = displaced()
+                    latencies[device] = task.warmup(device, forward)
+                    if displaced() > count:
+                        full.add(device)
+
+                # tasks without a warm-up (e.g. not a BasicInferTask) report no latencies
+                status = "ready" if any(latencies.values()) else "skipped"
+                self._warmup[m] = {"status": status, "latencies": latencies}
+                logger.info(f"Model Warm-up {status}: {m}; Latencies: {latencies}")
+            except Exception as e:
+                logger.warning(f"Model Warm-up failed: {m}", exc_info=True)
+                self._warmup[m] = {"status": "failed", "error": str(e)}
+        return self._warmup
+
     def on_init_complete(self):
         logger.info("App Init - completed")
 
+        # Micro-batching only kicks in for concurrent /infer requests
+        batched = [n for n, t in self._infers.items() if isinstance(t, BasicInferTask) and t._batcher is not None]
+        if batched and settings.MONAI_LABEL_ENDPOINT_INFER_WORKERS <= 1:
+            logger.warning(
+                f"Infer micro-batching is enabled for {batched} but MONAI_LABEL_ENDPOINT_INFER_WORKERS is "
+                f"{settings.MONAI_LABEL_ENDPOINT_INFER_WORKERS}; /infer requests run one at a time so batches never "
+                "form. Set MONAI_LABEL_ENDPOINT_INFER_WORKERS > 1 to batch concurrent requests."
+            )
+
+        # Warm-up models in background (server starts listening immediately)
+        warmup = self.conf.get("warmup", "")
+        if warmup and warmup.lower() != "false":
+            models = None if warmup.lower() in ("all", "true") else [m.strip() for m in warmup.split(",")]
+            forward = strtobool(self.conf.get("warmup_forward", "true"))
+            devices = [d.strip() for d in self.conf.get("warmup_devices", "").split(",") if d.strip()]
+            threading.Thread(target=self.warmup, args=(models, forward, devices), name="WARMUP", daemon=True).start()
+
         # Run all scoring methods
         if self._auto_update_scoring:
             self.async_scoring(None)
@@ -640,7 +759,10 @@ class MONAILabelApp:
             return res
 
         start = time.time()
+        # opens/reads of this request only (tile workers run in a copy of this context)
+        wsi_stats = slide_request_stats()
         infer_tasks = create_infer_wsi_tasks(request, image)
+        infer_tasks, tissue_stats = filter_infer_wsi_tasks(request, image, infer_tasks)
         if len(infer_tasks) > 1:
             logger.info(f"WSI Infer Request (final): {request}")
 
@@ -655,7 +777,6 @@ class MONAILabelApp:
         device = name_to_device(request.get("device", "cuda"))
         device_ids = [f"cuda:{id}" for id in gpus] if multi_gpu else [device]
 
-        res_json = {"annotations": [None] * len(infer_tasks)}
         for idx, t in enumerate(infer_tasks):
             t["logging"] = request["logging"]
             t["device"] = (
@@ -669,60 +790,114 @@ class MONAILabelApp:
         max_workers = max_workers if max_workers else max(1, multiprocessing.cpu_count() // 2)
         max_workers = min(max_workers, multiprocessing.cpu_count())
 
-        if len(infer_tasks) > 1 and (max_workers == 0 or max_workers > 1):
-            logger.info(f"MultiGpu: {multi_gpu}; Using Device(s): {device_ids}; Max Workers: {max_workers}")
-            futures = {}
-            with ThreadPoolExecutor(max_workers if max_workers else None, "WSI Infer") as executor:
-                for t in infer_tasks:
-                    futures[t["id"]] = t, executor.submit(self._run_infer_wsi_task, t)
-
-                for tid, (t, future) in futures.items():
-                    res = future.result()
-                    res_json["annotations"][tid] = res
-                    finished = len([a for a in res_json["annotations"] if a])
-                    logger.info(
-                        f"{img_id} => {tid} => {t['device']} => {finished} / {total}; Latencies: {res.get('latencies')}"
-                    )
-        else:
-            for t in infer_tasks:
-                tid = t["id"]
-                res = self._run_infer_wsi_task(t, multi_thread=False)
-                res_json["annotations"][tid] = res
-                finished = len([a for a in res_json["annotations"] if a])
+        bbox = request.get("location", [0, 0])
+        bbox.extend(request.get("size", [0, 0]))
+        res_json = {
+            "annotations": [None] * len(infer_tasks),
+            "name": f"MONAILabel Annotations - {model} for {bbox}",
+            "description": task.description,
+            "model": request.get("model"),
+            "location": request.get("location"),
+            "size": request.get("size"),
+        }
+        if tissue_stats:
+            res_json["tissue"] = tissue_stats
+
+        # polygons of finished tiles are written (and dropped) right away; partial results can be polled by job_id
+        output = request.get("output", "dsa")
+        loglevel = request.get("logging", "INFO").upper()
+        logger.debug(f"+++ WSI Inference Output Type: {output}")
+        writer = create_annotation_writer(output, res_json, loglevel, total=total)
+        job_id = request.get("job_id")
+        job: Dict[str, Any] = {"writer": writer, "tiles": 0, "total": total}
+        if job_id:
+            self._wsi_jobs[job_id] = job
+
+        # polygons near tile seams are held back and stitched (de-duplicated/unioned) once all the tiles finish
+        overlap = int(request.get("tile_overlap", 0))
+        merger = TilePolygonMerger(infer_tasks) if request.get("merge_polygons", overlap > 0) and total > 1 else None
+
+        finished = 0
+
+        def on_result(t, res):
+            nonlocal finished
+            finished += 1
+            job["tiles"] = finished
+            logger.info(
+                f"{img_id} => {t['id']} => {t['device']} => {finished} / {total}; Latencies: {res.get('latencies')}"
+            )
+            if merger:
+                res = merger.add(t["id"], res)
+            if writer:
+                writer.add(res)
+                res = {"latencies": res.get("latencies")}
+            res_json["annotations"][t["id"]] = res
+            return res
+
+        engine = wsi_infer_engine(task, request, max_workers) if len(infer_tasks) > 1 else None
+        infer_workers = max(1, max_workers)
+        try:
+            if engine:
+                infer_workers = len(device_ids) * engine.device_workers
                 logger.info(
-                    f"{img_id} => {tid} => {t['device']} => {finished} / {total}; Latencies: {res.get('latencies')}"
+                    f"MultiGpu: {multi_gpu}; Using Device(s): {device_ids}; Max Workers: {max_workers}; "
+                    f"Batch Size: {engine.batch_size}; Device Workers: {engine.device_workers}"
                 )
+                for t in infer_tasks:
+                    t.update({"description": task.description, "save_label": False, "result_write_to_file": False})
+                engine.run(infer_tasks, callback=lambda idx, res: on_result(infer_tasks[idx], res))
+            elif len(infer_tasks) > 1 and (max_workers == 0 or max_workers > 1):
+                logger.info(f"MultiGpu: {multi_gpu}; Using Device(s): {device_ids}; Max Workers: {max_workers}")
+                with ThreadPoolExecutor(max_workers if max_workers else None, "WSI Infer") as executor:
+                    futures = {
+                        executor.submit(contextvars.copy_context().run, self._run_infer_wsi_task, t): t
+                        for t in infer_tasks
+                    }
+                    for future in as_completed(futures):
+                        on_result(futures[future], future.result())
+            else:
+                for t in infer_tasks:
+                    on_result(t, self._run_infer_wsi_task(t, multi_thread=False))
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+        finally:
+            if job_id:
+                self._wsi_jobs.pop(job_id, None)
 
         latency_total = time.time() - start
         logger.debug(f"WSI Infer Time Taken: {latency_total:.4f}")
 
-        bbox = request.get("location", [0, 0])
-        bbox.extend(request.get("size", [0, 0]))
-        res_json["name"] = f"MONAILabel Annotations - {model} for {bbox}"
-        res_json["description"] = task.description
-        res_json["model"] = request.get("model")
-        res_json["location"] = request.get("location")
-        res_json["size"] = request.get("size")
-
         res_json["latencies"] = {
             "total": round(latency_total, 2),
             "tsum": round(sum(a["latencies"]["total"] for a in res_json["annotations"]) / max(1, max_workers), 2),
             "pre": round(sum(a["latencies"]["pre"] for a in res_json["annotations"]) / max(1, max_workers), 2),
             "post": round(sum(a["latencies"]["post"] for a in res_json["annotations"]) / max(1, max_workers), 2),
-            "infer": round(sum(a["latencies"]["infer"] for a in res_json["annotations"]) / max(1, max_workers), 2),
+            "infer": round(sum(a["latencies"]["infer"] for a in res_json["annotations"]) / infer_workers, 2),
+        }
+        if engine:
+            res_json["latencies"]["batches"] = engine.stats()
+
+        res_json["latencies"]["wsi"] = {
+            "open": round(wsi_stats["open_time"], 4),
+            "read": round(wsi_stats["read_time"] / max(1, max_workers), 4),
+            "opens": wsi_stats["opens"],
+            "reads": wsi_stats["reads"],
+            "hits": wsi_stats["hits"],
         }
 
-        res_file = None
-        output = request.get("output", "dsa")
-        logger.debug(f"+++ WSI Inference Output Type: {output}")
+        if merger:
+            merged, res_json["merge"] = merger.merge()
+            if writer:
+                writer.add(merged, tile=False)
+            else:
+                res_json["annotations"].append(merged)
 
-        loglevel = request.get("logging", "INFO").upper()
-        if output == "asap":
-            logger.info("+++ Generating ASAP XML Annotation")
-            res_file, total_annotations = create_asap_annotations_xml(res_json, loglevel)
-        elif output == "dsa":
-            logger.info("+++ Generating DSA JSON Annotation")
-            res_file, total_annotations = create_dsa_annotations_json(res_json, loglevel)
+        res_file = None
+        if writer:
+            logger.info(f"+++ Finished {output} Annotation")
+            res_file, total_annotations = writer.close(res_json["latencies"])
         else:
             logger.info("+++ Return Default JSON Annotation")
             total_annotations = -1
@@ -736,6 +911,28 @@ class MONAILabelApp:
             )
         return {"file": res_file, "params": res_json}
 
+    def infer_wsi_status(self, job_id, partial=False) -> Optional[Dict[str, Any]]:
+        """
+        Progress of a running WSI inference request (submitted with ``job_id``)
+
+        :param job_id: job id provided in the request
+        :param partial: include ``file`` with a snapshot of annotations (of finished tiles) written so far
+        :return: tiles finished, total tiles and number of annotations (if written by annotation writer, i.e. output
+            is not json); None if the job is not running
+        """
+        job = self._wsi_jobs.get(job_id)
+        if job is None:
+            return None
+
+        writer: Optional[AnnotationWriter] = job["writer"]
+        if writer is None:
+            return {"tiles": job["tiles"], "total": job["total"]}
+
+        status = writer.status()
+        if partial:
+            status["file"] = writer.snapshot()
+        return status
+
     def _run_infer_wsi_task(self, task, multi_thread=True):
         req = copy.deepcopy(task)
         req["result_write_to_file"] = False
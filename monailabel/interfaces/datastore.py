@@ -10,8 +10,9 @@
 # limitations under the License.
 
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class DefaultLabelTag(str, Enum):
@@ -235,6 +236,39 @@ class Datastore(metaclass=ABCMeta):
         """
         pass
 
+    def get_label_staging_path(self) -> Optional[str]:
+        """
+        Return a directory (on the same file system as labels) to write new label files into before calling
+        :meth:`save_label`; such files are moved (atomic rename) instead of being copied into the datastore.
+
+        :return: staging directory or None if not supported by the datastore
+        """
+        return None
+
+    @contextmanager
+    def deferred_updates(self):
+        """
+        Defer persisting datastore metadata (e.g. while saving many labels) until the block exits or
+        :meth:`commit_updates` is called; only updates made within the calling context are deferred
+        """
+        yield self
+
+    def commit_updates(self) -> None:
+        """
+        Persist the metadata updates deferred so far (see :meth:`deferred_updates`)
+        """
+        pass
+
+    def changes(self, since: Optional[int] = None) -> Tuple[int, Optional[List[str]]]:
+        """
+        Get the images (image info or labels) modified since the given revision; used to maintain in-memory
+        indexes incrementally
+
+        :param since: revision returned by the previous call (None for the first call)
+        :return: current revision and list of modified image ids; None if unknown (everything might have changed)
+        """
+        return 0, None
+
     @abstractmethod
     def remove_label(self, label_id: str, label_tag: str) -> None:
         """
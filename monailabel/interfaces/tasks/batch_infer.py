@@ -9,6 +9,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextvars
 import copy
 import logging
 import multiprocessing
@@ -93,33 +94,42 @@ class BatchInferTask:
         max_workers = max_workers if max_workers else max(1, multiprocessing.cpu_count() // 4)
         max_workers = min(max_workers, multiprocessing.cpu_count())
 
-        if len(infer_tasks) > 1 and (max_workers == 0 or max_workers > 1):
-            logger.info(f"MultiGpu: {multi_gpu}; Using Device(s): {device_ids}; Max Workers: {max_workers}")
-            futures = {}
-            with ThreadPoolExecutor(max_workers if max_workers else None, "WSI Infer") as executor:
+        # label metadata is committed in groups instead of one datastore update per image
+        commit_size = request.get("commit_size", 32)
+        with datastore.deferred_updates():
+            if len(infer_tasks) > 1 and (max_workers == 0 or max_workers > 1):
+                logger.info(f"MultiGpu: {multi_gpu}; Using Device(s): {device_ids}; Max Workers: {max_workers}")
+                futures = {}
+                with ThreadPoolExecutor(max_workers if max_workers else None, "WSI Infer") as executor:
+                    for t in infer_tasks:
+                        # deferred datastore updates apply to the workers (context of this batch) only
+                        ctx = contextvars.copy_context()
+                        futures[t["_id"]] = t, executor.submit(ctx.run, run_infer_task, t, datastore, infer)
+
+                    for tid, (t, future) in futures.items():
+                        image_id = t["_image_id"]
+                        try:
+                            res = future.result()
+                            result[image_id] = res
+                        except Exception:
+                            logger.warning(f"Failed to finish Infer Task: {tid} => {image_id}", exc_info=True)
+                            result[image_id] = {}
+
+                        finished = len([a for a in result.values() if a is not None])
+                        logger.info(f"{tid} => {image_id} => {t['device']} => {finished} / {total}")
+                        if commit_size > 0 and finished % commit_size == 0:
+                            datastore.commit_updates()
+            else:
                 for t in infer_tasks:
-                    futures[t["_id"]] = t, executor.submit(run_infer_task, t, datastore, infer)
+                    tid = t["_id"]
+                    res = run_infer_task(t, datastore, infer)
 
-                for tid, (t, future) in futures.items():
                     image_id = t["_image_id"]
-                    try:
-                        res = future.result()
-                        result[image_id] = res
-                    except Exception:
-                        logger.warning(f"Failed to finish Infer Task: {tid} => {image_id}", exc_info=True)
-                        result[image_id] = {}
-
-                    finished = len([a for a in result.values() if a is not None])
+                    result[image_id] = res
+                    finished = tid + 1
                     logger.info(f"{tid} => {image_id} => {t['device']} => {finished} / {total}")
-        else:
-            for t in infer_tasks:
-                tid = t["_id"]
-                res = run_infer_task(t, datastore, infer)
-
-                image_id = t["_image_id"]
-                result[image_id] = res
-                finished = tid + 1
-                logger.info(f"{tid} => {image_id} => {t['device']} => {finished} / {total}")
+                    if commit_size > 0 and finished % commit_size == 0:
+                        datastore.commit_updates()
 
         latency_total = time.time() - start
         logger.info(f"Batch Infer Time Taken: {latency_total:.4f}")
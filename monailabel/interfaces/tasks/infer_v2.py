@@ -87,6 +87,14 @@ class InferTask(metaclass=ABCMeta):
     def get_path(self, validate=True):
         return None
 
+    def warmup(self, device=None, forward=True) -> Dict[str, Any]:
+        """
+        Load model ahead of the first request (optionally running a synthetic forward pass)
+
+        :return: warm-up latencies
+        """
+        return {}
+
     @abstractmethod
     def is_valid(self) -> bool:
         pass
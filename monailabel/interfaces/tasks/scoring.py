@@ -9,9 +9,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
 
 from monailabel.interfaces.datastore import Datastore
+from monailabel.utils.async_tasks.utils import TaskProgress
+
+logger = logging.getLogger(__name__)
 
 
 class ScoringMethod(metaclass=ABCMeta):
@@ -30,3 +42,148 @@ class ScoringMethod(metaclass=ABCMeta):
     @abstractmethod
     def __call__(self, request, datastore: Datastore):
         pass
+
+
+class IncrementalScoringMethod(ScoringMethod):
+    """
+    Scoring Method which only (re)computes the score of images whose inputs have changed since the last run.
+
+    For every image, :meth:`fingerprint` describes the inputs the score depends on (label file mtime/size, model
+    checksum, params etc.).  Digest of the fingerprint is saved in image info along with the score; images with the
+    same digest are skipped.  Remaining ones are scored (optionally in parallel) and datastore updates are committed
+    in batches of ``commit_size``.  Progress (and ETA) is reported to the scoring task status.
+    """
+
+    def __init__(self, description, max_workers=1, commit_size=64):
+        super().__init__(description)
+        self.max_workers = max_workers
+        self.commit_size = commit_size
+
+    def fingerprint_key(self, request) -> str:
+        return f"{request.get('method', self.__class__.__name__.lower())}_fingerprint"
+
+    def prepare(self, request, datastore: Datastore) -> Dict[str, Any]:
+        """
+        Prepare context shared by all the images for the current run (loaders, model checksum etc.)
+        """
+        return {"request": request, "datastore": datastore}
+
+    def images(self, ctx: Dict[str, Any]) -> List[str]:
+        return ctx["datastore"].list_images()
+
+    @abstractmethod
+    def fingerprint(self, ctx: Dict[str, Any], image_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return json serializable description of the inputs used to score the image; None if nothing to score
+        """
+        pass
+
+    @abstractmethod
+    def score(self, ctx: Dict[str, Any], image_id: str) -> Any:
+        """
+        Compute score for the image; result is passed to :meth:`save`
+        """
+        pass
+
+    def save(self, ctx: Dict[str, Any], image_id: str, result: Any, info: Dict[str, Any]) -> None:
+        """
+        Save the score along with ``info`` (fingerprint of the inputs) into image info in one update
+        """
+        ctx["datastore"].update_image_info(image_id, {**result, **info} if result else info)
+
+    def finalize(self, ctx: Dict[str, Any], summary: Dict[str, Any]) -> None:
+        pass
+
+    @staticmethod
+    def digest(fingerprint: Dict[str, Any]) -> str:
+        return hashlib.md5(json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def file_fingerprint(path: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not path or not isinstance(path, str) or not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        return {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+
+    @staticmethod
+    def label_fingerprint(datastore: Datastore, label_id: str, tag: str) -> Dict[str, Any]:
+        info = datastore.get_label_info(label_id, tag)
+        return {
+            "id": label_id,
+            "ts": info.get("ts"),
+            "checksum": info.get("checksum"),
+            "file": IncrementalScoringMethod.file_fingerprint(datastore.get_label_uri(label_id, tag)),
+        }
+
+    def __call__(self, request, datastore: Datastore):
+        start = time.time()
+        ctx = self.prepare(request, datastore)
+        key = self.fingerprint_key(request)
+        force = request.get("force", False)
+        name = request.get("method", self.__class__.__name__)
+
+        image_ids = self.images(ctx)
+        pending = []
+        skipped = 0
+        for image_id in image_ids:
+            fingerprint = self.fingerprint(ctx, image_id)
+            if fingerprint is None:
+                skipped += 1
+                continue
+            digest = self.digest(fingerprint)
+            if not force and datastore.get_image_info(image_id).get(key) == digest:
+                skipped += 1
+                continue
+            pending.append((image_id, digest))
+
+        max_samples = ctx.get("max_samples", request.get("max_samples", 0))
+        pending = pending[:max_samples] if max_samples else pending
+
+        max_workers = request.get("max_workers", self.max_workers)
+        max_workers = max_workers if max_workers else max(1, multiprocessing.cpu_count() // 2)
+        max_workers = min(max_workers, multiprocessing.cpu_count())
+        commit_size = max(1, request.get("commit_size", self.commit_size))
+        logger.info(
+            f"{name}:: Total: {len(image_ids)}; Unchanged/Skipped: {skipped}; To Score: {len(pending)}; "
+            f"Max Workers: {max_workers}"
+        )
+
+        # bounded number of images in flight (being loaded/scored or waiting to be saved)
+        prefetch = max(max_workers, request.get("prefetch", 2 * max_workers))
+        queue = iter(pending)
+        futures: Dict[Future, Tuple[str, str]] = {}
+
+        def submit(n):
+            for image_id, digest in itertools.islice(queue, n):
+                futures[executor.submit(self.score, ctx, image_id)] = (image_id, digest)
+
+        progress = TaskProgress(name, len(pending))
+        failed = 0
+        with datastore.deferred_updates():
+            with ThreadPoolExecutor(max_workers, f"Score{name}") as executor:
+                submit(prefetch)
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        image_id, digest = futures.pop(future)
+                        try:
+                            self.save(ctx, image_id, future.result(), {key: digest})
+                        except Exception as e:
+                            failed += 1
+                            logger.exception(f"{name}:: Failed to score {image_id}: {e}")
+
+                        progress.update(failed=failed)
+                        if progress.done % commit_size == 0:
+                            datastore.commit_updates()
+                    submit(len(done))
+
+        summary = {
+            "total": len(image_ids),
+            "skipped": skipped,
+            "executed": len(pending) - failed,
+            "failed": failed,
+            "latency": round(time.time() - start, 3),
+        }
+        logger.info(f"{name}:: {summary}")
+        self.finalize(ctx, summary)
+        return summary
@@ -10,14 +10,14 @@
 # limitations under the License.
 
 import copy
-import ctypes.util
 import logging
-import platform
-from ctypes import cdll
-from math import ceil
+import time
+from math import ceil, floor
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
-from monai.utils import optional_import
+
+from monailabel.utils.others.slide_cache import slide_pool
 
 logger = logging.getLogger(__name__)
 
@@ -29,20 +29,16 @@ def create_infer_wsi_tasks(request, image):
     tile_size = request.get("tile_size", (2048, 2048))
     tile_size = [int(p) for p in tile_size]
 
+    # overlap between neighbouring tiles (see merge_polygons of infer_wsi to stitch objects across tile seams)
+    overlap = max(0, min(int(request.get("tile_overlap", 0)), min(tile_size) // 2))
+    stride = [tile_size[0] - overlap, tile_size[1] - overlap]
+
     location = request.get("location", [0, 0])
     size = request.get("size", [0, 0])
     bbox = [[location[0], location[1]], [location[0] + size[0], location[1] + size[1]]]
     bbox = bbox if bbox and sum(bbox[0]) + sum(bbox[1]) > 0 else None
 
-    if platform.system() == "Windows":
-        cdll.LoadLibrary(str(ctypes.util.find_library("libopenslide-0.dll")))
-
-    openslide, has_openslide = optional_import("openslide")
-    if not has_openslide:
-        raise ImportError("Unable to find openslide, please ensure openslide library packages are correctly installed")
-
-    with openslide.OpenSlide(image) as slide:
-        w, h = slide.dimensions
+    w, h = slide_pool().dimensions(image)
     logger.debug(f"Input WSI Image Dimensions: ({w} x {h}); Tile Size: {tile_size}")
 
     x, y = 0, 0
@@ -51,11 +47,11 @@ def create_infer_wsi_tasks(request, image):
         w, h = int(bbox[1][0] - x), int(bbox[1][1] - y)
         logger.debug(f"WSI Region => Location: ({x}, {y}); Dimensions: ({w} x {h})")
 
-    cols = ceil(w / tile_size[0])  # COL
-    rows = ceil(h / tile_size[1])  # ROW
+    cols = ceil(w / tile_size[0]) if w <= tile_size[0] else ceil((w - overlap) / stride[0])  # COL
+    rows = ceil(h / tile_size[1]) if h <= tile_size[1] else ceil((h - overlap) / stride[1])  # ROW
 
     if rows * cols > 1:
-        logger.info(f"Total Tiles to infer {rows} x {cols}: {rows * cols}; Dimensions: {w} x {h}")
+        logger.info(f"Total Tiles to infer {rows} x {cols}: {rows * cols}; Dimensions: {w} x {h}; Overlap: {overlap}")
 
     infer_tasks = []
     count = 0
@@ -66,8 +62,8 @@ def create_infer_wsi_tasks(request, image):
 
     for row in range(rows):
         for col in range(cols):
-            tx = col * pw + x
-            ty = row * ph + y
+            tx = col * stride[0] + x
+            ty = row * stride[1] + y
 
             tw = min(pw, x + w - tx)
             th = min(ph, y + h - ty)
@@ -123,3 +119,102 @@ def create_infer_wsi_tasks_from_tiles(request, image):
         )
         infer_tasks.append(task)
     return infer_tasks
+
+
+def otsu_threshold(values: np.ndarray) -> float:
+    """
+    Otsu threshold of uint8 values (e.g. saturation); maximizes between-class variance of the histogram
+    """
+    hist = np.bincount(values.ravel(), minlength=256).astype(np.float64)
+    bins = np.arange(256, dtype=np.float64)
+
+    w0 = np.cumsum(hist)
+    w1 = w0[-1] - w0
+    m0 = np.cumsum(hist * bins)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu0 = m0 / w0
+        mu1 = (m0[-1] - m0) / w1
+        between = w0 * w1 * (mu0 - mu1) ** 2
+    between[~np.isfinite(between)] = -1
+    return float(np.argmax(between))
+
+
+def tissue_mask(
+    image: str, level: Optional[int] = None, threshold: Optional[float] = None, max_size: int = 2048
+) -> Tuple[np.ndarray, float, float, float]:
+    """
+    Low resolution tissue mask of the slide based on saturation (glass/background is close to gray or white).
+
+    :param image: path of the slide
+    :param level: pyramid level to read (-1 for lowest resolution); thumbnail of ``max_size`` if None
+    :param threshold: saturation (0-255) threshold; Otsu threshold if None
+    :param max_size: max dimension of the thumbnail
+    :return: (mask, scale x, scale y, threshold) where scale maps level 0 coordinates to mask coordinates
+    """
+    pool = slide_pool()
+    with pool.slide(image) as slide:
+        w, h = slide.dimensions
+        if level is None:
+            thumbnail = slide.get_thumbnail((max_size, max_size))
+        else:
+            level = level if 0 <= level < slide.level_count else slide.level_count - 1
+            thumbnail = slide.read_region((0, 0), level, slide.level_dimensions[level])
+
+    # transparent (out of bounds) regions are black; i.e. zero saturation
+    saturation = np.asarray(thumbnail.convert("RGB").convert("HSV"))[..., 1]
+    threshold = otsu_threshold(saturation) if threshold is None else threshold
+    mask = saturation > threshold
+    return mask, mask.shape[1] / w, mask.shape[0] / h, threshold
+
+
+def filter_infer_wsi_tasks(request, image, infer_tasks: List[Dict[str, Any]]):
+    """
+    Drop (``tissue_action=skip``) or move to the end (``tissue_action=last``) the tiles which have less than
+    ``tissue_min_fraction`` of tissue as per :func:`tissue_mask`.  Enabled by ``tissue_filter`` in the request;
+    ``tissue_level`` and ``tissue_threshold`` are passed to :func:`tissue_mask`.
+
+    :return: (tasks with updated ids, stats)
+    """
+    if not request.get("tissue_filter", False) or not infer_tasks:
+        return infer_tasks, {}
+
+    start = time.time()
+    min_fraction = float(request.get("tissue_min_fraction", 0.05))
+    action = request.get("tissue_action", "skip")
+    level = request.get("tissue_level")
+    threshold = request.get("tissue_threshold")
+    mask, sx, sy, threshold = tissue_mask(
+        image,
+        level=int(level) if level is not None else None,
+        threshold=float(threshold) if threshold is not None else None,
+    )
+
+    # summed area table; so tissue fraction of any tile is O(1)
+    sat = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+    sat[1:, 1:] = np.cumsum(np.cumsum(mask, axis=0), axis=1)
+
+    tissue, empty = [], []
+    for task in infer_tasks:
+        (tx, ty), (tw, th) = task["location"], task["size"]
+        x0 = min(int(floor(tx * sx)), mask.shape[1] - 1)
+        y0 = min(int(floor(ty * sy)), mask.shape[0] - 1)
+        x1 = min(max(x0 + 1, int(ceil((tx + tw) * sx))), mask.shape[1])
+        y1 = min(max(y0 + 1, int(ceil((ty + th) * sy))), mask.shape[0])
+
+        count = sat[y1, x1] - sat[y0, x1] - sat[y1, x0] + sat[y0, x0]
+        task["tissue"] = round(float(count) / ((x1 - x0) * (y1 - y0)), 4)
+        (tissue if task["tissue"] >= min_fraction else empty).append(task)
+
+    result = tissue + empty if action == "last" else tissue
+    for i, task in enumerate(result):
+        task["id"] = i
+
+    stats = {
+        "tiles": len(infer_tasks),
+        "empty": len(empty),
+        "skipped": len(infer_tasks) - len(result),
+        "threshold": threshold,
+        "latency": round(time.time() - start, 4),
+    }
+    logger.info(f"Tissue Filter ({action}; min fraction: {min_fraction}): {stats}")
+    return result, stats
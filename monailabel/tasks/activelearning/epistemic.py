@@ -10,11 +10,12 @@
 # limitations under the License.
 
 import logging
-import time
-from typing import Any, Dict
+import threading
+from typing import Dict
 
 from monailabel.interfaces.datastore import Datastore
 from monailabel.interfaces.tasks.strategy import Strategy
+from monailabel.tasks.activelearning.index import SampleIndex
 
 logger = logging.getLogger(__name__)
 
@@ -29,49 +30,30 @@ class Epistemic(Strategy):
     def __init__(
         self, k=0, reset=SECS_IN_DAY, key="epistemic_entropy", desc="Get First Sample Based on Epistemic score"
     ):
-        self.k = k
+        self.k = k  # Pick the least recently served among Top-K scores (0 => all)
         self.reset = reset  # Reset previously served samples after N seconds (ex: every day)
         self.key = key
+        self._indexes: Dict[str, SampleIndex] = {}
+        self._lock = threading.Lock()
         super().__init__(desc)
 
     def __call__(self, request, datastore: Datastore):
         label_tag = request.get("label_tag")
         labels = request.get("labels")
-        images = datastore.get_unlabeled_images(label_tag, labels)
-
-        if not len(images):
-            return None
-
-        scores: Dict[str, Any] = {}
-        current_ts = int(time.time())
         strategy = request["strategy"]
 
-        for image in images:
-            info = datastore.get_image_info(image)
-            score = info.get(self.key, 0)
-            ts = min(current_ts - info.get("strategy", {}).get(strategy, {}).get("ts", 0), self.reset)
-            scores[image] = {"score": score, "ts": ts}
+        # Highest score among the images not served recently (within reset); otherwise the least recently served
+        # With k, the least recently served among Top-K scores
+        with self._lock:
+            index = self._indexes.get(strategy)
+            if index is None:
+                index = SampleIndex(strategy, self.key, self.reset, self.k)
+                self._indexes[strategy] = index
 
-        scores = {k: v for k, v in sorted(scores.items(), key=lambda item: item[1]["score"], reverse=True)}  # type: ignore
-        logger.info(f"{strategy}: Top-N: {scores}")
-
-        # Pick Top-N based on epistemic scores
-        top_k: Dict[str, Any] = {}
-        max_len = self.k if 0 < self.k < len(scores) else len(scores)
-        for k, v in scores.items():
-            if len(top_k) == max_len:
-                break
-            # Handle similar timestamps
-            top_k[k] = {
-                "score": v["score"],
-                "ts": v["ts"] - (pow(10, len(top_k)) if v["ts"] == self.reset else len(top_k)) * 10,
-            }
-        logger.info(f"{strategy}: Top-K: {top_k}")
-
-        # Pick the one which is least served recently among Top-N
-        top_k = {k: v for k, v in sorted(scores.items(), key=lambda item: item[1]["ts"], reverse=True)}  # type: ignore
-        logger.info(f"{strategy}: Top-K (ts): {top_k};")
+        sample = index.next(datastore, label_tag, labels)
+        if not sample:
+            return None
 
-        image = next(iter(top_k))
-        logger.info(f"{strategy}: Selected Image: {image}; epistemic_entropy: {top_k[image]}")
-        return {"id": image, "epistemic_entropy": top_k[image]}
+        image = sample.pop("id")
+        logger.info(f"{strategy}: Selected Image: {image}; {self.key}: {sample}; Unlabeled: {len(index)}")
+        return {"id": image, "epistemic_entropy": sample}
@@ -0,0 +1,165 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from monailabel.interfaces.datastore import Datastore, DefaultLabelTag
+
+logger = logging.getLogger(__name__)
+
+
+class SampleIndex:
+    """
+    In-memory priority index over unlabeled images of a strategy.
+
+    Images which are not served within last ``reset`` seconds are kept in a heap ordered by score (highest first);
+    recently served ones in another heap ordered by served timestamp (least recently served first).  Index is
+    synced incrementally using :meth:`Datastore.changes` and :meth:`next` pops (and marks as served) the best image
+    under a lock; so concurrent users are handed out distinct images in O(log N).
+
+    With ``k > 0``, the least recently served image among the top ``k`` scores is served instead (O(N log k)).
+    """
+
+    def __init__(self, strategy: str, key: str, reset: int, k: int = 0):
+        self.strategy = strategy
+        self.key = key
+        self.reset = reset
+        self.k = k
+
+        self._lock = threading.Lock()
+        self._datastore: Optional[Datastore] = None
+        self._label_tag: Optional[str] = None
+        self._labels: Optional[List[str]] = None
+        self._revision: Optional[int] = None
+
+        self._entries: Dict[str, Tuple[float, int, int]] = {}  # id => (score, served ts, version)
+        self._fresh: List[Tuple[float, str, int]] = []  # (-score, id, version)
+        self._served: List[Tuple[int, float, str, int]] = []  # (served ts, -score, id, version)
+        self._version = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _image(self, datastore: Datastore, image_id: str) -> Optional[Tuple[float, int]]:
+        info = datastore.get_image_info(image_id)
+        if not info:
+            return None
+        score = info.get(self.key, 0)
+        ts = info.get("strategy", {}).get(self.strategy, {}).get("ts", 0)
+        return float(score) if score is not None else 0.0, int(ts)
+
+    def _labeled(self, datastore: Datastore, image_id: str) -> bool:
+        # same as Datastore.get_unlabeled_images(); image is labeled once it has a final label
+        return DefaultLabelTag.FINAL in datastore.get_labels_by_image_id(image_id)
+
+    def _push(self, image_id: str, score: float, ts: int, now: int) -> None:
+        self._version += 1
+        self._entries[image_id] = (score, ts, self._version)
+        if ts + self.reset <= now:
+            heapq.heappush(self._fresh, (-score, image_id, self._version))
+        else:
+            heapq.heappush(self._served, (ts, -score, image_id, self._version))
+
+    def _valid(self, image_id: str, version: int) -> bool:
+        entry = self._entries.get(image_id)
+        return entry is not None and entry[2] == version
+
+    def _rebuild(self, datastore: Datastore, now: int) -> None:
+        images = datastore.get_unlabeled_images(self._label_tag, self._labels)
+        served = {k: v[1] for k, v in self._entries.items()}
+
+        self._entries.clear()
+        self._fresh.clear()
+        self._served.clear()
+        for image_id in images:
+            r = self._image(datastore, image_id)
+            if r:
+                self._push(image_id, r[0], max(r[1], served.get(image_id, 0)), now)
+        logger.info(f"{self.strategy}: Index rebuilt; total: {len(self._entries)}")
+
+    def _update(self, datastore: Datastore, image_ids: List[str], now: int) -> None:
+        for image_id in image_ids:
+            r = self._image(datastore, image_id)
+            prev = self._entries.pop(image_id, None)
+            if r is None or self._labeled(datastore, image_id):
+                continue
+
+            # serve ts (in-memory) might not be persisted yet
+            score, ts = r
+            ts = max(ts, prev[1]) if prev else ts
+            self._push(image_id, score, ts, now)
+
+        # drop stale heap entries if they dominate
+        if len(self._fresh) + len(self._served) > 2 * len(self._entries) + 1024:
+            self._fresh = [e for e in self._fresh if self._valid(e[1], e[2])]
+            self._served = [e for e in self._served if self._valid(e[2], e[3])]
+            heapq.heapify(self._fresh)
+            heapq.heapify(self._served)
+
+    def sync(
+        self,
+        datastore: Datastore,
+        label_tag: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        now: Optional[int] = None,
+    ) -> None:
+        now = now if now is not None else int(time.time())
+        revision, changed = datastore.changes(self._revision)
+        if changed is None or (datastore, label_tag, labels) != (self._datastore, self._label_tag, self._labels):
+            self._datastore, self._label_tag, self._labels = datastore, label_tag, labels
+            self._rebuild(datastore, now)
+        elif changed:
+            self._update(datastore, changed, now)
+        self._revision = revision
+
+    def next(
+        self,
+        datastore: Datastore,
+        label_tag: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        now: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get next image to be served and mark it as served (now)
+
+        :return: dict with id, score and ts (secs since last served; capped at reset) of the image; None if empty
+        """
+        now = now if now is not None else int(time.time())
+        with self._lock:
+            self.sync(datastore, label_tag, labels, now)
+
+            # images which are not served recently are available again (based on their score)
+            while self._served and self._served[0][0] + self.reset <= now:
+                _, _, image_id, version = heapq.heappop(self._served)
+                if self._valid(image_id, version):
+                    score = self._entries[image_id][0]
+                    heapq.heappush(self._fresh, (-score, image_id, version))
+
+            image_id = None
+            if 0 < self.k < len(self._entries):
+                top_k = heapq.nlargest(self.k, self._entries.items(), key=lambda e: e[1][0])
+                image_id = min(top_k, key=lambda e: (e[1][1], -e[1][0]))[0]
+            while self._fresh and image_id is None:
+                _, i, version = heapq.heappop(self._fresh)
+                image_id = i if self._valid(i, version) else None
+            while self._served and image_id is None:
+                _, _, i, version = heapq.heappop(self._served)
+                image_id = i if self._valid(i, version) else None
+            if image_id is None:
+                return None
+
+            score, ts, _ = self._entries[image_id]
+            self._push(image_id, score, now, now)
+            return {"id": image_id, "score": score, "ts": min(now - ts, self.reset)}
@@ -13,18 +13,23 @@ import copy
 import logging
 import os
 import time
+import weakref
 from abc import abstractmethod
+from contextlib import contextmanager
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import torch
-from monai.data import decollate_batch
+from monai.data import MetaTensor, decollate_batch
 from monai.inferers import Inferer, SimpleInferer, SlidingWindowInferer
 from monai.utils import deprecated
 
+from monailabel.config import settings
 from monailabel.interfaces.exception import MONAILabelError, MONAILabelException
 from monailabel.interfaces.tasks.infer_v2 import InferTask, InferType
 from monailabel.interfaces.utils.transform import dump_data, run_transforms
+from monailabel.tasks.infer.batcher import DynamicBatcher
+from monailabel.tasks.infer.registry import model_registry
 from monailabel.transform.cache import CacheTransformDatad
 from monailabel.transform.writer import ClassificationWriter, DetectionWriter, Writer
 from monailabel.utils.others.generic import device_list, device_map, name_to_device
@@ -63,6 +68,8 @@ class BasicInferTask(InferTask):
         preload=False,
         train_mode=False,
         skip_writer=False,
+        max_batch_size: Optional[int] = None,
+        max_batch_wait: Optional[float] = None,
     ):
         """
         :param path: Model File Path. Supports multiple paths to support versions (Last item will be picked as latest)
@@ -81,6 +88,9 @@ class BasicInferTask(InferTask):
         :param preload: Preload model/network on all available GPU devices
         :param train_mode: Run in Train mode instead of eval (when network has dropouts)
         :param skip_writer: Skip Writer and return data dictionary
+        :param max_batch_size: Batch concurrent requests of same input shape into one forward pass (<= 1 to disable);
+            requests only run concurrently when MONAI_LABEL_ENDPOINT_INFER_WORKERS > 1
+        :param max_batch_wait: Max time (in seconds) to wait for concurrent requests to form a batch
         """
 
         super().__init__(type, labels, dimension, description, config)
@@ -96,7 +106,12 @@ class BasicInferTask(InferTask):
         self.train_mode = train_mode
         self.skip_writer = skip_writer
 
-        self._networks: Dict = {}
+        # drop cached networks (process-wide model registry) once the task is gone
+        weakref.finalize(self, model_registry().remove, id(self))
+
+        max_batch_size = settings.MONAI_LABEL_INFER_BATCH_SIZE if max_batch_size is None else max_batch_size
+        max_batch_wait = settings.MONAI_LABEL_INFER_BATCH_WAIT if max_batch_wait is None else max_batch_wait
+        self._batcher = DynamicBatcher(max_batch_size, max_batch_wait) if max_batch_size > 1 else None
 
         self._config.update(
             {
@@ -267,6 +282,24 @@ class BasicInferTask(InferTask):
 
         Returns: Label (File Path) and Result Params (JSON)
         """
+        ctx = self.run_stage_pre(request, callbacks)
+        ctx = self.run_stage_infer(ctx)
+        ctx = self.run_stage_post(ctx)
+        return self.run_stage_write(ctx)
+
+    def run_stage_pre(
+        self,
+        request,
+        callbacks: Union[Dict[CallBackTypes, Any], None] = None,
+        pre_transforms: Optional[Sequence[Callable]] = None,
+    ) -> Dict[str, Any]:
+        """
+        First stage of :meth:`__call__`: prepare request and run pre-transforms.
+        Stages share a context dictionary which allows them to run on different workers (see PipelinedInferExecutor)
+
+        :param pre_transforms: pre-transforms shared by many requests (e.g. WSI tiles); created per request if None
+        :return: context to be passed on to :meth:`run_stage_infer`
+        """
         begin = time.time()
         req = copy.deepcopy(self._config)
         req.update(request)
@@ -287,73 +320,151 @@ class BasicInferTask(InferTask):
         # callbacks useful in case of pipeliens to consume intermediate output from each of the following stages
         # callback function should consume data and returns data (modified/updated)
         callbacks = callbacks if callbacks else {}
-        callback_run_pre_transforms = callbacks.get(CallBackTypes.PRE_TRANSFORMS)
-        callback_run_inferer = callbacks.get(CallBackTypes.INFERER)
-        callback_run_invert_transforms = callbacks.get(CallBackTypes.INVERT_TRANSFORMS)
-        callback_run_post_transforms = callbacks.get(CallBackTypes.POST_TRANSFORMS)
-        callback_writer = callbacks.get(CallBackTypes.WRITER)
 
         start = time.time()
-        pre_transforms = self.pre_transforms(data)
+        pre_transforms = self.pre_transforms(data) if pre_transforms is None else pre_transforms
         data = self.run_pre_transforms(data, pre_transforms)
-        if callback_run_pre_transforms:
-            data = callback_run_pre_transforms(data)
+        if callbacks.get(CallBackTypes.PRE_TRANSFORMS):
+            data = callbacks[CallBackTypes.PRE_TRANSFORMS](data)
         latency_pre = time.time() - start
 
+        return {
+            "begin": begin,
+            "device": device,
+            "data": data,
+            "callbacks": callbacks,
+            "pre_transforms": pre_transforms,
+            "latencies": {"pre": latency_pre},
+        }
+
+    def run_stage_infer(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Second stage of :meth:`__call__`: run inferer/detector over pre-processed data on the target device
+        """
+        data = ctx["data"]
+        device = ctx["device"]
+        callbacks = ctx["callbacks"]
+
         start = time.time()
         if self.type == InferType.DETECTION:
             data = self.run_detector(data, device=device)
         else:
             data = self.run_inferer(data, device=device)
 
-        if callback_run_inferer:
-            data = callback_run_inferer(data)
-        latency_inferer = time.time() - start
+        if callbacks.get(CallBackTypes.INFERER):
+            data = callbacks[CallBackTypes.INFERER](data)
+        ctx["latencies"]["infer"] = time.time() - start
+        ctx["data"] = data
+        return ctx
+
+    def run_stage_infer_batch(self, ctxs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Batched version of :meth:`run_stage_infer` for contexts of the same device and input shape (e.g. WSI tiles).
+        Inputs are stacked and run through a single forward pass; infer latency is shared among the contexts.
+        Falls back to :meth:`run_stage_infer` per context for detection, custom :meth:`run_inferer` or inferer
+        callbacks.
+        """
+        batched = (
+            len(ctxs) > 1
+            and self.type != InferType.DETECTION
+            and type(self).run_inferer is BasicInferTask.run_inferer
+            and not any(ctx["callbacks"].get(CallBackTypes.INFERER) for ctx in ctxs)
+        )
+        if not batched:
+            return [self.run_stage_infer(ctx) for ctx in ctxs]
 
         start = time.time()
-        data = self.run_invert_transforms(data, pre_transforms, self.inverse_transforms(data))
-        if callback_run_invert_transforms:
-            data = callback_run_invert_transforms(data)
-        latency_invert = time.time() - start
+        device = ctxs[0]["device"]
+        datas = [ctx["data"] for ctx in ctxs]
+        with self._network(device, datas[0]) as network:
+            if not network:
+                return [self.run_stage_infer(ctx) for ctx in ctxs]
+
+            inferer = self.inferer(datas[0])
+            inputs = [d[self.input_key] for d in datas]
+            inputs = [i if torch.is_tensor(i) else torch.from_numpy(i) for i in inputs]
+            x = torch.stack([i.as_tensor() if isinstance(i, MetaTensor) else i for i in inputs])
+            with torch.no_grad():
+                outputs = inferer(x.to(torch.device(device)), network)
+
+        outputs = decollate_batch(outputs) if isinstance(outputs, dict) else [outputs[i] for i in range(len(ctxs))]
+        latency = (time.time() - start) / len(ctxs)
+        for ctx, i, o in zip(ctxs, inputs, outputs):
+            ctx["data"][self.output_label_key] = self._with_meta(i, o)
+            ctx["latencies"]["infer"] = latency
+        return ctxs
+
+    def run_stage_post(
+        self, ctx: Dict[str, Any], post_transforms: Optional[Sequence[Callable]] = None
+    ) -> Dict[str, Any]:
+        """
+        Third stage of :meth:`__call__`: run invert transforms followed by post-transforms
+
+        :param post_transforms: post-transforms shared by many requests (e.g. WSI tiles); created per request if None
+        """
+        data = ctx["data"]
+        callbacks = ctx["callbacks"]
 
         start = time.time()
-        data = self.run_post_transforms(data, self.post_transforms(data))
-        if callback_run_post_transforms:
-            data = callback_run_post_transforms(data)
-        latency_post = time.time() - start
+        data = self.run_invert_transforms(data, ctx["pre_transforms"], self.inverse_transforms(data))
+        if callbacks.get(CallBackTypes.INVERT_TRANSFORMS):
+            data = callbacks[CallBackTypes.INVERT_TRANSFORMS](data)
+        ctx["latencies"]["invert"] = time.time() - start
 
+        start = time.time()
+        post_transforms = self.post_transforms(data) if post_transforms is None else post_transforms
+        data = self.run_post_transforms(data, post_transforms)
+        if callbacks.get(CallBackTypes.POST_TRANSFORMS):
+            data = callbacks[CallBackTypes.POST_TRANSFORMS](data)
+        ctx["latencies"]["post"] = time.time() - start
+        ctx["data"] = data
+        return ctx
+
+    def run_stage_write(self, ctx: Dict[str, Any]) -> Union[Dict, Tuple[str, Dict[str, Any]]]:
+        """
+        Last stage of :meth:`__call__`: run writer and build the final result json (including latencies)
+        """
+        data = ctx["data"]
+        callbacks = ctx["callbacks"]
         if self.skip_writer:
             return dict(data)
 
         start = time.time()
         result_file_name, result_json = self.writer(data)
-        if callback_writer:
-            data = callback_writer(data)
+        write_latencies = data.get("write_latencies")
+        instantiate_latencies = data.get("instantiate_latencies")
+        if callbacks.get(CallBackTypes.WRITER):
+            data = callbacks[CallBackTypes.WRITER](data)
         latency_write = time.time() - start
 
-        latency_total = time.time() - begin
+        latencies = ctx["latencies"]
+        latency_total = time.time() - ctx["begin"]
         logger.info(
             "++ Latencies => Total: {:.4f}; "
             "Pre: {:.4f}; Inferer: {:.4f}; Invert: {:.4f}; Post: {:.4f}; Write: {:.4f}".format(
                 latency_total,
-                latency_pre,
-                latency_inferer,
-                latency_invert,
-                latency_post,
+                latencies["pre"],
+                latencies["infer"],
+                latencies["invert"],
+                latencies["post"],
                 latency_write,
             )
         )
 
         result_json["label_names"] = self.labels
         result_json["latencies"] = {
-            "pre": round(latency_pre, 2),
-            "infer": round(latency_inferer, 2),
-            "invert": round(latency_invert, 2),
-            "post": round(latency_post, 2),
+            "pre": round(latencies["pre"], 2),
+            "infer": round(latencies["infer"], 2),
+            "invert": round(latencies["invert"], 2),
+            "post": round(latencies["post"], 2),
             "write": round(latency_write, 2),
             "total": round(latency_total, 2),
             "transform": data.get("latencies"),
         }
+        if write_latencies:
+            result_json["latencies"]["write_stages"] = {k: round(v, 4) for k, v in write_latencies.items()}
+        if instantiate_latencies:
+            result_json["latencies"]["instantiate"] = {k: round(v, 4) for k, v in instantiate_latencies.items()}
 
         # Add Centroids to the result json to consume in OHIF v3
         centroids = data.get("centroids", None)
@@ -385,6 +496,7 @@ class BasicInferTask(InferTask):
                 current.append(t)
 
         if cache_t is not None:
+            cache_t.set_transforms(pre_cache)
 
             class LoadFromCache:
                 def __call__(self, data):
@@ -425,9 +537,20 @@ class BasicInferTask(InferTask):
         return run_transforms(data, transforms, log_prefix="POST")
 
     def clear_cache(self):
-        self._networks.clear()
+        model_registry().remove(id(self))
 
-    def _get_network(self, device, data):
+    @contextmanager
+    def _network(self, device, data):
+        """
+        Network for the device; pinned in the model registry (not offloaded/evicted by other threads) while in use
+        """
+        network = self._get_network(device, data, pin=True)
+        try:
+            yield network
+        finally:
+            model_registry().release(network)
+
+    def _get_network(self, device, data, pin=False):
         path = self.get_path()
         logger.info(f"Infer model path: {path}")
 
@@ -450,16 +573,19 @@ class BasicInferTask(InferTask):
                 f"Model Path ({self.path}) does not exist/valid",
             )
 
-        cached = self._networks.get(device)
         statbuf = os.stat(path) if path else None
-        network = None
-        if cached:
-            if statbuf and statbuf.st_mtime == cached[1]:
-                network = cached[0]
-            elif statbuf:
-                logger.warning(f"Reload model from cache.  Prev ts: {cached[1]}; Current ts: {statbuf.st_mtime}")
+        mtime = statbuf.st_mtime if statbuf else 0
+
+        # tasks running the same model file (and mode) on the same device share the network
+        registry = model_registry()
+        if path:
+            key: Tuple = (path, device, type(self.network).__name__ if self.network else "jit", self.train_mode)
+        else:
+            key = (id(self), device)
+        network = registry.get(key, mtime, owner=id(self), pin=pin)
 
         if network is None:
+            start = time.time()
             if self.network:
                 network = copy.deepcopy(self.network)
                 network.to(torch.device(device))
@@ -485,10 +611,53 @@ class BasicInferTask(InferTask):
                 network.train()
             else:
                 network.eval()
-            self._networks[device] = (network, statbuf.st_mtime if statbuf else 0)
+
+            name = f"{self.__class__.__name__}({os.path.basename(path) if path else ''})"
+            registry.put(key, name, network, mtime, device, load_time=time.time() - start, owner=id(self), pin=pin)
 
         return network
 
+    def warmup(self, device=None, forward=True) -> Dict[str, Any]:
+        """
+        Load network on the given device and optionally run a synthetic forward pass (see :meth:`warmup_inputs`)
+        so that cuda/cudnn initialization and autotune costs are not paid by the first real request.
+
+        :param device: device to load the network
+        :param forward: run synthetic forward pass after loading the network
+        :return: warm-up latencies
+        """
+        device = name_to_device(device)
+
+        start = time.time()
+        with self._network(device, None) as network:
+            latencies = {"load": round(time.time() - start, 2)}
+
+            if forward and network is not None and self.type != InferType.DETECTION:
+                inputs = self.warmup_inputs(network, device)
+                if inputs is not None:
+                    start = time.time()
+                    with torch.no_grad():
+                        network(inputs)
+                    if device.startswith("cuda"):
+                        torch.cuda.synchronize(torch.device(device))
+                        torch.cuda.empty_cache()
+                    latencies["forward"] = round(time.time() - start, 2)
+        return latencies
+
+    def warmup_inputs(self, network, device) -> Optional[torch.Tensor]:
+        """
+        Provide synthetic input (batch of one) for warm-up.  By default, it uses roi_size as spatial shape and
+        input channels from the first conv layer of the network.  Return None to skip warm-up forward pass.
+        """
+        if not self.roi_size:
+            return None
+
+        roi_size = [int(r) for r in self.roi_size]
+        for p in network.parameters():
+            if p.ndim == len(roi_size) + 2:
+                return torch.rand(1, p.shape[1], *roi_size, device=torch.device(device))
+        return None
+
     def run_inferer(self, data: Dict[str, Any], convert_to_batch=True, device="cuda"):
         """
         Run Inferer over pre-processed Data.  Derive this logic to customize the normal behavior.
@@ -503,31 +672,78 @@ class BasicInferTask(InferTask):
         inferer = self.inferer(data)
         logger.info(f"Inferer:: {device} => {inferer.__class__.__name__} => {inferer.__dict__}")
 
-        network = self._get_network(device, data)
-        if network:
+        with self._network(device, data) as network:
+            if not network:
+                # consider them as callable transforms
+                return run_transforms(data, inferer, log_prefix="INF", log_name="Inferer")
+
             inputs = data[self.input_key]
             inputs = inputs if torch.is_tensor(inputs) else torch.from_numpy(inputs)
+
+            if self._batcher is not None and convert_to_batch and data.get("batching", True):
+                outputs = self._run_batched_inferer(inferer, network, inputs, device)
+                data[self.output_label_key] = outputs
+                return data
+
             inputs = inputs[None] if convert_to_batch else inputs
             inputs = inputs.to(torch.device(device))
 
             with torch.no_grad():
                 outputs = inferer(inputs, network)
 
+        if device.startswith("cuda"):
+            torch.cuda.empty_cache()
+
+        if convert_to_batch:
+            if isinstance(outputs, dict):
+                outputs_d = decollate_batch(outputs)
+                outputs = outputs_d[0]
+            else:
+                outputs = outputs[0]
+
+        data[self.output_label_key] = outputs
+        return data
+
+    def _run_batched_inferer(self, inferer, network, inputs, device):
+        """
+        Run inferer through the dynamic batcher so that concurrent requests (of same shape, device and inferer
+        config) share a single forward pass.  Output carries the meta information of its own input (same as the
+        result of running the inferer over a batch of one).
+        """
+
+        def forward(batched_inputs):
+            with torch.no_grad():
+                outputs = inferer(batched_inputs, network)
+
             if device.startswith("cuda"):
                 torch.cuda.empty_cache()
+            return outputs
+
+        inferer_config = {k: v for k, v in inferer.__dict__.items() if not torch.is_tensor(v)}
+        key = (
+            device,
+            id(network),
+            tuple(inputs.shape),
+            inputs.dtype,
+            inferer.__class__.__name__,
+            repr(sorted(inferer_config.items())),
+        )
 
-            if convert_to_batch:
-                if isinstance(outputs, dict):
-                    outputs_d = decollate_batch(outputs)
-                    outputs = outputs_d[0]
-                else:
-                    outputs = outputs[0]
+        x = inputs.as_tensor() if isinstance(inputs, MetaTensor) else inputs
+        outputs = self._batcher(key, x.to(torch.device(device)), forward)  # type: ignore
+        return self._with_meta(inputs, outputs)
 
-            data[self.output_label_key] = outputs
-        else:
-            # consider them as callable transforms
-            data = run_transforms(data, inferer, log_prefix="INF", log_name="Inferer")
-        return data
+    @staticmethod
+    def _with_meta(inputs, outputs):
+        """
+        Output (of a batched forward pass) carrying the meta information of its own input
+        """
+        if isinstance(inputs, MetaTensor) and torch.is_tensor(outputs):
+            outputs = outputs.as_tensor() if isinstance(outputs, MetaTensor) else outputs
+            outputs = MetaTensor(
+                outputs, meta=copy.deepcopy(inputs.meta), applied_operations=copy.deepcopy(inputs.applied_operations)
+            )
+        return outputs
 
     def run_detector(self, data: Dict[str, Any], convert_to_batch=True, device="cuda"):
         """
@@ -557,8 +773,10 @@ class BasicInferTask(InferTask):
                 f"Detector Inferer:: {device} => {detector.inferer.__class__.__name__} => {detector.inferer.__dict__}"  # type: ignore
             )
 
-        network = self._get_network(device, data)
-        if network:
+        with self._network(device, data) as network:
+            if not network:
+                return data
+
             inputs = data[self.input_key]
             inputs = inputs if torch.is_tensor(inputs) else torch.from_numpy(inputs)
             inputs = inputs[None] if convert_to_batch else inputs
@@ -575,26 +793,27 @@ class BasicInferTask(InferTask):
                 network.eval()
                 outputs = detector(inputs, use_inferer=True)
 
-            if device.startswith("cuda"):
-                torch.cuda.empty_cache()
-
-            if convert_to_batch:
-                if isinstance(outputs, dict):
-                    outputs_d = decollate_batch(outputs)
-                    outputs = outputs_d[0]
-                else:
-                    outputs = outputs[0]
+        if device.startswith("cuda"):
+            torch.cuda.empty_cache()
 
+        if convert_to_batch:
             if isinstance(outputs, dict):
-                data.update(outputs)
+                outputs_d = decollate_batch(outputs)
+                outputs = outputs_d[0]
             else:
-                data[self.output_label_key] = outputs
+                outputs = outputs[0]
+
+        if isinstance(outputs, dict):
+            data.update(outputs)
+        else:
+            data[self.output_label_key] = outputs
         return data
 
     def writer(self, data: Dict[str, Any], extension=None, dtype=None) -> Tuple[Any, Any]:
         """
         You can provide your own writer.  However, this writer saves the prediction/label mask to file
-        and fetches result json
+        and fetches result json.  Custom writers which do not use :class:`Writer` should handle ``result_sparse``
+        in data (output=sparse) themselves; otherwise the result json has no ``label_sparse``
 
         :param data: typically it is post processed data
         :param extension: output label extension
@@ -622,11 +841,18 @@ class BasicInferTask(InferTask):
             dw = DetectionWriter()
             return dw(data)
 
-        writer = Writer(label=self.output_label_key, json=self.output_json_key)
+        writer = Writer(
+            label=self.output_label_key,
+            json=self.output_json_key,
+            fast=settings.MONAI_LABEL_INFER_WRITER_FAST,
+            compress_level=settings.MONAI_LABEL_INFER_WRITER_COMPRESS_LEVEL,
+            threads=settings.MONAI_LABEL_INFER_WRITER_THREADS,
+            output_dir=settings.MONAI_LABEL_INFER_OUTPUT_DIR,
+        )
         return writer(data)
 
     def clear(self):
-        self._networks.clear()
+        model_registry().remove(id(self))
 
     def set_loglevel(self, level: str):
         logger.setLevel(level.upper())
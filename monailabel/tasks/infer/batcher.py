@@ -0,0 +1,112 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import torch
+from monai.data import decollate_batch
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[torch.Tensor] = []
+        self.results: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class DynamicBatcher:
+    """
+    Micro-batching of concurrent forward passes.
+
+    Inputs submitted with the same key within ``max_wait`` seconds (or until ``max_batch_size`` items are collected)
+    are stacked along a new batch dimension and run through a single forward call.  The first caller for a key
+    becomes the leader and runs the forward pass on behalf of everyone else; followers block until their slice
+    of the output is available.
+    """
+
+    def __init__(self, max_batch_size: int = 4, max_wait: float = 0.01):
+        """
+        :param max_batch_size: Max number of inputs to stack into one forward pass
+        :param max_wait: Max time (in seconds) the leader waits for more inputs to arrive
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait)
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, _Batch] = {}
+        self._stats = {"batches": 0, "items": 0}
+
+    def __call__(self, key: Hashable, inputs: torch.Tensor, forward: Callable[[torch.Tensor], Any]) -> Any:
+        """
+        :param key: Inputs are batched together only when their keys match (e.g. shape, device, network)
+        :param inputs: Single (un-batched) input tensor
+        :param forward: Callable to run over batched inputs; it should return a batched tensor or dictionary
+        :return: Output for the given input (without batch dimension)
+        """
+        with self._lock:
+            batch = self._pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._pending[key] = batch
+
+            idx = len(batch.items)
+            batch.items.append(inputs)
+            if len(batch.items) >= self.max_batch_size:
+                self._pending.pop(key, None)
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    self._pending.pop(key)
+            self._run(batch, forward)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[idx]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches = self._stats["batches"]
+            items = self._stats["items"]
+        return {"batches": batches, "items": items, "avg_batch_size": round(items / batches, 2) if batches else 0}
+
+    def _run(self, batch: _Batch, forward: Callable[[torch.Tensor], Any]):
+        try:
+            count = len(batch.items)
+            if count > 1:
+                logger.debug(f"Running Batched Forward:: {count} items; Shape: {tuple(batch.items[0].shape)}")
+
+            outputs = forward(torch.stack(batch.items))
+            if torch.is_tensor(outputs):
+                batch.results = [outputs[i] for i in range(count)]
+            elif isinstance(outputs, dict):
+                batch.results = decollate_batch(outputs)
+            else:
+                raise TypeError(f"Unsupported output type for batched forward: {type(outputs)}")
+
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["items"] += count
+        except BaseException as e:
+            batch.error = e
+        finally:
+            batch.done.set()
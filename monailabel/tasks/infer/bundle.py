@@ -14,9 +14,13 @@ import json
 import logging
 import os
 import sys
-from typing import Any, Callable, Dict, Optional, Sequence, Union
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
+from cachetools import LRUCache
 from monai.bundle import ConfigItem, ConfigParser
+from monai.bundle.reference_resolver import ReferenceResolver
 from monai.inferers import Inferer, SimpleInferer
 from monai.transforms import Compose, LoadImaged, SaveImaged
 
@@ -88,6 +92,8 @@ class BundleInferTask(BasicInferTask):
         add_post_restore: bool = True,
         dropout: float = 0.0,
         load_strict=False,
+        max_instances: int = 16,
+        reload_interval: float = 5.0,
         **kwargs,
     ):
         self.valid: bool = False
@@ -97,6 +103,15 @@ class BundleInferTask(BasicInferTask):
         self.post_filter = post_filter
         self.extend_load_image = extend_load_image
         self.dropout = dropout
+        self.displayable_configs: Dict[str, Any] = {}
+
+        # instantiated pre/inferer/detector/post keyed by (name, device, displayable configs they depend on)
+        self._instances: LRUCache = LRUCache(maxsize=max_instances)
+        self._instances_lock = threading.RLock()
+        self._config_deps: Dict[str, List[str]] = {}
+        self._bundle_ts = 0.0
+        self._bundle_checked = 0.0
+        self.reload_interval = reload_interval  # min seconds between checks for changed bundle configs/scripts
 
         config_paths = [c for c in self.const.configs() if os.path.exists(os.path.join(path, "configs", c))]
         if not config_paths:
@@ -174,6 +189,8 @@ class BundleInferTask(BasicInferTask):
 
         self.valid = True
         self.version = metadata.get("version")
+        self._bundle_ts = self._bundle_mtime()
+        self._bundle_checked = time.time()
         sys.path.remove(self.bundle_path)
 
     def is_valid(self) -> bool:
@@ -185,16 +202,9 @@ class BundleInferTask(BasicInferTask):
         return i
 
     def pre_transforms(self, data=None) -> Sequence[Callable]:
-        # Update bundle parameters based on user's option
-        for k in self.const.key_displayable_configs():
-            if self.bundle_config.get(k):
-                self.bundle_config[k].update({c: data[c] for c in self.displayable_configs.keys()})
-                self.bundle_config.parse()
-
-        sys.path.insert(0, self.bundle_path)
-        unload_module("scripts")
-        self._update_device(data)
+        return list(self._instantiate("pre_transforms", self.const.key_preprocessing(), data, self._pre_transforms))
 
+    def _pre_transforms(self):
         pre = []
         for k in self.const.key_preprocessing():
             if self.bundle_config.get(k):
@@ -215,29 +225,24 @@ class BundleInferTask(BasicInferTask):
                 else:
                     res.append(t)
             pre = res
-
-        sys.path.remove(self.bundle_path)
         return pre
 
     def inferer(self, data=None) -> Inferer:
-        sys.path.insert(0, self.bundle_path)
-        unload_module("scripts")
-        self._update_device(data)
+        return self._instantiate("inferer", self.const.key_inferer(), data, self._inferer)
 
+    def _inferer(self):
         i = None
         for k in self.const.key_inferer():
             if self.bundle_config.get(k):
                 i = self.bundle_config.get_parsed_content(k, instantiate=True)  # type: ignore
                 break
-
-        sys.path.remove(self.bundle_path)
         return i if i is not None else SimpleInferer()
 
     def detector(self, data=None) -> Optional[Callable]:
-        sys.path.insert(0, self.bundle_path)
-        unload_module("scripts")
-        self._update_device(data)
+        keys = [*self.const.key_detector(), *self.const.key_detector_ops()]
+        return self._instantiate("detector", keys, data, self._detector)
 
+    def _detector(self):
         d = None
         for k in self.const.key_detector():
             if self.bundle_config.get(k):
@@ -249,15 +254,12 @@ class BundleInferTask(BasicInferTask):
                     d = detector  # type: ignore
                     break
                 raise ValueError("Invalid Detector type;  It's not callable")
-
-        sys.path.remove(self.bundle_path)
         return d
 
     def post_transforms(self, data=None) -> Sequence[Callable]:
-        sys.path.insert(0, self.bundle_path)
-        unload_module("scripts")
-        self._update_device(data)
+        return list(self._instantiate("post_transforms", self.const.key_postprocessing(), data, self._post_transforms))
 
+    def _post_transforms(self):
         post = []
         for k in self.const.key_postprocessing():
             if self.bundle_config.get(k):
@@ -268,10 +270,107 @@ class BundleInferTask(BasicInferTask):
 
         if self.add_post_restore:
             post.append(Restored(keys=self.key_pred, ref_image=self.key_image))
-
-        sys.path.remove(self.bundle_path)
         return post
 
+    def _instantiate(self, name: str, keys: Sequence[str], data, fn: Callable) -> Any:
+        """
+        Return (cached) object created by fn from the bundle config.  Objects are re-created only when the device,
+        the displayable config values referenced by the config items (keys) or the bundle config/scripts change (checked
+        at most once every reload_interval seconds).
+        Time spent on instantiation is added to data["instantiate_latencies"].
+        """
+        data = data if data is not None else {}
+        with self._instances_lock:
+            if time.time() - self._bundle_checked >= self.reload_interval:
+                ts = self._bundle_mtime()
+                if ts != self._bundle_ts:
+                    self._reload_bundle_config()
+                    self._bundle_ts = ts
+                self._bundle_checked = time.time()
+
+            configs = {c: data.get(c, self.displayable_configs[c]) for c in self._displayable_deps(name, keys)}
+            key = (name, str(data.get(self.const.key_device())), json.dumps(configs, sort_keys=True, default=str))
+            if key in self._instances:
+                return self._instances[key]
+
+            start = time.time()
+            sys.path.insert(0, self.bundle_path)
+            try:
+                unload_module("scripts")
+                for k in self.const.key_displayable_configs():
+                    if self.bundle_config.get(k):
+                        self.bundle_config[k].update(configs)
+                # fresh parse; otherwise config parser returns objects resolved (and cached) earlier
+                self.bundle_config.parse()
+                self._update_device(data)
+                instance = fn()
+            finally:
+                sys.path.remove(self.bundle_path)
+
+            self._instances[key] = instance
+            latency = time.time() - start
+
+        logger.info(f"Instantiated {name} for {key[1]} in {latency:.4f} sec; configs: {configs}")
+        data.setdefault("instantiate_latencies", {})[name] = latency
+        return instance
+
+    def _displayable_deps(self, name: str, keys: Sequence[str]) -> List[str]:
+        """
+        Names of displayable configs (transitively) referenced by the given config items
+        """
+        if name in self._config_deps:
+            return self._config_deps[name]
+        if not self.displayable_configs:
+            return []
+
+        sep = ReferenceResolver.sep
+        deps = set()
+        try:
+            visited = set()
+            pending = [k for k in keys if self.bundle_config.get(k) is not None]
+            while pending:
+                id = pending.pop()
+                visited.add(id)
+                for ref in ReferenceResolver.find_refs_in_config(self.bundle_config.get(id), id):
+                    ref = ref.replace("#", sep)
+                    for k in self.const.key_displayable_configs():
+                        if ref == k:
+                            deps.update(self.displayable_configs.keys())
+                        elif ref.startswith(f"{k}{sep}"):
+                            deps.add(ref[len(k) + len(sep) :].split(sep)[0])
+                    if ref not in visited and not any(ref.startswith(f"{v}{sep}") for v in visited):
+                        pending.append(ref)
+        except Exception:
+            logger.warning(f"Failed to find displayable configs used by {name}; consider all", exc_info=True)
+            deps = set(self.displayable_configs.keys())
+
+        self._config_deps[name] = sorted(d for d in deps if d in self.displayable_configs)
+        return self._config_deps[name]
+
+    def _bundle_mtime(self) -> float:
+        ts = 0.0
+        for d in ("configs", "scripts"):
+            for root, dirs, files in os.walk(os.path.join(self.bundle_path, d)):
+                dirs[:] = [x for x in dirs if x != "__pycache__"]  # written when scripts are (re)imported
+                for f in files:
+                    if not f.endswith((".pyc", ".pyo")):
+                        ts = max(ts, os.path.getmtime(os.path.join(root, f)))
+        return ts
+
+    def _reload_bundle_config(self):
+        logger.info(f"Bundle files changed; reload {self.bundle_config_path}")
+        use_click = self.bundle_config.config.get("use_click", False)  # type: ignore
+        self.bundle_config = self._load_bundle_config(self.bundle_path, self.bundle_config_path)
+        self.bundle_config.config["use_click"] = use_click  # type: ignore
+        if self.dropout > 0:
+            self.bundle_config["network_def"]["dropout"] = self.dropout
+        for k in self.const.key_displayable_configs():
+            if self.bundle_config.get(k):
+                self.displayable_configs = self.bundle_config.get_parsed_content(k, instantiate=True)  # type: ignore
+
+        self._instances.clear()
+        self._config_deps.clear()
+
     def _get_type(self, name, type):
         name = name.lower() if name else ""
         return (
@@ -0,0 +1,123 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from monailabel.interfaces.tasks.infer_v2 import InferTask
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+from monailabel.utils.others.generic import handle_torch_linalg_multithread
+
+logger = logging.getLogger(__name__)
+
+
+class PipelinedInferExecutor:
+    """
+    Stage-pipelined executor for inference requests.
+
+    Each :class:`BasicInferTask` request is split into stages (pre -> infer -> post -> write) which run on separate
+    worker pools.  Pre/Post/Write stages run on CPU thread pools while the infer stage runs on a dedicated worker
+    per device.  This allows pre-transforms of request N+1 to overlap with the forward pass of request N.
+
+    Tasks which override ``__call__`` (e.g. pipelines chaining other infer tasks) are run as a whole.
+    """
+
+    def __init__(self, max_workers: int = 2, device_workers: int = 1):
+        """
+        :param max_workers: Number of CPU workers for each of pre/post/write stages
+        :param device_workers: Number of workers per device for running the inferer (> 1 if batching is enabled)
+        """
+        self.max_workers = max(1, max_workers)
+        self.device_workers = max(1, device_workers)
+
+        self._default = ThreadPoolExecutor(self.max_workers, thread_name_prefix="INFER")
+        self._pre = ThreadPoolExecutor(self.max_workers, thread_name_prefix="INFER-PRE")
+        self._post = ThreadPoolExecutor(self.max_workers, thread_name_prefix="INFER-POST")
+        self._write = ThreadPoolExecutor(self.max_workers, thread_name_prefix="INFER-WRITE")
+
+        self._lock = threading.Lock()
+        self._devices: Dict[str, ThreadPoolExecutor] = {}
+
+    @staticmethod
+    def is_pipelined(task: InferTask) -> bool:
+        return isinstance(task, BasicInferTask) and type(task).__call__ is BasicInferTask.__call__
+
+    def submit(self, task: InferTask, request: Dict[str, Any]) -> Future:
+        """
+        Submit infer request to run over the pipeline
+
+        :return: Future which resolves to the same result as ``task(request)``
+        """
+        if not self.is_pipelined(task):
+
+            def run_infer_in_thread(t, r):
+                handle_torch_linalg_multithread(r)
+                return t(r)
+
+            return self._default.submit(contextvars.copy_context().run, run_infer_in_thread, task, request)
+
+        def run_infer_stage(ctx):
+            handle_torch_linalg_multithread(ctx)
+            return task.run_stage_infer(ctx)  # type: ignore
+
+        stages: List[Tuple[Callable[[Any], ThreadPoolExecutor], Callable[[Any], Any]]] = [
+            (lambda _: self._pre, lambda r: task.run_stage_pre(r)),  # type: ignore
+            (lambda ctx: self._device_pool(ctx["device"]), run_infer_stage),
+            (lambda _: self._post, lambda ctx: task.run_stage_post(ctx)),  # type: ignore
+            (lambda _: self._write, lambda ctx: task.run_stage_write(ctx)),  # type: ignore
+        ]
+
+        # every stage runs in (a copy of) the context of the caller
+        result: Future = Future()
+        self._next(result, stages, request, contextvars.copy_context())
+        return result
+
+    def shutdown(self, wait=True):
+        for pool in [self._default, self._pre, self._post, self._write]:
+            pool.shutdown(wait=wait)
+        with self._lock:
+            for pool in self._devices.values():
+                pool.shutdown(wait=wait)
+            self._devices.clear()
+
+    def _device_pool(self, device) -> ThreadPoolExecutor:
+        device = str(device)
+        with self._lock:
+            pool = self._devices.get(device)
+            if pool is None:
+                logger.info(f"Create Infer Stage Worker(s) for device: {device}; workers: {self.device_workers}")
+                pool = ThreadPoolExecutor(self.device_workers, thread_name_prefix=f"INFER-{device}")
+                self._devices[device] = pool
+            return pool
+
+    def _next(self, result: Future, stages, value, ctx: contextvars.Context):
+        if not stages:
+            result.set_result(value)
+            return
+
+        pool_fn, stage_fn = stages[0]
+        try:
+            f = pool_fn(value).submit(ctx.copy().run, stage_fn, value)
+        except BaseException as e:
+            result.set_exception(e)
+            return
+
+        def done(f: Future):
+            e = f.exception()
+            if e is not None:
+                result.set_exception(e)
+            else:
+                self._next(result, stages[1:], f.result(), ctx)
+
+        f.add_done_callback(done)
@@ -0,0 +1,240 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+import torch
+
+from monailabel.config import settings
+
+logger = logging.getLogger(__name__)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class _Entry:
+    def __init__(self, name: str, network, mtime, device: str, size: int):
+        self.name = name
+        self.network = network
+        self.mtime = mtime
+        self.device = device  # target device
+        self.location = device  # current device (cpu in case offloaded)
+        self.size = size
+        self.in_use = 0
+        self.owners: Set[Hashable] = set()
+
+
+def network_size(network) -> int:
+    size = 0
+    for t in list(network.parameters()) + list(network.buffers()):
+        size += t.numel() * t.element_size()
+    return size
+
+
+class ModelRegistry:
+    """
+    Process-wide LRU cache of loaded networks shared across all infer tasks.
+
+    Networks are cached by key (e.g. model path and device); tasks loading the same model file on the same device
+    share one network.  Each device has a memory budget (in MB; 0 means unlimited).  When loading a network would
+    exceed the budget, least recently used networks on that device are offloaded to CPU first (if CPU budget allows)
+    and dropped otherwise.  Networks which are currently in use (pinned by :meth:`get`/:meth:`put` until
+    :meth:`release`) are never evicted.
+    """
+
+    def __init__(self, budget: Optional[Dict[str, int]] = None):
+        """
+        :param budget: Memory budget (MB) per device, e.g. {"cuda": 8000, "cuda:1": 4000, "cpu": 16000}
+        """
+        self.budget = budget if budget is not None else settings.MONAI_LABEL_MODEL_CACHE_BUDGET
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._stats: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "load_time": 0.0,
+            "offloads": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key: Hashable, mtime, owner: Hashable = None, pin: bool = False) -> Any:
+        """
+        Get cached network for the key; returns None (cache miss) if not found or model file is modified (mtime)
+
+        :param owner: owner (e.g. infer task) using the network; see :meth:`remove`
+        :param pin: pin the network (atomically with the lookup); caller must :meth:`release` it after use
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            if entry.mtime != mtime:
+                logger.warning(f"Reload model from cache.  Prev ts: {entry.mtime}; Current ts: {mtime}")
+                self._entries.pop(key)
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if entry.location != entry.device:
+                start = time.time()
+                self._make_room(entry.device, entry.size, exclude=key)
+                entry.network.to(torch.device(entry.device))
+                entry.location = entry.device
+                logger.info(f"Model restored from cpu to {entry.device}: {entry.name}; {time.time() - start:.4f}")
+
+            self._stats["hits"] += 1
+            if owner is not None:
+                entry.owners.add(owner)
+            entry.in_use += int(pin)
+            return entry.network
+
+    def put(
+        self,
+        key: Hashable,
+        name: str,
+        network,
+        mtime,
+        device: str,
+        load_time: float = 0.0,
+        owner: Hashable = None,
+        pin: bool = False,
+    ):
+        """
+        Add network for the key (replaces the existing one); see :meth:`get` for ``owner`` and ``pin``
+        """
+        device = str(device)
+        with self._lock:
+            prev = self._entries.pop(key, None)
+
+            entry = _Entry(name, network, mtime, device, network_size(network))
+            entry.owners = prev.owners if prev else set()
+            if owner is not None:
+                entry.owners.add(owner)
+            entry.in_use = int(pin)
+            self._make_room(device, entry.size, exclude=key)
+            self._entries[key] = entry
+
+            self._stats["loads"] += 1
+            self._stats["load_time"] += load_time
+            logger.info(
+                f"Model loaded to {device}: {name}; Size: {entry.size / (1024 * 1024):.2f} MB; Time: {load_time:.4f}"
+            )
+
+    def release(self, network):
+        """
+        Unpin the network pinned by :meth:`get`/:meth:`put`
+        """
+        with self._lock:
+            for e in self._entries.values():
+                if network is not None and e.network is network and e.in_use:
+                    e.in_use -= 1
+
+    def remove(self, owner: Hashable):
+        """
+        Remove the owner from all the cached networks; networks which are not used by any other owner are dropped
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if owner in entry.owners:
+                    entry.owners.discard(owner)
+                    if not entry.owners:
+                        self._entries.pop(key)
+        self._empty_cache()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._empty_cache()
+
+    def used(self, device: str) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values() if e.location == device)
+
+    def available(self, device: str) -> Optional[int]:
+        """
+        Free memory (bytes) within the budget of the device; None if the budget is unlimited
+        """
+        with self._lock:
+            budget = self._budget(device)
+            return budget - self.used(str(device)) if budget else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            devices: Dict[str, Any] = {}
+            for e in self._entries.values():
+                d = devices.setdefault(
+                    e.location, {"models": [], "used_mb": 0.0, "budget_mb": self._budget(e.location) // (1024 * 1024)}
+                )
+                d["models"].append(e.name)
+                d["used_mb"] = round(d["used_mb"] + e.size / (1024 * 1024), 2)
+
+            s = dict(self._stats)
+            total = s["hits"] + s["misses"]
+            s["hit_ratio"] = round(s["hits"] / total, 4) if total else 0
+            s["load_time"] = round(s["load_time"], 2)
+            s["avg_load_time"] = round(s["load_time"] / s["loads"], 2) if s["loads"] else 0
+            s["devices"] = devices
+            return s
+
+    def _budget(self, device: str) -> int:
+        device = str(device)
+        budget = self.budget.get(device)
+        if budget is None:
+            budget = self.budget.get(device.split(":")[0], 0)
+        return budget * 1024 * 1024
+
+    def _make_room(self, device: str, size: int, exclude: Hashable = None):
+        budget = self._budget(device)
+        if not budget:
+            return
+
+        for key in list(self._entries.keys()):
+            if self.used(device) + size <= budget:
+                break
+
+            entry = self._entries[key]
+            if key == exclude or entry.location != device or entry.in_use:
+                continue
+
+            cpu_budget = self._budget("cpu")
+            if device != "cpu" and (not cpu_budget or self.used("cpu") + entry.size <= cpu_budget):
+                logger.info(f"Offload model from {device} to cpu: {entry.name}")
+                entry.network.to(torch.device("cpu"))
+                entry.location = "cpu"
+                self._stats["offloads"] += 1
+            else:
+                logger.info(f"Evict model from {device}: {entry.name}")
+                self._entries.pop(key)
+                self._stats["evictions"] += 1
+
+        self._empty_cache()
+        if self.used(device) + size > budget:
+            logger.warning(f"Model cache for {device} exceeds budget: {(self.used(device) + size) / budget:.2f}x")
+
+    def _empty_cache(self):
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+def model_registry() -> ModelRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,179 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from monailabel.config import settings
+from monailabel.interfaces.tasks.infer_v2 import InferTask
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+from monailabel.utils.others.generic import handle_torch_linalg_multithread
+
+logger = logging.getLogger(__name__)
+
+
+class WSIInferEngine:
+    """
+    Batched execution of WSI tile requests over a :class:`BasicInferTask`.
+
+    Tiles are pre-processed on a CPU thread pool using pre-transforms shared by all the tiles of a device.  Tiles of
+    the same device and input shape are grouped into batches of ``batch_size`` and each batch runs a single forward
+    pass (see :meth:`BasicInferTask.run_stage_infer_batch`) on a dedicated pool of ``device_workers`` threads per
+    device; so GPU concurrency is explicit and independent of the number of CPU workers.  Outputs are handed over to
+    the CPU pool for post-transforms (e.g. contour extraction) and writer.
+
+    Number of tiles in flight (pre-processed but not yet written) is bounded to keep the host memory in check.
+    """
+
+    def __init__(self, task: BasicInferTask, batch_size: int = 4, max_workers: int = 2, device_workers: int = 1):
+        """
+        :param task: infer task to run tiles
+        :param batch_size: max number of tiles per forward pass
+        :param max_workers: number of CPU workers for pre/post/write stages
+        :param device_workers: number of concurrent forward passes per device
+        """
+        self.task = task
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.device_workers = max(1, device_workers)
+
+        self._lock = threading.Lock()
+        self._pre_transforms: Dict[str, Sequence[Callable]] = {}
+        self._post_transforms: Dict[str, Sequence[Callable]] = {}
+        self._stats = {"batches": 0, "tiles": 0}
+
+    @staticmethod
+    def is_supported(task: InferTask) -> bool:
+        return isinstance(task, BasicInferTask) and type(task).__call__ is BasicInferTask.__call__
+
+    def _transforms(self, cache: Dict[str, Sequence[Callable]], device: str, fn: Callable, data) -> Sequence[Callable]:
+        with self._lock:
+            t = cache.get(device)
+            if t is None:
+                t = cache[device] = fn(data)
+            return t
+
+    def _pre(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        handle_torch_linalg_multithread(request)
+        device = str(request.get("device"))
+        pre_transforms = self._transforms(self._pre_transforms, device, self.task.pre_transforms, request)
+        return self.task.run_stage_pre(request, pre_transforms=pre_transforms)
+
+    def _infer(self, ctxs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        handle_torch_linalg_multithread(ctxs[0])
+        return self.task.run_stage_infer_batch(ctxs)
+
+    def _post(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
+        handle_torch_linalg_multithread(ctx)
+        device = str(ctx["device"])
+        post_transforms = self._transforms(self._post_transforms, device, self.task.post_transforms, ctx["data"])
+        ctx = self.task.run_stage_post(ctx, post_transforms=post_transforms)
+        _, result_json = self.task.run_stage_write(ctx)
+        return result_json
+
+    def run(
+        self, requests: List[Dict[str, Any]], callback: Optional[Callable[[int, Dict[str, Any]], Any]] = None
+    ) -> List[Any]:
+        """
+        Run all the tile requests (each having its ``device``)
+
+        :param callback: called (in the caller's thread) with index and result json of each tile as soon as it
+            finishes (i.e. out of order); its return value is kept as the result (e.g. to drop large outputs)
+        :return: result json of each tile (same order as requests)
+        """
+        results: List[Any] = [None] * len(requests)
+        max_inflight = 2 * self.batch_size * len({str(r.get("device")) for r in requests}) * self.device_workers
+        max_inflight = max(max_inflight, self.batch_size + self.max_workers)
+
+        cpu = ThreadPoolExecutor(self.max_workers, thread_name_prefix="WSI-CPU")
+        devices: Dict[str, ThreadPoolExecutor] = {}
+        pending: Dict[Future, Tuple[str, Any]] = {}
+        buckets: Dict[Tuple, List[Tuple[int, Dict[str, Any]]]] = {}
+
+        def dispatch(key):
+            items = buckets.pop(key)
+            device = key[0]
+            if device not in devices:
+                devices[device] = ThreadPoolExecutor(self.device_workers, thread_name_prefix=f"WSI-{device}")
+            f = devices[device].submit(contextvars.copy_context().run, self._infer, [ctx for _, ctx in items])
+            pending[f] = ("infer", [idx for idx, _ in items])
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["tiles"] += len(items)
+
+        start = time.time()
+        inflight, submitted = 0, 0
+        try:
+            while submitted < len(requests) or pending or buckets:
+                while submitted < len(requests) and inflight < max_inflight:
+                    f = cpu.submit(contextvars.copy_context().run, self._pre, requests[submitted])
+                    pending[f] = ("pre", submitted)
+                    submitted += 1
+                    inflight += 1
+
+                # run partial batches when no more tiles can arrive for now
+                if not any(stage == "pre" for stage, _ in pending.values()):
+                    for key in list(buckets.keys()):
+                        dispatch(key)
+
+                done, _ = wait(list(pending.keys()), return_when=FIRST_COMPLETED)
+                for f in done:
+                    stage, arg = pending.pop(f)
+                    if stage == "pre":
+                        ctx = f.result()
+                        x = ctx["data"][self.task.input_key]
+                        key = (str(ctx["device"]), tuple(x.shape), str(x.dtype))
+                        buckets.setdefault(key, []).append((arg, ctx))
+                        if len(buckets[key]) >= self.batch_size:
+                            dispatch(key)
+                    elif stage == "infer":
+                        for idx, ctx in zip(arg, f.result()):
+                            pending[cpu.submit(contextvars.copy_context().run, self._post, ctx)] = ("post", idx)
+                    else:
+                        results[arg] = callback(arg, f.result()) if callback else f.result()
+                        inflight -= 1
+        finally:
+            for f in pending:
+                f.cancel()
+            cpu.shutdown(wait=True)
+            for device, pool in devices.items():
+                pool.shutdown(wait=True)
+                if device.startswith("cuda"):
+                    torch.cuda.empty_cache()
+
+        logger.info(f"WSI Engine: {len(requests)} tiles in {time.time() - start:.4f} secs; stats: {self.stats()}")
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches = self._stats["batches"]
+            tiles = self._stats["tiles"]
+        return {"batches": batches, "tiles": tiles, "avg_batch_size": round(tiles / batches, 2) if batches else 0}
+
+
+def wsi_infer_engine(task: InferTask, request: Dict[str, Any], max_workers: int) -> Optional[WSIInferEngine]:
+    """
+    Engine for running WSI tiles of the request; None if batching is disabled (``wsi_batch_size`` <= 0) or not
+    supported by the task.
+    """
+    batch_size = int(request.get("wsi_batch_size", settings.MONAI_LABEL_WSI_BATCH_SIZE))
+    device_workers = int(request.get("wsi_device_workers", settings.MONAI_LABEL_WSI_DEVICE_WORKERS))
+    if batch_size <= 0 or not WSIInferEngine.is_supported(task):
+        return None
+    return WSIInferEngine(
+        task, batch_size=batch_size, max_workers=max_workers, device_workers=device_workers  # type: ignore
+    )
@@ -10,50 +10,108 @@
 # limitations under the License.
 
 import logging
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import torch
 from monai.transforms import LoadImage
 
 from monailabel.interfaces.datastore import Datastore, DefaultLabelTag
-from monailabel.interfaces.tasks.scoring import ScoringMethod
+from monailabel.interfaces.tasks.scoring import IncrementalScoringMethod
 
 logger = logging.getLogger(__name__)
 
 
-class Dice(ScoringMethod):
+def confusion_matrix(y: np.ndarray, y_pred: np.ndarray, num_classes: int, chunk_size=1 << 22) -> np.ndarray:
     """
-    Compute dice between final vs original tags
+    Confusion matrix (rows: y, cols: y_pred) of integer labels computed by bincount over chunks of voxels
     """
+    y = y.reshape(-1)
+    y_pred = y_pred.reshape(-1)
+    if y.shape != y_pred.shape:
+        raise ValueError(f"Label shapes do not match: {y.size} vs {y_pred.size} voxels")
 
-    def __init__(self):
-        super().__init__("Compute Dice for predicated label vs submitted")
+    cm = np.zeros(num_classes * num_classes, dtype=np.int64)
+    for i in range(0, y.size, chunk_size):
+        idx = y[i : i + chunk_size].astype(np.int64) * num_classes + y_pred[i : i + chunk_size]
+        cm += np.bincount(idx, minlength=num_classes * num_classes)
+    return cm.reshape(num_classes, num_classes)
 
-    def __call__(self, request, datastore: Datastore):
-        loader = LoadImage(image_only=True)
 
-        tag_y = request.get("y", DefaultLabelTag.FINAL)
-        tag_y_pred = request.get("y_pred", DefaultLabelTag.ORIGINAL)
+def class_scores(cm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per class Dice and IoU from confusion matrix; 1 for the classes which are absent in both y and y_pred
+    """
+    tp = np.diag(cm).astype(np.float64)
+    total = cm.sum(axis=1) + cm.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dice = np.where(total > 0, 2.0 * tp / total, 1.0)
+        iou = np.where(total > 0, tp / (total - tp), 1.0)
+    return dice, iou
+
+
+class Dice(IncrementalScoringMethod):
+    """
+    Compute (per class) dice between final vs original tags
+    """
+
+    def __init__(self, max_workers=2, labels: Optional[Dict[str, int]] = None):
+        """
+        :param max_workers: number of label pairs loaded/scored in parallel (can be overridden by request)
+        :param labels: label name => index used to name the per class results (default: index)
+        """
+        super().__init__("Compute Dice for predicated label vs submitted", max_workers=max_workers)
+        self.labels = labels
+
+    def prepare(self, request, datastore: Datastore):
+        ctx = super().prepare(request, datastore)
+        ctx["loader"] = LoadImage(image_only=True)
+        ctx["tag_y"] = request.get("y", DefaultLabelTag.FINAL)
+        ctx["tag_y_pred"] = request.get("y_pred", DefaultLabelTag.ORIGINAL)
+        ctx["labels"] = request.get("labels", self.labels)
+        return ctx
+
+    def _labels(self, ctx, image_id):
+        datastore = ctx["datastore"]
+        tag_y, tag_y_pred = ctx["tag_y"], ctx["tag_y_pred"]
+        y_i = datastore.get_label_by_image_id(image_id, tag_y) if tag_y else None
+        y_pred_i = datastore.get_label_by_image_id(image_id, tag_y_pred) if tag_y_pred else None
+        return y_i, y_pred_i
+
+    def fingerprint(self, ctx, image_id):
+        y_i, y_pred_i = self._labels(ctx, image_id)
+        if not y_i or not y_pred_i:
+            return None
+
+        datastore = ctx["datastore"]
+        return {
+            "y": self.label_fingerprint(datastore, y_i, ctx["tag_y"]),
+            "y_pred": self.label_fingerprint(datastore, y_pred_i, ctx["tag_y_pred"]),
+            "labels": ctx["labels"],
+        }
+
+    def _load(self, ctx, label_id, tag) -> np.ndarray:
+        label = ctx["loader"](ctx["datastore"].get_label_uri(label_id, tag))
+        label = label.numpy() if isinstance(label, torch.Tensor) else np.asarray(label)
+        return label if np.issubdtype(label.dtype, np.integer) else np.rint(label).astype(np.int32)
 
-        result = {}
-        for image_id in datastore.list_images():
-            y_i = datastore.get_label_by_image_id(image_id, tag_y) if tag_y else None
-            y_pred_i = datastore.get_label_by_image_id(image_id, tag_y_pred) if tag_y_pred else None
+    def score(self, ctx, image_id):
+        y_i, y_pred_i = self._labels(ctx, image_id)
+        y = self._load(ctx, y_i, ctx["tag_y"])
+        y_pred = self._load(ctx, y_pred_i, ctx["tag_y_pred"])
 
-            if y_i and y_pred_i:
-                y = loader(datastore.get_label_uri(y_i, tag_y))
-                y_pred = loader(datastore.get_label_uri(y_pred_i, tag_y_pred))
+        num_classes = int(max(y.max(initial=0), y_pred.max(initial=0))) + 1
+        cm = confusion_matrix(y, y_pred, max(num_classes, 2))
+        dice, iou = class_scores(cm)
 
-                y = y.flatten()
-                if isinstance(y, torch.Tensor):
-                    y = y.numpy()
-                y_pred = y_pred.flatten()
-                if isinstance(y_pred, torch.Tensor):
-                    y_pred = y_pred.numpy()
-                union = np.sum(y) + np.sum(y_pred)
-                dice = 2.0 * np.sum(y * y_pred) / union if union != 0 else 1
+        # foreground classes present in either of the labels
+        present = [c for c in range(1, cm.shape[0]) if cm[c, :].sum() or cm[:, c].sum()]
+        names = {v: k for k, v in ctx["labels"].items()} if ctx["labels"] else {}
+        result = {
+            "dice": float(np.mean(dice[present])) if present else 1.0,
+            "dice_per_class": {str(names.get(c, c)): float(dice[c]) for c in present},
+            "iou_per_class": {str(names.get(c, c)): float(iou[c]) for c in present},
+        }
 
-                logger.info(f"Dice Score for {image_id} is {dice}")
-                datastore.update_image_info(image_id, {"dice": dice})
-                result[image_id] = dice
+        logger.info(f"Dice Score for {image_id} is {result['dice']}; per class: {result['dice_per_class']}")
         return result
@@ -22,6 +22,7 @@ from monai.utils import deprecated
 
 from monailabel.interfaces.datastore import Datastore
 from monailabel.interfaces.tasks.scoring import ScoringMethod
+from monailabel.utils.others.uncertainty import entropy_map, entropy_score
 
 logger = logging.getLogger(__name__)
 
@@ -70,34 +71,8 @@ class EpistemicScoring(ScoringMethod):
 
     def entropy_3d_volume(self, vol_input):
         # The input is assumed with repetitions, channels and then volumetric data
-        vol_input = vol_input.astype(dtype="float32")
-        dims = vol_input.shape
-        reps = dims[0]
-        entropy = np.zeros(dims[2:], dtype="float32")
-
-        # Threshold values less than or equal to zero
-        threshold = 0.00005
-        vol_input[vol_input <= 0] = threshold
-
-        # Looping across channels as each channel is a class
-        if len(dims) == 5:
-            for channel in range(dims[1]):
-                t_vol = np.squeeze(vol_input[:, channel, :, :, :])
-                t_sum = np.sum(t_vol, axis=0)
-                t_avg = np.divide(t_sum, reps)
-                t_log = np.log(t_avg)
-                t_entropy = -np.multiply(t_avg, t_log)
-                entropy = entropy + t_entropy
-        else:
-            t_vol = np.squeeze(vol_input)
-            t_sum = np.sum(t_vol, axis=0)
-            t_avg = np.divide(t_sum, reps)
-            t_log = np.log(t_avg)
-            t_entropy = -np.multiply(t_avg, t_log)
-            entropy = entropy + t_entropy
-
         # Returns a 3D volume of entropy
-        return entropy
+        return entropy_map(vol_input, threshold=0.00005, channel_dim=len(vol_input.shape) == 5)
 
     @staticmethod
     def _get_model_path(path):
@@ -174,7 +149,7 @@ class EpistemicScoring(ScoringMethod):
             accum_numpy = np.squeeze(accum_numpy)
             accum_numpy = accum_numpy[:, 1:, :, :, :] if len(accum_numpy.shape) > 4 else accum_numpy
 
-            entropy = float(np.nanmean(self.entropy_3d_volume(accum_numpy)))
+            entropy = entropy_score(accum_numpy, threshold=0.00005, channel_dim=len(accum_numpy.shape) == 5)
 
             if self.device == "cuda":
                 torch.cuda.empty_cache()
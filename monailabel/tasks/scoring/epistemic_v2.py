@@ -9,25 +9,72 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
 import logging
-import multiprocessing
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
 
 import numpy as np
 import torch
+from monai.data import MetaTensor
 from monai.metrics.active_learning_metrics import VarianceMetric
 
 from monailabel.interfaces.datastore import Datastore
-from monailabel.interfaces.tasks.scoring import ScoringMethod
+from monailabel.interfaces.tasks.scoring import IncrementalScoringMethod
 from monailabel.tasks.infer.basic_infer import BasicInferTask
-from monailabel.utils.others.generic import name_to_device
+from monailabel.utils.others.generic import file_checksum, name_to_device
+from monailabel.utils.others.uncertainty import entropy_map, entropy_score, variance_map, variance_score
 
 logger = logging.getLogger(__name__)
 
 
-class EpistemicScoring(ScoringMethod):
+class RunningStats:
+    """
+    Per-voxel running mean (and optionally variance) over Monte Carlo samples, merged batch by batch
+    (Chan et al. parallel algorithm) so that samples never have to be stacked in memory.
+    """
+
+    def __init__(self, threshold=0.00005, variance=False):
+        self.threshold = threshold
+        self.variance = variance
+        self.n = 0
+        self.mean: Optional[torch.Tensor] = None
+        self.m2: Optional[torch.Tensor] = None
+
+    def update(self, x: torch.Tensor) -> None:
+        """
+        :param x: batch of samples (N, C, spatial...)
+        """
+        x = torch.where(x <= 0, torch.full_like(x, self.threshold), x.float())
+        b = x.shape[0]
+        mean = x.mean(dim=0)
+        m2 = ((x - mean) ** 2).sum(dim=0) if self.variance else None
+        if self.mean is None:
+            self.n, self.mean, self.m2 = b, mean, m2
+            return
+
+        total = self.n + b
+        delta = mean - self.mean
+        self.mean += delta * (b / total)
+        if self.variance:
+            self.m2 += m2 + delta**2 * (self.n * b / total)
+        self.n = total
+
+    def entropy(self) -> torch.Tensor:
+        """
+        Entropy of the mean probabilities summed over channels (spatial map)
+        """
+        return -(self.mean * torch.log(self.mean)).sum(dim=0)
+
+    def var(self) -> torch.Tensor:
+        """
+        Population variance summed over channels (spatial map)
+        """
+        return (self.m2 / self.n).sum(dim=0)
+
+
+class EpistemicScoring(IncrementalScoringMethod):
     """
     First version of Epistemic computation used as active learning strategy
     """
@@ -40,8 +87,22 @@ class EpistemicScoring(ScoringMethod):
         use_variance=False,
         key_output_entropy="epistemic_entropy",
         key_output_ts="epistemic_ts",
+        mc_engine=True,
+        mc_batch_size=2,
+        activation: Optional[str] = None,
+        max_workers=2,
     ):
-        super().__init__(f"Compute initial score based on dropout - {infer_task.description}")
+        """
+        :param infer_task: infer task (train_mode=True and network with dropout)
+        :param mc_engine: run pre-transforms once and all dropout simulations as batch dimension of a single
+            inferer run (statistics over network probabilities); otherwise run complete infer task per simulation
+        :param mc_batch_size: number of simulations per forward pass in mc_engine; small groups bound the memory of
+            large volumes (e.g. 512^3 over all simulations in one batch needs >20GB); 0 = all at once
+        :param activation: softmax or sigmoid applied over network output in mc_engine (None = softmax if the output
+            has more than one channel otherwise sigmoid)
+        :param max_workers: number of images scored in parallel (can be overridden by request)
+        """
+        super().__init__(f"Compute initial score based on dropout - {infer_task.description}", max_workers=max_workers)
         self.infer_task = infer_task
         self.dimension = infer_task.dimension
 
@@ -50,46 +111,21 @@ class EpistemicScoring(ScoringMethod):
         self.use_variance = use_variance
         self.key_output_entropy = key_output_entropy
         self.key_output_ts = key_output_ts
+        self.mc_engine = mc_engine
+        self.mc_batch_size = mc_batch_size
+        self.activation = activation
+        self._checksums: Dict = {}
+
+    def _has_channels(self, vol_input) -> bool:
+        return len(vol_input.shape) == (5 if self.dimension == 3 else 4)
 
     def entropy_volume(self, vol_input):
         # The input is assumed with repetitions, channels and then volumetric data
-        vol_input = vol_input.cpu().detach().numpy() if isinstance(vol_input, torch.Tensor) else vol_input
-        vol_input = vol_input.astype(dtype="float32")
-        dims = vol_input.shape
-        reps = dims[0]
-        entropy = np.zeros(dims[2:], dtype="float32")
-
-        # Threshold values less than or equal to zero
-        threshold = 0.00005
-        vol_input[vol_input <= 0] = threshold
-
-        # Looping across channels as each channel is a class
-        if len(dims) == 5 if self.dimension == 3 else 4:
-            for channel in range(dims[1]):
-                t_vol = np.squeeze(
-                    vol_input[:, channel, :, :, :] if self.dimension == 3 else vol_input[:, channel, :, :]
-                )
-                t_sum = np.sum(t_vol, axis=0)
-                t_avg = np.divide(t_sum, reps)
-                t_log = np.log(t_avg)
-                t_entropy = -np.multiply(t_avg, t_log)
-                entropy = entropy + t_entropy
-        else:
-            t_vol = np.squeeze(vol_input)
-            t_sum = np.sum(t_vol, axis=0)
-            t_avg = np.divide(t_sum, reps)
-            t_log = np.log(t_avg)
-            t_entropy = -np.multiply(t_avg, t_log)
-            entropy = entropy + t_entropy
-
-        # Returns a 3D volume of entropy
-        return entropy
+        return entropy_map(vol_input, threshold=0.00005, channel_dim=self._has_channels(vol_input))
 
     def variance_volume(self, vol_input, ignore_nans=True):
         if ignore_nans:
-            vol_input[vol_input <= 0] = 0.0005
-            vari = np.nanvar(vol_input.cpu().detach().numpy(), axis=0)  # torch.var vs np.nanvar (ignore_nans)
-            variance = np.sum(vari, axis=0)
+            variance = variance_map(vol_input, threshold=0.0005, channel_dim=self._has_channels(vol_input))
         else:
             variance_metric = VarianceMetric(threshold=0.0005, spatial_map=True, scalar_reduction="sum")
             variance = variance_metric(vol_input)
@@ -99,36 +135,32 @@ class EpistemicScoring(ScoringMethod):
             variance = np.expand_dims(variance, axis=0)
         return variance
 
-    def __call__(self, request, datastore: Datastore):
+    def _model_checksum(self, model_file) -> Optional[str]:
+        if not model_file or not os.path.exists(model_file):
+            return None
+
+        stat = os.stat(model_file)
+        key = (model_file, stat.st_mtime_ns, stat.st_size)
+        if key not in self._checksums:
+            self._checksums = {key: file_checksum(model_file)}
+        return self._checksums[key]
+
+    def prepare(self, request, datastore: Datastore):
         logger.info("Starting Epistemic Uncertainty scoring")
+        ctx = super().prepare(request, datastore)
 
         model_file = self.infer_task.get_path()
-        model_ts = int(os.stat(model_file).st_mtime) if model_file and os.path.exists(model_file) else 1
+        ctx["model_ts"] = int(os.stat(model_file).st_mtime) if model_file and os.path.exists(model_file) else 1
+        ctx["model"] = self._model_checksum(model_file)
         self.infer_task.clear_cache()
 
-        # Performing Epistemic for all unlabeled images
-        skipped = 0
-        unlabeled_images = datastore.get_unlabeled_images()
-        max_samples = request.get("max_samples", self.max_samples)
         simulation_size = request.get("simulation_size", self.simulation_size)
         if simulation_size < 2:
             simulation_size = 2
             logger.warning("EPISTEMIC:: Fixing 'simulation_size=2' as min 2 simulations are needed to compute entropy")
+        ctx["simulation_size"] = simulation_size
+        ctx["max_samples"] = request.get("max_samples", self.max_samples)
 
-        logger.info(f"EPISTEMIC:: Total unlabeled images: {len(unlabeled_images)}; max_samples: {max_samples}")
-        t_start = time.time()
-
-        image_ids = []
-        for image_id in unlabeled_images:
-            image_info = datastore.get_image_info(image_id)
-            prev_ts = image_info.get("epistemic_ts", 0)
-            if prev_ts == model_ts:
-                skipped += 1
-                continue
-            image_ids.append(image_id)
-        image_ids = image_ids[:max_samples] if max_samples else image_ids
-
-        max_workers = request.get("max_workers", 2)
         multi_gpu = request.get("multi_gpu", False)
         multi_gpus = request.get("gpus", "all")
         gpus = (
@@ -136,41 +168,59 @@ class EpistemicScoring(ScoringMethod):
         )
         device = name_to_device(request.get("device", "cuda"))
         device_ids = [f"cuda:{id}" for id in gpus] if multi_gpu else [device]
+        ctx["devices"] = itertools.cycle(device_ids)
 
-        max_workers = max_workers if max_workers else max(1, multiprocessing.cpu_count() // 2)
-        max_workers = min(max_workers, multiprocessing.cpu_count())
-
-        if len(image_ids) > 1 and (max_workers == 0 or max_workers > 1):
-            logger.info(f"MultiGpu: {multi_gpu}; Using Device(s): {device_ids}; Max Workers: {max_workers}")
-            futures = []
-            with ThreadPoolExecutor(max_workers if max_workers else None, "ScoreInfer") as e:
-                for image_id in image_ids:
-                    futures.append(e.submit(self.run_scoring, image_id, simulation_size, model_ts, datastore))
-                for future in futures:
-                    future.result()
-        else:
-            for image_id in image_ids:
-                self.run_scoring(image_id, simulation_size, model_ts, datastore)
-
-        summary = {
-            "total": len(unlabeled_images),
-            "skipped": skipped,
-            "executed": len(image_ids),
-            "latency": round(time.time() - t_start, 3),
-        }
+        logger.info(f"EPISTEMIC:: max_samples: {ctx['max_samples']}; MultiGpu: {multi_gpu}; Device(s): {device_ids}")
+        return ctx
 
-        logger.info(f"EPISTEMIC:: {summary}")
-        self.infer_task.clear_cache()
-        return summary
+    def images(self, ctx):
+        return ctx["datastore"].get_unlabeled_images()
 
-    def run_scoring(self, image_id, simulation_size, model_ts, datastore):
+    def fingerprint(self, ctx, image_id):
+        info = ctx["datastore"].get_image_info(image_id)
+        return {
+            "model": ctx["model"] if ctx["model"] else ctx["model_ts"],
+            "image": {"ts": info.get("ts"), "checksum": info.get("checksum")},
+            "simulation_size": ctx["simulation_size"],
+            "use_variance": self.use_variance,
+            "mc_engine": self.mc_engine,
+            "activation": self.activation,
+        }
+
+    def score(self, ctx, image_id):
         start = time.time()
+        simulation_size = ctx["simulation_size"]
         request = {
-            "image": datastore.get_image_uri(image_id),
+            "image": ctx["datastore"].get_image_uri(image_id),
             "logging": "error",
             "cache_transforms": False,
         }
+        device = next(ctx["devices"])
+        if device:
+            request["device"] = device
+
+        if self.mc_engine:
+            entropy = self.run_mc_dropout(request, simulation_size)
+        else:
+            entropy = self.run_simulations(image_id, request, simulation_size)
 
+        latency = time.time() - start
+        logger.info(
+            "EPISTEMIC:: {} => iters: {}; entropy: {}; latency: {};".format(
+                image_id,
+                simulation_size,
+                round(entropy, 4),
+                round(latency, 3),
+            )
+        )
+
+        # Add epistemic_entropy in datastore
+        return {self.key_output_entropy: entropy, self.key_output_ts: ctx["model_ts"]}
+
+    def finalize(self, ctx, summary):
+        self.infer_task.clear_cache()
+
+    def run_simulations(self, image_id, request, simulation_size) -> float:
         accum_unl_outputs = []
         for i in range(simulation_size):
             data = self.infer_task(request=request)
@@ -191,19 +241,48 @@ class EpistemicScoring(ScoringMethod):
         elif self.dimension == 3 and len(accum.shape) == 4:
             accum = torch.unsqueeze(accum, dim=1)
 
-        entropy = self.variance_volume(accum) if self.use_variance else self.entropy_volume(accum)
-        entropy = float(np.nanmean(entropy))
+        channel_dim = self._has_channels(accum)
+        if self.use_variance:
+            return variance_score(accum, threshold=0.0005, channel_dim=channel_dim)
+        return entropy_score(accum, threshold=0.00005, channel_dim=channel_dim)
 
-        latency = time.time() - start
-        logger.info(
-            "EPISTEMIC:: {} => iters: {}; entropy: {}; latency: {};".format(
-                image_id,
-                simulation_size,
-                round(entropy, 4),
-                round(latency, 3),
-            )
-        )
+    def run_mc_dropout(self, request, simulation_size) -> float:
+        """
+        Pre-process the image once and run all dropout simulations as a batch (in groups of mc_batch_size) through
+        the inferer on device; entropy/variance is accumulated with running statistics.
+        """
+        task = self.infer_task
+        ctx = task.run_stage_pre(request)
+        data, device = ctx["data"], ctx["device"]
 
-        # Add epistemic_entropy in datastore
-        info = {self.key_output_entropy: entropy, self.key_output_ts: model_ts}
-        datastore.update_image_info(image_id, info)
+        inputs = data[task.input_key]
+        inputs = inputs if torch.is_tensor(inputs) else torch.from_numpy(np.asarray(inputs))
+        inputs = inputs.as_tensor() if isinstance(inputs, MetaTensor) else inputs
+        inputs = inputs[None].to(torch.device(device))
+
+        inferer = task.inferer(data)
+        batch_size = self.mc_batch_size if self.mc_batch_size > 0 else simulation_size
+
+        stats = RunningStats(variance=self.use_variance)
+        with torch.no_grad(), task._network(device, data) as network:
+            for i in range(0, simulation_size, batch_size):
+                n = min(batch_size, simulation_size - i)
+                outputs = inferer(inputs.expand(n, *inputs.shape[1:]), network)
+                outputs = outputs.as_tensor() if isinstance(outputs, MetaTensor) else outputs
+                stats.update(self._probabilities(outputs))
+                del outputs
+
+        score = stats.var() if self.use_variance else stats.entropy()
+        score = float(torch.nanmean(score).item())
+        del stats
+        if str(device).startswith("cuda"):
+            torch.cuda.empty_cache()
+        return score
+
+    def _probabilities(self, outputs: torch.Tensor) -> torch.Tensor:
+        activation = self.activation if self.activation else "softmax" if outputs.shape[1] > 1 else "sigmoid"
+        if activation == "softmax":
+            return torch.softmax(outputs.float(), dim=1)
+        if activation == "sigmoid":
+            return torch.sigmoid(outputs.float())
+        return outputs
@@ -16,34 +16,50 @@ import torch
 from monai.transforms import LoadImage
 
 from monailabel.interfaces.datastore import Datastore, DefaultLabelTag
-from monailabel.interfaces.tasks.scoring import ScoringMethod
+from monailabel.interfaces.tasks.scoring import IncrementalScoringMethod
 
 logger = logging.getLogger(__name__)
 
 
-class Sum(ScoringMethod):
+class Sum(IncrementalScoringMethod):
     """
     Consider implementing simple np sum method of label tags; Also add valid slices that have label mask
     """
 
-    def __init__(self, tags=(DefaultLabelTag.FINAL.value, DefaultLabelTag.ORIGINAL.value)):
-        super().__init__("Compute Numpy Sum for Final/Original Labels")
+    def __init__(self, tags=(DefaultLabelTag.FINAL.value, DefaultLabelTag.ORIGINAL.value), max_workers=1):
+        super().__init__("Compute Numpy Sum for Final/Original Labels", max_workers=max_workers)
         self.tags = tags
 
-    def __call__(self, request, datastore: Datastore):
-        loader = LoadImage(image_only=True)
+    def prepare(self, request, datastore: Datastore):
+        ctx = super().prepare(request, datastore)
+        ctx["loader"] = LoadImage(image_only=True)
+        return ctx
+
+    def _labels(self, ctx, image_id):
+        datastore = ctx["datastore"]
+        labels = {tag: datastore.get_label_by_image_id(image_id, tag) for tag in self.tags}
+        return {tag: label_id for tag, label_id in labels.items() if label_id}
+
+    def fingerprint(self, ctx, image_id):
+        labels = self._labels(ctx, image_id)
+        if not labels:
+            return None
+        return {tag: self.label_fingerprint(ctx["datastore"], label_id, tag) for tag, label_id in labels.items()}
+
+    def score(self, ctx, image_id):
+        datastore, loader = ctx["datastore"], ctx["loader"]
         result = {}
-        for image_id in datastore.list_images():
-            for tag in self.tags:
-                label_id: str = datastore.get_label_by_image_id(image_id, tag)
-                if label_id:
-                    label = loader(datastore.get_label_uri(label_id, tag))
-                    if isinstance(label, torch.Tensor):
-                        label = label.numpy()
-                    slices = [sid for sid in range(label.shape[0]) if np.sum(label[sid] > 0)]
-                    info = {"sum": int(np.sum(label)), "slices": len(slices)}
-                    logger.debug(f"{label_id} => {info}")
-
-                    datastore.update_label_info(label_id, tag, info)
-                    result[label_id] = info
+        for tag, label_id in self._labels(ctx, image_id).items():
+            label = loader(datastore.get_label_uri(label_id, tag))
+            if isinstance(label, torch.Tensor):
+                label = label.numpy()
+            slices = [sid for sid in range(label.shape[0]) if np.sum(label[sid] > 0)]
+            info = {"sum": int(np.sum(label)), "slices": len(slices)}
+            logger.debug(f"{label_id} => {info}")
+            result[tag] = (label_id, info)
         return result
+
+    def save(self, ctx, image_id, result, info):
+        for tag, (label_id, label_info) in result.items():
+            ctx["datastore"].update_label_info(label_id, tag, label_info)
+        ctx["datastore"].update_image_info(image_id, info)
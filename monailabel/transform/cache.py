@@ -10,41 +10,451 @@
 # limitations under the License.
 
 import copy
+import json
 import logging
 import os
 import pathlib
-from typing import Hashable, Sequence, Tuple, Union
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import torch
-from expiring_dict import ExpiringDict
 from monai.config import KeysCollection
 from monai.data import MetaTensor
 from monai.transforms import Transform
 from monai.utils import ensure_tuple
 
+from monailabel.config import settings
 from monailabel.utils.others.generic import md5_digest
-from monailabel.utils.sessions import Sessions
 
 logger = logging.getLogger(__name__)
 
-_cache_path = None
-_data_mem_cache = None
-_data_file_cache = None
+_cache = None
+_cache_lock = threading.Lock()
 
 
-def init_cache():
-    global _cache_path
-    global _data_mem_cache
-    global _data_file_cache
-    if not _cache_path:
-        _cache_path = os.path.join(pathlib.Path.home(), ".cache", "monailabel", "cacheT")
-        _data_mem_cache = ExpiringDict(ttl=600)
-        _data_file_cache = Sessions(store_path=_cache_path, expiry=600)
+def _nbytes(obj) -> int:
+    if torch.is_tensor(obj):
+        return obj.numel() * obj.element_size()
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(v) for v in obj)
+    return 0
 
-    _data_file_cache.remove_expired()
+
+def _view(obj):
+    """
+    Zero-copy view of the cached object; array/tensor storage is shared while meta information is copied so that
+    consumers can update meta/applied operations without modifying the cached entry.
+    Cached arrays/tensors must not be modified in-place.
+    """
+    if isinstance(obj, MetaTensor):
+        return MetaTensor(
+            obj.as_tensor(), meta=dict(obj.meta), applied_operations=copy.deepcopy(obj.applied_operations)
+        )
+    if isinstance(obj, np.ndarray):
+        return obj.view()
+    if torch.is_tensor(obj):
+        return obj.view(obj.shape)
+    if isinstance(obj, dict):
+        return {k: _view(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_view(v) for v in obj]
+    return obj
+
+
+def _copy(obj):
+    """
+    Copy of the object to be cached; so in-place operations on the caller's data after caching don't modify the
+    cached entry.
+    """
+    if isinstance(obj, MetaTensor):
+        return MetaTensor(
+            obj.as_tensor().clone(),
+            meta=copy.deepcopy(dict(obj.meta)),
+            applied_operations=copy.deepcopy(obj.applied_operations),
+        )
+    if isinstance(obj, np.ndarray):
+        return obj.copy()
+    if torch.is_tensor(obj):
+        return obj.clone()
+    if isinstance(obj, dict):
+        return {k: _copy(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_copy(v) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(_copy(v) for v in obj)
+    return copy.deepcopy(obj)
+
+
+def _encode(obj, arrays: List[np.ndarray]):
+    """
+    Encode object into JSON serializable structure; arrays/tensors are collected into ``arrays`` and referenced by
+    index.  Raises TypeError for objects which can't be represented (caller falls back to pickle).
+    """
+    if isinstance(obj, MetaTensor):
+        return {
+            "__metatensor__": _encode(obj.as_tensor(), arrays),
+            "meta": _encode(dict(obj.meta), arrays),
+            "applied_operations": _encode(obj.applied_operations, arrays),
+        }
+    if torch.is_tensor(obj):
+        t = obj.detach().cpu().contiguous()
+        if t.dtype == torch.bfloat16:
+            raise TypeError("bfloat16 tensors are not supported for memory-mapped cache")
+        arrays.append(t.numpy())
+        return {"__tensor__": len(arrays) - 1, "device": str(obj.device)}
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.hasobject:
+            raise TypeError("object arrays are not supported for memory-mapped cache")
+        arrays.append(np.ascontiguousarray(obj))
+        return {"__ndarray__": len(arrays) - 1}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, dict):
+        if not all(isinstance(k, str) for k in obj):
+            raise TypeError("only string keys are supported for memory-mapped cache")
+        return {"__dict__": {k: _encode(v, arrays) for k, v in obj.items()}}
+    if isinstance(obj, tuple):
+        return {"__tuple__": [_encode(v, arrays) for v in obj]}
+    if isinstance(obj, list):
+        return [_encode(v, arrays) for v in obj]
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    raise TypeError(f"unsupported type for memory-mapped cache: {type(obj)}")
+
+
+def _decode(obj, arrays: List[np.ndarray]):
+    if isinstance(obj, list):
+        return [_decode(v, arrays) for v in obj]
+    if not isinstance(obj, dict):
+        return obj
+    if "__metatensor__" in obj:
+        return MetaTensor(
+            _decode(obj["__metatensor__"], arrays),
+            meta=_decode(obj["meta"], arrays),
+            applied_operations=_decode(obj["applied_operations"], arrays),
+        )
+    if "__tensor__" in obj:
+        t = torch.from_numpy(arrays[obj["__tensor__"]])
+        return t.to(torch.device(obj["device"])) if obj["device"] != "cpu" else t
+    if "__ndarray__" in obj:
+        return arrays[obj["__ndarray__"]]
+    if "__tuple__" in obj:
+        return tuple(_decode(v, arrays) for v in obj["__tuple__"])
+    return {k: _decode(v, arrays) for k, v in obj["__dict__"].items()}
+
+
+def file_identity(path: str) -> str:
+    """
+    Identity of file/directory (e.g. DICOM series) content based on size and modification time
+    """
+    if os.path.isdir(path):
+        items = []
+        for f in sorted(os.listdir(path)):
+            s = os.stat(os.path.join(path, f))
+            items.append(f"{f}:{s.st_size}:{s.st_mtime_ns}")
+        return md5_digest("|".join(items))
+
+    s = os.stat(path)
+    return f"{s.st_size}:{s.st_mtime_ns}"
+
+
+def transforms_fingerprint(transforms: Sequence[Any]) -> str:
+    """
+    Fingerprint of transform chain based on transform classes and their (simple) configuration values
+    """
+
+    def _fp(obj, depth=0):
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return repr(obj)
+        if isinstance(obj, (list, tuple)):
+            return "[" + ",".join(_fp(o, depth) for o in obj) + "]"
+        if isinstance(obj, dict):
+            return "{" + ",".join(f"{k}:{_fp(v, depth)}" for k, v in sorted(obj.items(), key=lambda x: str(x[0]))) + "}"
+        if isinstance(obj, (torch.device, torch.dtype, np.dtype)) or isinstance(obj, type):
+            return str(obj)
+
+        name = obj.__class__.__qualname__
+        if depth < 2 and hasattr(obj, "__dict__"):
+            items = {k: v for k, v in vars(obj).items() if not k.startswith("_") and not callable(v)}
+            return f"{name}({_fp(items, depth + 1)})"
+        return name
+
+    return md5_digest(_fp(list(transforms)))
+
+
+class TransformCache:
+    """
+    Two-tier (memory + disk) LRU cache for pre-transform results.
+
+    Memory tier holds objects up to ``mem_budget`` bytes; least recently used entries are spilled to the disk tier
+    (up to ``disk_budget`` bytes) and dropped afterwards.  Objects are copied once on put; reads from the memory tier
+    are zero-copy.  Without disk tier (``disk_budget=0``), ``in_memory=False`` entries are kept in the memory tier.
+
+    Each disk entry is a directory ``{key}/`` with raw array data (``{i}.bin``) and a JSON sidecar (``data.json``)
+    describing dtype/shape of arrays, meta/applied operations and the structure of the cached object.  Arrays are
+    memory-mapped (copy-on-write) on read; so hits don't deserialize the volume and pages are shared by all the
+    processes (e.g. uvicorn workers) reading the same entry.  Entries are written into a temporary directory and
+    renamed in place; the sidecar is written last and readers ignore entries without it.
+    """
+
+    SIDECAR = "data.json"
+
+    def __init__(self, path: str, mem_budget: int, disk_budget: int):
+        self.path = path
+        self.mem_budget = mem_budget
+        self.disk_budget = disk_budget
+
+        self._lock = threading.RLock()
+        self._mem: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()  # key => (obj, bytes, expiry)
+        self._disk: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()  # key => (file, bytes, expiry)
+        self._mem_bytes = 0
+        self._disk_bytes = 0
+        self._stats = {"hits_mem": 0, "hits_disk": 0, "misses": 0, "spills": 0, "evictions": 0}
+        self._scan_disk()
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            e = self._mem.get(key)
+            if e is not None and e[2] >= now:
+                self._mem.move_to_end(key)
+                self._stats["hits_mem"] += 1
+                return _view(e[0])
+            if e is not None:
+                self._pop_mem(key)
+
+            d = self._disk.get(key)
+            if d is None:
+                d = self._get_shared(key)
+            if d is None or d[2] < now:
+                if d is not None:
+                    self._pop_disk(key)
+                self._stats["misses"] += 1
+                return None
+            self._disk.move_to_end(key)
+
+        obj = self._read(d[0])
+        with self._lock:
+            self._stats["hits_disk" if obj is not None else "misses"] += 1
+        return obj
+
+    def put(self, key: str, obj, ttl: int, in_memory: bool = True):
+        nbytes = _nbytes(obj)
+        expiry = time.time() + ttl
+
+        spilled: List[Tuple[str, Any, int, float]] = []
+        with self._lock:
+            self._pop_mem(key)
+            if not self.disk_budget:
+                in_memory = True
+            if in_memory and self.mem_budget and nbytes <= self.mem_budget:
+                self._mem[key] = (_copy(obj), nbytes, expiry)
+                self._mem_bytes += nbytes
+                while self._mem_bytes > self.mem_budget:
+                    k, (o, b, x) = next(iter(self._mem.items()))
+                    self._pop_mem(k)
+                    spilled.append((k, o, b, x))
+            else:
+                spilled.append((key, obj, nbytes, expiry))
+
+        for k, o, b, x in spilled:
+            if k != key:
+                with self._lock:
+                    self._stats["spills"] += 1
+            self._put_disk(k, o, b, x)
+
+    def remove_expired(self):
+        now = time.time()
+        with self._lock:
+            for k in [k for k, e in self._mem.items() if e[2] < now]:
+                self._pop_mem(k)
+            for k in [k for k, e in self._disk.items() if e[2] < now]:
+                self._pop_disk(k)
+
+    def clear(self):
+        with self._lock:
+            for k in list(self._mem.keys()):
+                self._pop_mem(k)
+            for k in list(self._disk.keys()):
+                self._pop_disk(k)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s: Dict[str, Any] = dict(self._stats)
+            total = s["hits_mem"] + s["hits_disk"] + s["misses"]
+            s["hit_ratio"] = round((s["hits_mem"] + s["hits_disk"]) / total, 4) if total else 0
+            s["mem"] = {"entries": len(self._mem), "bytes": self._mem_bytes, "budget": self.mem_budget}
+            s["disk"] = {"entries": len(self._disk), "bytes": self._disk_bytes, "budget": self.disk_budget}
+            return s
+
+    def _pop_mem(self, key):
+        e = self._mem.pop(key, None)
+        if e is not None:
+            self._mem_bytes -= e[1]
+
+    def _pop_disk(self, key):
+        d = self._disk.pop(key, None)
+        if d is not None:
+            self._disk_bytes -= d[1]
+            # open memory maps (in this or other processes) stay valid after unlink
+            shutil.rmtree(d[0], ignore_errors=True)
+
+    def _put_disk(self, key, obj, nbytes, expiry):
+        if not self.disk_budget or nbytes > self.disk_budget:
+            with self._lock:
+                self._stats["evictions"] += 1
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        entry = os.path.join(self.path, key)
+        try:
+            self._write(entry, obj, expiry)
+        except Exception:
+            logger.warning(f"Failed to write cache entry to disk: {entry}", exc_info=True)
+            return
+
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, ("", 0, 0))[1]
+            self._disk[key] = (entry, nbytes, expiry)
+            self._disk_bytes += nbytes
+            self._evict_disk()
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_budget and self._disk:
+            k = next(iter(self._disk.keys()))
+            self._pop_disk(k)
+            self._stats["evictions"] += 1
+
+    def _get_shared(self, key):
+        # entry could have been written by another process sharing the same cache directory
+        if not self.disk_budget:
+            return None
+        entry = os.path.join(self.path, key)
+        sidecar = self._sidecar(entry)
+        if sidecar is None:
+            return None
+
+        d = (entry, sidecar["bytes"], sidecar["expiry"])
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, ("", 0, 0))[1]
+            self._disk[key] = d
+            self._disk_bytes += d[1]
+            self._evict_disk()
+            return self._disk.get(key)
+
+    def _scan_disk(self):
+        # entries are content addressed; so entries left by previous run (or other processes) are valid until expired
+        if not self.disk_budget or not os.path.isdir(self.path):
+            return
+
+        for f in sorted(os.scandir(self.path), key=lambda e: e.stat().st_mtime):
+            if not f.is_dir() or f.name.endswith(".tmp"):
+                continue
+            self._get_shared(f.name)
+        self.remove_expired()
+
+    def _sidecar(self, entry) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(entry, self.SIDECAR)) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, entry, obj, expiry):
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        try:
+            arrays: List[np.ndarray] = []
+            try:
+                sidecar: Dict[str, Any] = {"format": "raw", "data": _encode(obj, arrays)}
+            except TypeError as e:
+                logger.debug(f"Fallback to pickle for cache entry: {entry}; {e}")
+                torch.save(obj, os.path.join(tmp, "data.pt"))
+                sidecar, arrays = {"format": "pt"}, []
+
+            sidecar["arrays"] = []
+            for i, a in enumerate(arrays):
+                a.tofile(os.path.join(tmp, f"{i}.bin"))
+                sidecar["arrays"].append({"dtype": a.dtype.str, "shape": list(a.shape)})
+            sidecar["bytes"] = _nbytes(obj)
+            sidecar["expiry"] = expiry
+
+            with open(os.path.join(tmp, self.SIDECAR), "w") as fp:
+                json.dump(sidecar, fp)
+
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                # same (content addressed) entry is already written by another process
+                if self._sidecar(entry) is None:
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _read(self, entry):
+        try:
+            sidecar = self._sidecar(entry)
+            if sidecar is None:
+                return None
+            if sidecar["format"] == "pt":
+                return torch.load(os.path.join(entry, "data.pt"))
+
+            arrays = []
+            for i, a in enumerate(sidecar["arrays"]):
+                dtype, shape = np.dtype(a["dtype"]), tuple(a["shape"])
+                if not int(np.prod(shape)):
+                    arrays.append(np.empty(shape, dtype=dtype))
+                    continue
+                # copy-on-write mapping; pages are loaded lazily and shared until modified
+                arrays.append(np.memmap(os.path.join(entry, f"{i}.bin"), dtype=dtype, mode="c", shape=shape))
+            return _decode(sidecar["data"], arrays)
+        except Exception:
+            logger.warning(f"Failed to read cache entry from disk: {entry}", exc_info=True)
+            return None
+
+
+def init_cache() -> TransformCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TransformCache(
+                path=os.path.join(pathlib.Path.home(), ".cache", "monailabel", "cacheT"),
+                mem_budget=settings.MONAI_LABEL_TRANSFORM_CACHE_MEM_MB * 1024 * 1024,
+                disk_budget=settings.MONAI_LABEL_TRANSFORM_CACHE_DISK_MB * 1024 * 1024,
+            )
+            if not _cache.disk_budget:
+                logger.warning(
+                    "Transform cache on disk is disabled (MONAI_LABEL_TRANSFORM_CACHE_DISK_MB = 0); "
+                    "entries evicted from memory are dropped and in_memory=False entries are kept in memory"
+                )
+
+    _cache.remove_expired()
+    return _cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    return _cache.stats() if _cache is not None else {}
 
 
 class CacheTransformDatad(Transform):
+    """
+    Cache the result of pre-transforms which run before this transform.
+
+    Cache key is derived from ``hash_key`` values, identity (size/mtime) of the input file(s) and fingerprint of the
+    transform chain (see :meth:`set_transforms`); so stale results are never served once the image is replaced.
+    """
+
     def __init__(
         self,
         keys: KeysCollection,
@@ -58,25 +468,47 @@ class CacheTransformDatad(Transform):
         self.in_memory = in_memory
         self.ttl = ttl
         self.reset_applied_operations_id = reset_applied_operations_id
+        self.fingerprint = ""
 
         # remove previous expired...
-        init_cache()
+        self._cache = init_cache()
 
     def __call__(self, data):
         return self.save(data)
 
+    def set_transforms(self, transforms: Sequence[Any]):
+        """
+        Set the transform chain (which runs before this transform) whose results are cached
+        """
+        self.fingerprint = transforms_fingerprint(transforms)
+
+    def hash_key_prefix(self, d) -> Optional[str]:
+        values = []
+        for k in self.hash_key:
+            v = d.get(k)
+            if not v:
+                return None
+
+            values.append(str(v))
+            if isinstance(v, str) and os.path.exists(v):
+                values.append(file_identity(v))
+        values.append(self.fingerprint)
+        return md5_digest("|".join(values))
+
     def load(self, data):
         d = dict(data)
 
-        hash_key_prefix = md5_digest("".join([d[k] for k in self.hash_key]))
+        hash_key_prefix = self.hash_key_prefix(d)
+        if hash_key_prefix is None:
+            return None
 
         # full dictionary
         if not self.keys:
-            return self._load(f"{hash_key_prefix}")
+            return self._cache.get(f"{hash_key_prefix}")
 
         # set of keys
         for key in self.keys:
-            d[key] = self._load(f"{hash_key_prefix}_{key}")
+            d[key] = self._cache.get(f"{hash_key_prefix}_{key}")
             if d[key] is None:
                 logger.info(f"Ignore; Failed to load {key} from Cache; memory:{self.in_memory}")
                 return None
@@ -90,36 +522,15 @@ class CacheTransformDatad(Transform):
     def save(self, data):
         d = dict(data)
 
-        hash_keys = [d[k] for k in self.hash_key if d.get(k)]
-        hash_key_prefix = md5_digest("".join(hash_keys))
-
-        if len(hash_keys) != len(self.hash_key):
-            logger.warning(f"Ignore caching; Missing hash keys;  Found: {hash_keys}; Expected: {self.hash_key}")
+        hash_key_prefix = self.hash_key_prefix(d)
+        if hash_key_prefix is None:
+            logger.warning(f"Ignore caching; Missing hash keys;  Expected: {self.hash_key}")
             return d
 
         # full dictionary
         if not self.keys:
-            self._save(f"{hash_key_prefix}", d)
+            self._cache.put(f"{hash_key_prefix}", d, self.ttl, self.in_memory)
         else:
             for key in self.keys:
-                self._save(f"{hash_key_prefix}_{key}", d[key])
+                self._cache.put(f"{hash_key_prefix}_{key}", d[key], self.ttl, self.in_memory)
         return d
-
-    def _load(self, hash_key):
-        if self.in_memory:
-            return _data_mem_cache.get(hash_key)
-
-        info = _data_file_cache.get_session(session_id=hash_key)
-        if info and os.path.isfile(info.image):
-            return torch.load(info.image)
-        return None
-
-    def _save(self, hash_key, obj):
-        if self.in_memory:
-            _data_mem_cache.ttl(key=hash_key, value=copy.deepcopy(obj), ttl=self.ttl)
-        else:
-            os.makedirs(_cache_path, exist_ok=True)
-
-            cached_file = os.path.join(_cache_path, f"{hash_key}.tmp")
-            torch.save(obj, cached_file)
-            _data_file_cache.add_session(cached_file, expiry=self.ttl, session_id=hash_key)
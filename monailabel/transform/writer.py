@@ -10,10 +10,17 @@
 # limitations under the License.
 
 import logging
+import os
+import struct
 import tempfile
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import itk
+import nibabel as nib
 import nrrd
 import numpy as np
 import torch
@@ -22,7 +29,12 @@ from monai.data.image_writer import NibabelWriter
 
 from monailabel.utils.others.detection import create_slicer_detection_json
 from monailabel.utils.others.generic import file_ext
-from monailabel.utils.others.pathology import create_asap_annotations_xml, create_dsa_annotations_json
+from monailabel.utils.others.label_codec import encode_sparse_label
+from monailabel.utils.others.pathology import (
+    create_asap_annotations_xml,
+    create_dsa_annotations_json,
+    create_geojson_annotations,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,15 +46,98 @@ def write_nifti(data, filename, affine=None, original_affine=None, output_dtype=
     writer.write(filename)
 
 
+def fortran_blocks(image_np: np.ndarray, dtype=None, block_size: int = 4 << 20) -> List[Callable[[], np.ndarray]]:
+    """
+    Split array into slabs (along the last axis) of ~block_size bytes; each slab when called returns its data in
+    Fortran order (first index fastest) as expected by NIfTI/NRRD.  No copy is made for Fortran ordered arrays of
+    the same dtype; otherwise only one slab at a time is converted (instead of transposing the whole volume).
+    """
+    dtype = np.dtype(dtype) if dtype else image_np.dtype
+    if image_np.ndim < 2:
+        return [lambda: np.ascontiguousarray(image_np, dtype=dtype)]
+
+    plane = int(np.prod(image_np.shape[:-1])) * dtype.itemsize
+    step = max(1, block_size // max(plane, 1))
+
+    def _block(lo, hi):
+        return lambda: np.asfortranarray(image_np[..., lo:hi], dtype=dtype).ravel(order="F")
+
+    return [_block(i, i + step) for i in range(0, image_np.shape[-1], step)]
+
+
+def write_gzip(fp, blocks: Sequence[Callable[[], Any]], level: int = 1, threads: int = 0) -> None:
+    """
+    Write a (single member) gzip stream by deflating blocks in parallel and concatenating them (same as pigz).
+    Every block except the last one ends with a sync flush, so the result is readable by any gzip/zlib reader.
+
+    :param fp: binary file object to write into
+    :param blocks: callables returning the (uncompressed) buffer of each block in order
+    :param level: compression level (0-9)
+    :param threads: number of compression threads (0 = number of cpus, max 8)
+    """
+    threads = threads if threads > 0 else min(8, os.cpu_count() or 1)
+    blocks = blocks if blocks else [lambda: b""]
+
+    def _deflate(idx):
+        raw = blocks[idx]()
+        c = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        return raw, c.compress(raw) + c.flush(zlib.Z_FINISH if idx == len(blocks) - 1 else zlib.Z_SYNC_FLUSH)
+
+    fp.write(b"\x1f\x8b\x08\x00" + struct.pack("<I", int(time.time())) + b"\x00\xff")
+    crc, size = 0, 0
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="GZIP") as executor:
+        # bounded look-ahead; keeps at most 2 x threads blocks in memory
+        pending = deque(executor.submit(_deflate, i) for i in range(min(len(blocks), 2 * threads)))
+        submitted = len(pending)
+        while pending:
+            raw, out = pending.popleft().result()
+            if submitted < len(blocks):
+                pending.append(executor.submit(_deflate, submitted))
+                submitted += 1
+            crc, size = zlib.crc32(raw, crc), size + memoryview(raw).nbytes
+            fp.write(out)
+    fp.write(struct.pack("<II", crc & 0xFFFFFFFF, size & 0xFFFFFFFF))
+
+
+def write_nifti_fast(image_np, output_file, affine, dtype=None, compress_level: int = 1, threads: int = 0) -> None:
+    """
+    Write NIfTI (.nii or .nii.gz) without transposing/copying the whole volume; .nii.gz is compressed in parallel.
+    Use compress_level = 0 to write an uncompressed .nii file.
+    """
+    if isinstance(image_np, torch.Tensor):
+        image_np = image_np.cpu().numpy()
+    if isinstance(affine, torch.Tensor):
+        affine = affine.cpu().numpy()
+    dtype = np.dtype(dtype) if dtype else image_np.dtype
+    dtype = np.dtype(np.uint8) if dtype == bool else dtype
+    affine = np.eye(4) if affine is None else np.asarray(affine, dtype=np.float64)
+
+    header = nib.Nifti1Header()
+    header.set_data_shape(image_np.shape)
+    header.set_data_dtype(dtype)
+    header.set_qform(affine, code=1)
+    header.set_sform(affine, code=1)
+    header.set_xyzt_units("mm")
+    header["vox_offset"] = 352
+
+    blocks = [lambda: header.binaryblock + b"\x00" * 4] + fortran_blocks(image_np, dtype)
+    with open(output_file, "wb") as fp:
+        if output_file.endswith(".gz"):
+            write_gzip(fp, blocks, compress_level, threads)
+        else:
+            for block in blocks:
+                fp.write(block())
+
+
 def write_itk(image_np, output_file, affine, dtype, compress):
     if isinstance(image_np, torch.Tensor):
         image_np = image_np.numpy()
     if isinstance(affine, torch.Tensor):
         affine = affine.numpy()
     if len(image_np.shape) >= 2:
-        image_np = image_np.transpose().copy()
-    if dtype:
-        image_np = image_np.astype(dtype)
+        image_np = image_np.transpose()
+    # single copy (only if needed) for both dtype conversion and C-order layout expected by ITK
+    image_np = np.ascontiguousarray(image_np, dtype=dtype if dtype else image_np.dtype)
 
     result_image = itk.image_from_array(image_np)
     logger.debug(f"ITK Image size: {itk.size(result_image)}")
@@ -74,6 +169,46 @@ def write_itk(image_np, output_file, affine, dtype, compress):
     itk.imwrite(result_image, output_file, compress)
 
 
+_NRRD_TYPES = {
+    "i1": "int8",
+    "u1": "uint8",
+    "i2": "int16",
+    "u2": "uint16",
+    "i4": "int32",
+    "u4": "uint32",
+    "i8": "int64",
+    "u8": "uint64",
+    "f4": "float",
+    "f8": "double",
+}
+
+
+def seg_nrrd_header(image_np: np.ndarray, header: Dict[str, Any]) -> bytes:
+    """
+    NRRD header for image_np stored in Fortran order (fields as written by :func:`write_seg_nrrd`).
+    Uses public pynrrd formatters only; data can then be appended in any way (e.g. :func:`write_gzip`).
+    """
+    lines = [
+        "NRRD0005",
+        "# Complete NRRD file format specification at:",
+        "# http://teem.sourceforge.net/nrrd/format.html",
+        f"type: {_NRRD_TYPES[image_np.dtype.str[1:]]}",
+        f"dimension: {image_np.ndim}",
+        f"space: {header['space']}",
+        f"sizes: {nrrd.format_number_list(np.array(image_np.shape))}",
+        f"space directions: {nrrd.format_optional_matrix(header['space directions'])}",
+        f"kinds: {' '.join(header['kinds'])}",
+    ]
+    if image_np.dtype.itemsize > 1:
+        lines.append(f"endian: {'big' if image_np.dtype.str[0] == '>' else 'little'}")
+    lines.append(f"encoding: {header['encoding']}")
+    lines.append(f"space origin: {nrrd.format_vector(header['space origin'])}")
+
+    standard = {"space", "space directions", "kinds", "encoding", "space origin"}
+    lines.extend(f"{k}:={v}" for k, v in header.items() if k not in standard)
+    return ("\n".join(lines) + "\n\n").encode("ascii")
+
+
 def write_seg_nrrd(
     image_np: np.ndarray,
     output_file: str,
@@ -83,6 +218,8 @@ def write_seg_nrrd(
     color_map: Optional[Dict[str, List[float]]] = None,
     index_order: str = "C",
     space: str = "left-posterior-superior",
+    compression_level: int = 9,
+    threads: int = 1,
 ) -> None:
     """Write multi-channel seg.nrrd file.
 
@@ -94,6 +231,8 @@ def write_seg_nrrd(
         labels: Labels of image segment which will be written to the nrrd header
         color_map: Mapping from segment_name(str) to it's color e.g. {'heart': [255/255, 244/255, 209/255]}
         index_order: Either 'C' or 'F' (see nrrd.write() documentation)
+        compression_level: gzip compression level; 0 to write raw (uncompressed) data
+        threads: number of threads for gzip compression (0 = number of cpus); more than 1 uses :func:`write_gzip`
 
     Raises:
         ValueError: In case affine is not provided
@@ -103,9 +242,8 @@ def write_seg_nrrd(
         image_np = image_np.numpy()
     if isinstance(affine, torch.Tensor):
         affine = affine.numpy()
-    image_np = image_np.transpose().copy()
     if dtype:
-        image_np = image_np.astype(dtype)
+        image_np = image_np.astype(dtype, copy=False)
 
     if not isinstance(labels, Iterable):
         raise ValueError("Labels have to be defined, e.g. as a list")
@@ -147,13 +285,24 @@ def write_seg_nrrd(
             "space directions": space_directions,
             "space origin": origin,
             "space": space,
+            "encoding": "gzip" if compression_level else "raw",
         }
     )
+
+    if compression_level and threads != 1 and index_order == "C":
+        # pynrrd (pinned) compresses in a single thread; write the same header and deflate data blocks in parallel
+        with open(output_file, "wb") as fp:
+            fp.write(seg_nrrd_header(image_np, header))
+            write_gzip(fp, fortran_blocks(image_np), compression_level, threads)
+        return
+
+    # transposed view (no copy); C order of the transposed view == Fortran order of image_np
     nrrd.write(
         output_file,
-        image_np,
+        image_np.transpose(),
         header=header,
         index_order=index_order,
+        compression_level=compression_level if compression_level else 9,
     )
 
 
@@ -167,9 +316,27 @@ class Writer:
         key_dtype="result_dtype",
         key_compress="result_compress",
         key_write_to_file="result_write_to_file",
+        key_sparse="result_sparse",
+        key_sparse_delta="result_sparse_delta",
+        key_fast="result_fast",
+        key_compress_level="result_compress_level",
+        key_output_dir="result_output_dir",
         meta_key_postfix="meta_dict",
         nibabel=False,
+        fast=False,
+        compress_level=1,
+        threads=0,
+        output_dir=None,
     ):
+        """
+        :param key_sparse: request key to return the label as cropped bbox + RLE/bit-packed data (``label_sparse``)
+            in result json; label file is written only if ``save_label`` is requested
+        :param fast: high-throughput mode; write NIfTI/seg.nrrd without transposing the whole volume and use
+            multi-threaded gzip (see :func:`write_gzip`)
+        :param compress_level: gzip compression level in fast mode; 0 writes uncompressed output (e.g. .nii)
+        :param threads: number of compression threads in fast mode (0 = number of cpus)
+        :param output_dir: directory for the result files (e.g. tmpfs like /dev/shm for local clients)
+        """
         self.label = label
         self.json = json
         self.ref_image = ref_image if ref_image else label
@@ -179,26 +346,43 @@ class Writer:
         self.key_dtype = key_dtype
         self.key_compress = key_compress
         self.key_write_to_file = key_write_to_file
+        self.key_sparse = key_sparse
+        self.key_sparse_delta = key_sparse_delta
+        self.key_fast = key_fast
+        self.key_compress_level = key_compress_level
+        self.key_output_dir = key_output_dir
         self.meta_key_postfix = meta_key_postfix
         self.nibabel = nibabel
+        self.fast = fast
+        self.compress_level = compress_level
+        self.threads = threads
+        self.output_dir = output_dir
 
     def __call__(self, data) -> Tuple[Any, Any]:
         logger.setLevel(data.get("logging", "INFO").upper())
+        start = time.time()
 
         path = data.get("image_path")
         ext = file_ext(path) if path else None
         dtype = data.get(self.key_dtype, None)
         compress = data.get(self.key_compress, False)
         write_to_file = data.get(self.key_write_to_file, True)
+        fast = data.get(self.key_fast, self.fast)
+        compress_level = data.get(self.key_compress_level, self.compress_level)
+        output_dir = data.get(self.key_output_dir, self.output_dir)
 
         ext = data.get(self.key_extension) if data.get(self.key_extension) else ext
         write_to_file = write_to_file if ext else False
-        logger.info(f"Result ext: {ext}; write_to_file: {write_to_file}; dtype: {dtype}")
+        if fast and not compress_level and ext and ext.lower() == ".nii.gz":
+            ext = ".nii"
+        logger.info(f"Result ext: {ext}; write_to_file: {write_to_file}; dtype: {dtype}; fast: {fast}")
 
         if isinstance(data[self.label], MetaTensor):
             image_np = data[self.label].array
         else:
             image_np = data[self.label]
+        if fast and isinstance(image_np, torch.Tensor):
+            image_np = image_np.cpu().numpy()
 
         # Always using Restored as the last transform before writing
         meta_dict = data.get(f"{self.ref_image}_{self.meta_key_postfix}")
@@ -210,8 +394,21 @@ class Writer:
 
         output_file = None
         output_json = data.get(self.json, {})
+        latencies = {"prepare": time.time() - start}
+        data["write_latencies"] = latencies
+        if data.get(self.key_sparse) and not self.is_multichannel_image(image_np):
+            start = time.time()
+            output_json = dict(output_json) if output_json else {}
+            output_json["label_sparse"] = self.write_sparse(data, image_np)
+            latencies["sparse"] = time.time() - start
+
+            # label file is still needed to save the result into datastore
+            if not data.get("save_label"):
+                return None, output_json
+
         if write_to_file:
-            output_file = tempfile.NamedTemporaryFile(suffix=ext).name
+            start = time.time()
+            output_file = tempfile.NamedTemporaryFile(suffix=ext, dir=output_dir if output_dir else None).name
             logger.debug(f"Saving Image to: {output_file}")
 
             if self.is_multichannel_image(image_np):
@@ -223,18 +420,54 @@ class Writer:
                 labels = data.get("labels")
                 color_map = data.get("color_map")
                 logger.debug("Using write_seg_nrrd...")
-                write_seg_nrrd(image_np, output_file, dtype, affine, labels, color_map)
+                if fast:
+                    kwargs = {"compression_level": compress_level, "threads": self.threads}
+                    write_seg_nrrd(image_np, output_file, dtype, affine, labels, color_map, **kwargs)
+                else:
+                    write_seg_nrrd(image_np, output_file, dtype, affine, labels, color_map)
+            elif fast and len(image_np.shape) == 3 and ext and ext.lower() in [".nii", ".nii.gz"]:
+                logger.debug("Using write_nifti_fast...")
+                write_nifti_fast(image_np, output_file, affine, dtype, compress_level, self.threads)
             # Issue with slicer:: https://discourse.itk.org/t/saving-non-orthogonal-volume-in-nifti-format/2760/22
             elif self.nibabel and ext and ext.lower() in [".nii", ".nii.gz"]:
                 logger.debug("Using MONAI write_nifti...")
                 write_nifti(image_np, output_file, affine=affine, output_dtype=dtype)
             else:
                 write_itk(image_np, output_file, affine if len(image_np.shape) > 2 else None, dtype, compress)
+            latencies["file"] = time.time() - start
         else:
             output_file = image_np
 
         return output_file, output_json
 
+    def write_sparse(self, data, image_np) -> Dict[str, Any]:
+        """
+        Encode label as cropped bounding box + RLE/bit-packed data (see :func:`encode_sparse_label`).
+
+        If delta is requested and the request belongs to a session, label is encoded against the previous result of
+        the same model in that session (kept in the session folder).
+        """
+        if isinstance(image_np, torch.Tensor):
+            image_np = image_np.cpu().numpy()
+        dtype = data.get(self.key_dtype)
+        image_np = image_np.astype(dtype) if dtype else image_np
+
+        session = data.get("session")
+        prev_file = None
+        if data.get(self.key_sparse_delta) and session and session.get("path"):
+            prev_file = os.path.join(session["path"], f"label_{data.get('model', 'model')}.npy")
+
+        prev = np.load(prev_file) if prev_file and os.path.exists(prev_file) else None
+        result = encode_sparse_label(image_np, prev=prev)
+        if prev_file:
+            np.save(prev_file, image_np)
+
+        logger.info(
+            f"Sparse Label: {result['encoding']}; delta: {result['delta']}; bbox: {result['bbox']}; "
+            f"size: {len(result['data'])}"
+        )
+        return result
+
     def is_multichannel_image(self, image_np: np.ndarray) -> bool:
         """Check if the provided image contains multiple channels
 
@@ -312,6 +545,9 @@ class PolygonWriter:
         elif output == "dsa":
             logger.info("+++ Generating DSA JSON Annotation")
             output_file, _ = create_dsa_annotations_json(res_json, loglevel=loglevel)
+        elif output == "geojson":
+            logger.info("+++ Generating GeoJSON Annotation")
+            output_file, _ = create_geojson_annotations(res_json, loglevel=loglevel)
         else:
             logger.info("+++ Return Default JSON Annotation")
 
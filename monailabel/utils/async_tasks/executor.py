@@ -0,0 +1,112 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+from monailabel.config import settings
+
+logger = logging.getLogger(__name__)
+
+endpoint_executors: Dict[str, "BoundedExecutor"] = {}
+_lock = threading.Lock()
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded wait queue to run blocking (CPU/GPU/IO heavy) work off the asyncio event loop.
+
+    When all workers are busy and the wait queue is full, new requests are rejected with HTTP 429 (Too Many Requests)
+    instead of piling up behind the running ones.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix=f"API-{name.upper()}")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def pending(self) -> int:
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "queue": self.max_queue,
+            "running": min(self._pending, self.max_workers),
+            "waiting": max(0, self._pending - self.max_workers),
+        }
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                logger.warning(f"{self.name.capitalize()} executor is saturated; pending: {self._pending}")
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Server is busy; {self._pending} {self.name} request(s) are already pending",
+                    headers={"Retry-After": "1", "X-Queue-Position": str(self._pending - self.max_workers + 1)},
+                )
+
+            position = self._pending - self.max_workers + 1
+            self._pending += 1
+
+        if position > 0:
+            logger.info(f"{self.name.capitalize()} request is queued at position: {position}")
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def endpoint_executor(name: str) -> BoundedExecutor:
+    """
+    Get (or create) the shared executor for given type of endpoints (e.g. infer, wsi, datastore)
+    """
+    with _lock:
+        executor = endpoint_executors.get(name)
+        if executor is None:
+            if name == "infer":
+                max_workers = settings.MONAI_LABEL_ENDPOINT_INFER_WORKERS
+                max_queue = settings.MONAI_LABEL_ENDPOINT_INFER_QUEUE
+            elif name == "wsi":
+                # WSI jobs run for minutes; keep them from blocking interactive inference
+                max_workers = settings.MONAI_LABEL_ENDPOINT_WSI_WORKERS
+                max_queue = settings.MONAI_LABEL_ENDPOINT_WSI_QUEUE
+            else:
+                max_workers = settings.MONAI_LABEL_ENDPOINT_WORKERS
+                max_queue = settings.MONAI_LABEL_ENDPOINT_QUEUE
+
+            logger.info(f"Create Endpoint Executor: {name}; Max Workers: {max_workers}; Max Queue: {max_queue}")
+            executor = BoundedExecutor(name, max_workers, max_queue)
+            endpoint_executors[name] = executor
+        return executor
+
+
+async def run_in_executor(name: str, fn: Callable, *args, **kwargs):
+    """
+    Run blocking function on the shared executor for given type of endpoints
+    """
+    return await endpoint_executor(name).run(fn, *args, **kwargs)
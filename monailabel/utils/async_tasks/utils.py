@@ -16,6 +16,7 @@ import os.path
 import random
 import subprocess
 import sys
+import time
 import uuid
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor
@@ -30,6 +31,56 @@ background_tasks: Dict = {}
 background_processes: Dict = {}
 background_executors: Dict = {}
 
+PROGRESS_MARKER = "TASK-PROGRESS:: "
+
+
+class TaskProgress:
+    """
+    Track progress of a long running (background) task.  Progress is logged (at most once every ``interval`` secs)
+    as a json line; the parent process picks it up from the task output and exposes it in the task status.
+    """
+
+    def __init__(self, name: str, total: int, interval: float = 2.0):
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.start = time.time()
+        self._logged = 0.0
+
+    def update(self, n: int = 1, **kwargs) -> Dict:
+        self.done += n
+        progress = self.status(**kwargs)
+        if self.done >= self.total or time.time() - self._logged >= self.interval:
+            self._logged = time.time()
+            logger.info(f"{PROGRESS_MARKER}{json.dumps(progress)}")
+        return progress
+
+    def status(self, **kwargs) -> Dict:
+        elapsed = time.time() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0
+        remaining = max(0, self.total - self.done)
+        eta = round(remaining / rate, 3) if remaining and rate else 0 if not remaining else None
+        return {
+            "name": self.name,
+            "done": self.done,
+            "total": self.total,
+            "percent": round(100.0 * self.done / self.total, 2) if self.total else 100.0,
+            "elapsed": round(elapsed, 3),
+            "eta": eta,
+            **kwargs,
+        }
+
+
+def _parse_progress(line: str):
+    idx = line.find(PROGRESS_MARKER)
+    if idx < 0:
+        return None
+    try:
+        return json.loads(line[idx + len(PROGRESS_MARKER) :])
+    except ValueError:
+        return None
+
 
 def _task_func(task, method, callback=None):
     request = task["request"]
@@ -79,6 +130,9 @@ def _task_func(task, method, callback=None):
         if line:
             plogger.info(line)
             task["details"].append(line)
+            progress = _parse_progress(line)
+            if progress:
+                task["progress"] = progress
 
     logger.info(f"Return code: {process.returncode}")
     background_processes[method].pop(task_id, None)
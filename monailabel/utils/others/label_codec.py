@@ -0,0 +1,131 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import logging
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPARSE_FORMAT = "monailabel-sparse"
+SPARSE_VERSION = 1
+
+
+def _bbox(mask: np.ndarray) -> Optional[Tuple[slice, ...]]:
+    if not mask.any():
+        return None
+
+    box = []
+    for axis in range(mask.ndim):
+        nz = np.flatnonzero(mask.any(axis=tuple(a for a in range(mask.ndim) if a != axis)))
+        box.append(slice(int(nz[0]), int(nz[-1]) + 1))
+    return tuple(box)
+
+
+def _rle(crop: np.ndarray) -> bytes:
+    flat = crop.ravel()
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.append(starts, flat.size)).astype(np.uint32)
+    return flat[starts].tobytes() + lengths.tobytes()
+
+
+def encode_sparse_label(
+    label: np.ndarray, prev: Optional[np.ndarray] = None, encoding: str = "auto", level: int = 6
+) -> Dict[str, Any]:
+    """
+    Encode label into compact (JSON serializable) form: bounding box of the label (or of the voxels that differ
+    from ``prev`` for a delta) plus run-length or bit-packed encoding of the cropped region.
+
+    :param label: label array (single channel)
+    :param prev: previous label (same shape) to encode the delta against; client applies the crop over prev
+    :param encoding: rle, bitpack (binary crop only) or auto (smaller of the two)
+    :param level: zlib compression level for the encoded bytes
+    :return: sparse label; see :func:`decode_sparse_label`
+    """
+    label = np.asarray(label)
+    delta = prev is not None and tuple(prev.shape) == tuple(label.shape)
+    box = _bbox(label != prev if delta else label != 0)
+
+    result: Dict[str, Any] = {
+        "format": SPARSE_FORMAT,
+        "version": SPARSE_VERSION,
+        "shape": list(label.shape),
+        "dtype": label.dtype.str,
+        "delta": delta,
+        "bbox": [[b.start, b.stop] for b in box] if box else None,
+        "encoding": None,
+        "data": "",
+    }
+    if box is None:
+        return result
+
+    crop = np.ascontiguousarray(label[box])
+    candidates = {}
+    if encoding in ("auto", "rle"):
+        candidates["rle"] = (_rle(crop), {})
+
+    values = np.unique(crop)
+    if encoding in ("auto", "bitpack") and (len(values) == 1 or (len(values) == 2 and values[0] == 0)):
+        value = values[-1].item()
+        candidates["bitpack"] = (np.packbits(crop != 0).tobytes(), {"value": value})
+    if not candidates:
+        raise ValueError(f"Encoding '{encoding}' is not supported for label values: {values.tolist()}")
+
+    name = min(candidates, key=lambda k: len(candidates[k][0]))
+    payload, extra = candidates[name]
+    result.update(extra)
+    result["encoding"] = name
+    result["data"] = base64.b64encode(zlib.compress(payload, level)).decode("ascii")
+    return result
+
+
+def decode_sparse_label(sparse: Dict[str, Any], prev: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Decode label encoded by :func:`encode_sparse_label`
+
+    :param sparse: sparse label
+    :param prev: previous label (required if sparse label is a delta)
+    :return: dense label array
+    """
+    if sparse.get("format") != SPARSE_FORMAT:
+        raise ValueError(f"Not a sparse label: {sparse.get('format')}")
+
+    dtype = np.dtype(sparse["dtype"])
+    shape = tuple(sparse["shape"])
+    if sparse["delta"]:
+        if prev is None or tuple(prev.shape) != shape:
+            raise ValueError("Previous label (with same shape) is required to apply delta")
+        label = np.array(prev, dtype=dtype, copy=True)
+    else:
+        label = np.zeros(shape, dtype=dtype)
+
+    if not sparse["bbox"]:
+        return label
+
+    box = tuple(slice(b[0], b[1]) for b in sparse["bbox"])
+    crop_shape = tuple(b[1] - b[0] for b in sparse["bbox"])
+    size = int(np.prod(crop_shape))
+    payload = zlib.decompress(base64.b64decode(sparse["data"]))
+
+    if sparse["encoding"] == "bitpack":
+        bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=size).astype(bool)
+        crop = np.where(bits, np.array(sparse["value"], dtype=dtype), np.zeros((), dtype=dtype))
+    else:
+        runs = len(payload) // (dtype.itemsize + 4)
+        values = np.frombuffer(payload, dtype=dtype, count=runs)
+        lengths = np.frombuffer(payload, dtype=np.uint32, offset=runs * dtype.itemsize)
+        crop = np.repeat(values, lengths)
+
+    label[box] = crop.reshape(crop_shape)
+    return label
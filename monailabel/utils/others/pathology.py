@@ -11,145 +11,286 @@
 
 import json
 import logging
+import os
+import shutil
 import tempfile
+import threading
+from abc import ABCMeta, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
 
 from monailabel.utils.others.label_colors import to_hex, to_rgb
 
 logger = logging.getLogger(__name__)
 
 
-def create_dsa_annotations_json(json_data, loglevel="INFO"):
-    logger.setLevel(loglevel.upper())
+def format_rows(template: str, *columns: np.ndarray) -> np.ndarray:
+    """
+    Format rows of coordinates (vectorized; no per-point python objects)
 
-    total_count = 0
-    label_json = tempfile.NamedTemporaryFile(suffix=".json").name
-    with open(label_json, "w") as fp:
-        fp.write("{\n")
-        fp.write(' "name": "{}",\n'.format(json_data["name"]))
-        fp.write(' "elements": [\n')
+    :param template: row template with ``{}`` placeholder for each column; e.g. ``"[{}, {}]"``
+    :param columns: 1D arrays (of same length) to fill the placeholders
+    :return: array of formatted rows
+    """
+    parts = template.split("{}")
+    if not len(columns[0]):
+        return np.array([], dtype=str)
+    rows = np.char.add(parts[0], np.char.mod("%s", columns[0]))
+    for part, column in zip(parts[1:], columns[1:]):
+        rows = np.char.add(np.char.add(rows, part), np.char.mod("%s", column))
+    return np.char.add(rows, parts[-1])
 
-        for tid, res in enumerate(json_data["annotations"]):
-            logger.debug(f"Adding annotations for tile: {tid}")
-            if not res:
-                continue
 
-            annotation = res.get("annotation")
+class AnnotationWriter(metaclass=ABCMeta):
+    """
+    Streaming writer of WSI annotations.
+
+    Tile results are added (in any order) as soon as they are available; their polygons are appended to the output
+    file and can be dropped by the caller, so memory does not grow with the number of tiles.  :meth:`snapshot`
+    provides a valid copy of the partial output while tiles are still running.  Polygon coordinates are encoded using
+    numpy (no per-point python lists/strings).
+    """
+
+    suffix = ""
+
+    def __init__(self, json_data: Dict[str, Any], loglevel="INFO", total: int = 0):
+        logger.setLevel(loglevel.upper())
+
+        self.json_data = json_data
+        self.total = total
+        self.tiles = 0
+        self.count = 0
+        self.labels: Dict[str, Any] = {}
+        self.path = tempfile.NamedTemporaryFile(suffix=self.suffix).name
+
+        self._lock = threading.Lock()
+        self._fp = open(self.path, "w")
+        self._fp.write(self.header())
+
+    @abstractmethod
+    def header(self) -> str:
+        pass
+
+    @abstractmethod
+    def element(self, label: str, color, points: np.ndarray) -> str:
+        """
+        :param label: label name
+        :param color: RGB color of the label (None if not defined)
+        :param points: (N, 2) array of polygon coordinates
+        """
+        pass
+
+    @abstractmethod
+    def footer(self, latencies=None) -> str:
+        pass
+
+    def add(self, res: Optional[Dict[str, Any]], tile: bool = True) -> int:
+        """
+        Write polygons of a tile result (json of the infer task)
+
+        :param tile: count as a finished tile (False for extra polygons, e.g. merged across tile seams)
+        :return: number of polygons written
+        """
+        annotation = res.get("annotation") if res else None
+        with self._lock:
+            self.tiles += int(tile)
             if not annotation:
-                continue
+                return 0
 
-            color_map = annotation.get("labels")
-            elements = annotation.get("elements", [])
-            for element in elements:
+            count = self.count
+            color_map = annotation.get("labels") or {}
+            for element in annotation.get("elements", []):
                 label = element["label"]
-                color = to_rgb(color_map.get(label))
-
+                color = color_map.get(label)
+                self.labels[label] = color
                 logger.info(f"Adding Contours for label: {label}; color: {color}; color_map: {color_map}")
 
-                contours = element["contours"]
-                for contour in contours:
-                    points = []
-                    for point in contour:
-                        points.append([point[0], point[1], 0])
-
-                    if total_count > 0:
-                        fp.write(",\n")
-
-                    annotation_style = {
-                        "group": label,
-                        "type": "polyline",
-                        "lineColor": color,
-                        "lineWidth": 2.0,
-                        "closed": True,
-                        "points": points,
-                        "label": {"value": label},
-                    }
-                    fp.write(f"  {json.dumps(annotation_style)}")
-                    total_count += 1
-
-        fp.write(" ],\n")  # close elements
-        fp.write(
-            ' "description": {}\n'.format(
-                json.dumps(
-                    json.dumps(
-                        {
-                            "model": json_data.get("model"),
-                            "desc": json_data.get("description"),
-                            "location": json_data.get("location"),
-                            "size": json_data.get("size"),
-                            "count": total_count,
-                            "latencies": json_data.get("latencies"),
-                        }
-                    )
-                )
-            )
+                for contour in element["contours"]:
+                    self._fp.write(self.element(label, color, np.asarray(contour).reshape(-1, 2)))
+                    self.count += 1
+            return self.count - count
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"tiles": self.tiles, "total": self.total, "count": self.count}
+
+    def snapshot(self) -> str:
+        """
+        Copy of the output written so far (as a complete/valid document); the caller owns (and removes) the file
+        """
+        path = tempfile.NamedTemporaryFile(suffix=self.suffix).name
+        with self._lock:
+            self._fp.flush()
+            shutil.copyfile(self.path, path)
+            footer = self.footer(self.json_data.get("latencies"))
+        with open(path, "a") as fp:
+            fp.write(footer)
+        return path
+
+    def close(self, latencies=None) -> Tuple[str, int]:
+        with self._lock:
+            self._fp.write(self.footer(latencies))
+            self._fp.close()
+        logger.info(f"Total Annotations: {self.count}")
+        return self.path, self.count
+
+    def abort(self) -> None:
+        with self._lock:
+            self._fp.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _separator(self) -> str:
+        return ",\n" if self.count else ""
+
+    def _description(self, latencies=None) -> Dict[str, Any]:
+        return {
+            "model": self.json_data.get("model"),
+            "desc": self.json_data.get("description"),
+            "location": self.json_data.get("location"),
+            "size": self.json_data.get("size"),
+            "count": self.count,
+            "latencies": latencies,
+        }
+
+
+class DSAAnnotationWriter(AnnotationWriter):
+    suffix = ".json"
+
+    def header(self) -> str:
+        return "{\n" + ' "name": "{}",\n'.format(self.json_data["name"]) + ' "elements": [\n'
+
+    def element(self, label, color, points) -> str:
+        annotation_style = {
+            "group": label,
+            "type": "polyline",
+            "lineColor": to_rgb(color),
+            "lineWidth": 2.0,
+            "closed": True,
+            "points": [],
+            "label": {"value": label},
+        }
+        coords = (
+            "[" + ", ".join(format_rows("[{}, {}, {}]", points[:, 0], points[:, 1], np.zeros_like(points[:, 0]))) + "]"
         )
-        fp.write("}")  # end of root
+        return f"{self._separator()}  " + json.dumps(annotation_style).replace('"points": []', f'"points": {coords}', 1)
 
-    logger.info(f"Total Elements: {total_count}")
-    return label_json, total_count
+    def footer(self, latencies=None) -> str:
+        return " ],\n" + ' "description": {}\n'.format(json.dumps(json.dumps(self._description(latencies)))) + "}"
 
 
-def create_asap_annotations_xml(json_data, loglevel="INFO"):
-    logger.setLevel(loglevel.upper())
-
-    total_count = 0
-    label_xml = tempfile.NamedTemporaryFile(suffix=".xml").name
-
-    name = json_data["name"]
-    description = json_data["description"]
-    model = json_data["model"]
-    location = json_data.get("location", (0, 0, 0, 0))
-    location = location if location else (0, 0, 0, 0)
-    size = json_data.get("size", (0, 0))
-    size = size if size else (0, 0)
-
-    with open(label_xml, "w") as fp:
-        fp.write('<?xml version="1.0"?>\n')
-        fp.write("<ASAP_Annotations>\n")
-        fp.write(
-            '  <Annotations Name="{}" Description="{}" Model="{}" X="{}" Y="{}" W="{}" H="{}">\n'.format(
-                name, description, model, location[0], location[1], size[0], size[1]
+class ASAPAnnotationWriter(AnnotationWriter):
+    suffix = ".xml"
+    COORDINATE = '        <Coordinate Order="{}" X="{}" Y="{}" />\n'
+
+    def header(self) -> str:
+        location = self.json_data.get("location", (0, 0, 0, 0))
+        location = location if location else (0, 0, 0, 0)
+        size = self.json_data.get("size", (0, 0))
+        size = size if size else (0, 0)
+
+        return (
+            '<?xml version="1.0"?>\n'
+            + "<ASAP_Annotations>\n"
+            + '  <Annotations Name="{}" Description="{}" Model="{}" X="{}" Y="{}" W="{}" H="{}">\n'.format(
+                self.json_data["name"],
+                self.json_data["description"],
+                self.json_data["model"],
+                location[0],
+                location[1],
+                size[0],
+                size[1],
             )
         )
 
-        labels = {}
+    def element(self, label, color, points) -> str:
+        return (
+            f'    <Annotation Name="{label}" Type="Polygon" PartOfGroup="{label}" Color="{to_hex(color)}">\n'
+            + "      <Coordinates>\n"
+            + "".join(format_rows(self.COORDINATE, np.arange(len(points)), points[:, 0], points[:, 1]))
+            + "      </Coordinates>\n"
+            + "    </Annotation>\n"
+        )
+
+    def footer(self, latencies=None) -> str:
+        groups = "".join(
+            f'    <Group Name="{label}" PartOfGroup="None" Color="{to_hex(color)}">\n'
+            + "      <Attributes />\n"
+            + "    </Group>\n"
+            for label, color in self.labels.items()
+        )
+        return "  </Annotations>\n" + "  <AnnotationGroups>\n" + groups + "  </AnnotationGroups>\n</ASAP_Annotations>\n"
+
+
+class GeoJSONAnnotationWriter(AnnotationWriter):
+    """
+    GeoJSON FeatureCollection of polygons (e.g. to import in QuPath); classification is stored in feature properties
+    """
+
+    suffix = ".geojson"
+
+    def header(self) -> str:
+        name = json.dumps(self.json_data["name"])
+        return '{"type": "FeatureCollection", ' + f'"name": {name}, "features": [\n'
+
+    def element(self, label, color, points) -> str:
+        if len(points) and np.any(points[0] != points[-1]):
+            points = np.concatenate((points, points[:1]))
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [[]]},
+            "properties": {
+                "objectType": "annotation",
+                "classification": {"name": label, "color": list(color) if color else [0, 0, 0]},
+            },
+        }
+        coords = "[" + ", ".join(format_rows("[{}, {}]", points[:, 0], points[:, 1])) + "]"
+        return f"{self._separator()}  " + json.dumps(feature).replace(
+            '"coordinates": [[]]', f'"coordinates": [{coords}]', 1
+        )
+
+    def footer(self, latencies=None) -> str:
+        return "\n ],\n" + ' "properties": {}\n'.format(json.dumps(self._description(latencies))) + "}"
+
+
+ANNOTATION_WRITERS = {
+    "dsa": DSAAnnotationWriter,
+    "asap": ASAPAnnotationWriter,
+    "geojson": GeoJSONAnnotationWriter,
+}
+
+
+def create_annotation_writer(output, json_data, loglevel="INFO", total=0) -> Optional[AnnotationWriter]:
+    """
+    Streaming writer for the output type (dsa, asap or geojson); None for other (e.g. json) output types
+    """
+    writer = ANNOTATION_WRITERS.get(output)
+    return writer(json_data, loglevel=loglevel, total=total) if writer else None
+
+
+def create_annotations_file(output, json_data, loglevel="INFO") -> Tuple[Optional[str], int]:
+    writer = create_annotation_writer(output, json_data, loglevel, total=len(json_data["annotations"]))
+    if writer is None:
+        return None, -1
+
+    try:
         for tid, res in enumerate(json_data["annotations"]):
             logger.debug(f"Adding annotations for tile: {tid}")
-            if not res:
-                continue
+            writer.add(res)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close(json_data.get("latencies"))
 
-            annotation = res.get("annotation")
-            if not annotation:
-                continue
 
-            logger.info(f"Annotation keys: {annotation.keys()}")
-            color_map = annotation.get("labels")
-            elements = annotation.get("elements", [])
-            for element in elements:
-                label = element["label"]
-                color = to_hex(color_map.get(label))
+def create_dsa_annotations_json(json_data, loglevel="INFO"):
+    return create_annotations_file("dsa", json_data, loglevel)
 
-                logger.info(f"Adding Contours for label: {label}; color: {color}; color_map: {color_map}")
-                labels[label] = color
-
-                contours = element["contours"]
-                for contour in contours:
-                    fp.write(f'    <Annotation Name="{label}" Type="Polygon" PartOfGroup="{label}" Color="{color}">\n')
-                    fp.write("      <Coordinates>\n")
-                    for pcount, point in enumerate(contour):
-                        fp.write(f'        <Coordinate Order="{pcount}" X="{point[0]}" Y="{point[1]}" />\n')
-                    fp.write("      </Coordinates>\n")
-                    fp.write("    </Annotation>\n")
-                    total_count += 1
-        fp.write("  </Annotations>\n")
-
-        fp.write("  <AnnotationGroups>\n")
-        for label, color in labels.items():
-            fp.write(f'    <Group Name="{label}" PartOfGroup="None" Color="{color}">\n')
-            fp.write("      <Attributes />\n")
-            fp.write("    </Group>\n")
-        fp.write("  </AnnotationGroups>\n")
-        fp.write("</ASAP_Annotations>\n")
-
-    logger.info(f"Total Annotations: {total_count}")
-    return label_xml, total_count
+
+def create_asap_annotations_xml(json_data, loglevel="INFO"):
+    return create_annotations_file("asap", json_data, loglevel)
+
+
+def create_geojson_annotations(json_data, loglevel="INFO"):
+    return create_annotations_file("geojson", json_data, loglevel)
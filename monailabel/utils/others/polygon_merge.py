@@ -0,0 +1,274 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from shapely import STRtree, unary_union
+from shapely.geometry import MultiPolygon, Polygon
+
+logger = logging.getLogger(__name__)
+
+
+class _Seam:
+    __slots__ = ("label", "polygon", "tile", "clipped")
+
+    def __init__(self, label, polygon: Polygon, tile: int, clipped: bool):
+        self.label = label
+        self.polygon = polygon
+        self.tile = tile
+        self.clipped = clipped
+
+
+class TilePolygonMerger:
+    """
+    Seam-aware merging of polygons found per tile (see ``tile_overlap`` of ``create_infer_wsi_tasks``).
+
+    Polygons which lie only within their own tile (not reachable by any other tile) are passed through as is.  The
+    rest (near seams) are kept aside until :meth:`merge` where:
+
+        - complete polygons (not touching any shared edge of their tile) detected by more than one tile of an
+          overlap are de-duplicated (IoU > ``iou_threshold``; the largest is kept)
+        - clipped polygons which are mostly covered by a complete polygon of another tile are dropped
+        - remaining clipped polygons of different tiles which are within ``gap`` pixels are unioned
+
+    Spatial lookups use an STRtree; so merging is O(N log N) in the number of seam polygons only.
+    """
+
+    def __init__(
+        self,
+        tiles: Sequence[Dict[str, Any]],
+        margin: int = 2,
+        gap: float = 2.0,
+        iou_threshold: float = 0.5,
+        cover_threshold: float = 0.5,
+    ):
+        """
+        :param tiles: infer tasks (tiles) with ``id``, ``location`` and ``size``
+        :param margin: distance (pixels) to the tile edge for a polygon to be considered clipped
+        :param gap: max distance (pixels) between clipped polygons (of different tiles) to union them
+        :param iou_threshold: min IoU of complete polygons (of different tiles) to consider them duplicates
+        :param cover_threshold: min fraction of a clipped polygon covered by a complete polygon to drop it
+        """
+        self.margin = margin
+        self.gap = gap
+        self.iou_threshold = iou_threshold
+        self.cover_threshold = cover_threshold
+
+        self._boxes = {t["id"]: self._box(t) for t in tiles}
+        ids = list(self._boxes.keys())
+        boxes = np.array([self._boxes[i] for i in ids], dtype=np.float64).reshape(-1, 4)
+
+        # neighbours (overlapping or adjacent tiles) and shared edges (left, top, right, bottom) of each tile
+        self._neighbours: Dict[int, np.ndarray] = {}
+        self._shared: Dict[int, Tuple[bool, bool, bool, bool]] = {}
+        for i, (x0, y0, x1, y1) in zip(ids, boxes):
+            near = (boxes[:, 0] <= x1 + 1) & (boxes[:, 2] >= x0 - 1) & (boxes[:, 1] <= y1 + 1) & (boxes[:, 3] >= y0 - 1)
+            near[ids.index(i)] = False
+            n = boxes[near]
+            self._neighbours[i] = n
+            self._shared[i] = (
+                bool(np.any(n[:, 0] < x0)),
+                bool(np.any(n[:, 1] < y0)),
+                bool(np.any(n[:, 2] > x1)),
+                bool(np.any(n[:, 3] > y1)),
+            )
+
+        self._lock = threading.Lock()
+        self._labels: Dict[Any, Any] = {}
+        self._seams: List[_Seam] = []
+        self._stats = {"tiles": 0, "polygons": 0, "exclusive": 0, "seam": 0, "invalid": 0}
+
+    @staticmethod
+    def _box(tile) -> Tuple[float, float, float, float]:
+        (x, y), (w, h) = tile["location"], tile["size"]
+        return x, y, x + w - 1, y + h - 1
+
+    def add(self, tid: int, res: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Keep aside polygons near seams of the tile result
+
+        :return: tile result with polygons which can be written right away (exclusive to the tile)
+        """
+        annotation = res.get("annotation") if res else None
+        if not annotation:
+            with self._lock:
+                self._stats["tiles"] += 1
+            return res
+
+        x0, y0, x1, y1 = self._boxes[tid]
+        neighbours = self._neighbours[tid]
+        shared = self._shared[tid]
+        m = self.margin
+
+        seams: List[_Seam] = []
+        elements = []
+        total = invalid = 0
+        for element in annotation.get("elements", []):
+            label = element["label"]
+            contours = []
+            for contour in element["contours"]:
+                total += 1
+                points = np.asarray(contour).reshape(-1, 2)
+                bx0, by0 = points.min(axis=0) - m
+                bx1, by1 = points.max(axis=0) + m
+
+                near = (neighbours[:, 0] <= bx1) & (neighbours[:, 2] >= bx0)
+                near &= (neighbours[:, 1] <= by1) & (neighbours[:, 3] >= by0)
+                if not np.any(near):
+                    contours.append(contour)
+                    continue
+
+                polygon = Polygon(points)
+                polygon = polygon if polygon.is_valid else polygon.buffer(0)
+                if polygon.is_empty or polygon.geom_type != "Polygon":
+                    invalid += 1
+                    contours.append(contour)
+                    continue
+
+                clipped = (
+                    (shared[0] and bx0 <= x0)
+                    or (shared[1] and by0 <= y0)
+                    or (shared[2] and bx1 >= x1)
+                    or (shared[3] and by1 >= y1)
+                )
+                seams.append(_Seam(label, polygon, tid, bool(clipped)))
+            if contours:
+                elements.append({"label": label, "contours": contours})
+
+        with self._lock:
+            self._labels.update(annotation.get("labels") or {})
+            self._seams.extend(seams)
+            self._stats["tiles"] += 1
+            self._stats["polygons"] += total
+            self._stats["exclusive"] += total - len(seams)
+            self._stats["seam"] += len(seams)
+            self._stats["invalid"] += invalid
+
+        res = dict(res)
+        res["annotation"] = dict(annotation, elements=elements)
+        return res
+
+    def merge(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Merge polygons near seams (of all the tiles added so far)
+
+        :return: (tile like result with merged polygons, merge stats)
+        """
+        start = time.time()
+        with self._lock:
+            seams, self._seams = self._seams, []
+            labels = dict(self._labels)
+            stats: Dict[str, Any] = dict(self._stats)
+
+        by_label: Dict[Any, List[_Seam]] = {}
+        for s in seams:
+            by_label.setdefault(s.label, []).append(s)
+
+        stats.update({"duplicates": 0, "partials": 0, "merged": 0, "unions": 0})
+        elements = []
+        for label, items in by_label.items():
+            polygons = self._merge(items, stats)
+            if polygons:
+                elements.append({"label": label, "contours": polygons})
+
+        # invalid polygons are passed through as is (counted in exclusive)
+        stats["output"] = stats["exclusive"] + sum(len(e["contours"]) for e in elements)
+        stats["latency"] = round(time.time() - start, 4)
+        logger.info(f"Polygon Merge Stats: {stats}")
+
+        result = {"annotation": {"elements": elements, "labels": {k: labels.get(k) for k in by_label}}}
+        return result, stats
+
+    def _merge(self, items: List[_Seam], stats: Dict[str, Any]) -> List[List[List[int]]]:
+        complete = sorted((s for s in items if not s.clipped), key=lambda s: -s.polygon.area)
+        clipped = [s for s in items if s.clipped]
+
+        # complete polygons seen by more than one tile (largest first)
+        kept: List[_Seam] = []
+        if complete:
+            tree = STRtree([s.polygon for s in complete])
+            dropped = np.zeros(len(complete), dtype=bool)
+            for i, s in enumerate(complete):
+                if dropped[i]:
+                    continue
+                kept.append(s)
+                for j in tree.query(s.polygon, predicate="intersects"):
+                    o = complete[j]
+                    if j <= i or dropped[j] or o.tile == s.tile:
+                        continue
+                    inter = s.polygon.intersection(o.polygon).area
+                    if inter / max(s.polygon.union(o.polygon).area, 1e-6) > self.iou_threshold:
+                        dropped[j] = True
+                        stats["duplicates"] += 1
+
+        # clipped polygons which are (mostly) part of a complete one
+        if clipped and kept:
+            tree = STRtree([s.polygon for s in kept])
+            remaining = []
+            for s in clipped:
+                covered = False
+                for j in tree.query(s.polygon, predicate="intersects"):
+                    if kept[j].tile != s.tile:
+                        inter = s.polygon.intersection(kept[j].polygon).area
+                        if inter >= self.cover_threshold * max(s.polygon.area, 1e-6):
+                            covered = True
+                            break
+                stats["partials"] += int(covered)
+                if not covered:
+                    remaining.append(s)
+            clipped = remaining
+
+        # union clipped polygons across seams (union-find over pairs within gap)
+        polygons = [self._coords(s.polygon) for s in kept]
+        if not clipped:
+            return polygons
+
+        half = self.gap / 2.0
+        grown = [s.polygon.buffer(half, join_style="mitre") for s in clipped]
+        parent = list(range(len(clipped)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        tree = STRtree(grown)
+        pairs = tree.query(grown, predicate="intersects")
+        for i, j in zip(*pairs):
+            if i < j and clipped[i].tile != clipped[j].tile:
+                parent[find(i)] = find(j)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(clipped)):
+            groups.setdefault(find(i), []).append(i)
+
+        for group in groups.values():
+            if len(group) == 1:
+                polygons.append(self._coords(clipped[group[0]].polygon))
+                continue
+
+            merged = unary_union([grown[i] for i in group]).buffer(-half, join_style="mitre")
+            parts = list(merged.geoms) if isinstance(merged, MultiPolygon) else [merged]
+            parts = [p for p in parts if not p.is_empty and p.geom_type == "Polygon"]
+            polygons.extend(self._coords(p) for p in parts)
+            stats["merged"] += 1
+            stats["unions"] += len(group)
+        return polygons
+
+    @staticmethod
+    def _coords(polygon: Polygon) -> List[List[int]]:
+        coords = np.rint(np.asarray(polygon.exterior.coords)[:-1]).astype(int)
+        return coords.tolist()
@@ -0,0 +1,263 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ctypes.util
+import logging
+import os
+import platform
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from ctypes import cdll
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from monai.utils import optional_import
+
+from monailabel.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+_request_stats: ContextVar[Optional[Dict[str, Any]]] = ContextVar("slide_request_stats", default=None)
+
+
+def open_slide(path: str):
+    if platform.system() == "Windows":
+        cdll.LoadLibrary(str(ctypes.util.find_library("libopenslide-0.dll")))
+
+    openslide, has_openslide = optional_import("openslide")
+    if not has_openslide:
+        raise ImportError("Unable to find openslide, please ensure openslide library packages are correctly installed")
+    return openslide.OpenSlide(path)
+
+
+def _nbytes(img) -> int:
+    w, h = img.size
+    return w * h * len(img.getbands())
+
+
+class _Handle:
+    def __init__(self, slide):
+        self.slide = slide
+        self.refs = 0
+        self.evicted = False
+
+
+class SlidePool:
+    """
+    Process-wide pool of open slide handles plus an optional LRU cache of decoded regions.
+
+    Handles are keyed by (path, size, mtime) of the slide; so a replaced file is re-opened and regions read from the
+    old file are never served.  Up to ``max_handles`` handles are kept open (least recently used ones are closed once
+    they are no longer in use).  OpenSlide handles are thread-safe; hence a single handle is shared by all the
+    threads reading tiles of the same slide.
+
+    Decoded regions are cached up to ``cache_bytes`` (0 to disable).  Cached images are shared and must not be
+    modified in-place by the caller.
+
+    Besides the (process-wide) :meth:`stats`, opens/reads are also counted in the stats of the current context if
+    any (see :func:`slide_request_stats`).
+    """
+
+    def __init__(self, max_handles: int = 8, cache_bytes: int = 0, opener: Optional[Callable[[str], Any]] = None):
+        self.max_handles = max(1, max_handles)
+        self.cache_bytes = cache_bytes
+        self.opener = opener if opener else open_slide
+
+        self._lock = threading.Lock()
+        self._opening: Dict[Tuple, threading.Event] = {}
+        self._handles: "OrderedDict[Tuple, _Handle]" = OrderedDict()
+        self._regions: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()  # key => (image, bytes)
+        self._region_bytes = 0
+        self._stats = {
+            "opens": 0,
+            "open_time": 0.0,
+            "reads": 0,
+            "read_time": 0.0,
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def _key(path: str) -> Tuple:
+        s = os.stat(path)
+        return os.path.abspath(path), s.st_size, s.st_mtime_ns
+
+    def _acquire(self, key: Tuple) -> _Handle:
+        while True:
+            with self._lock:
+                h = self._handles.get(key)
+                if h is not None:
+                    self._handles.move_to_end(key)
+                    h.refs += 1
+                    return h
+
+                # open the same slide only once when requested by many threads at the same time
+                event = self._opening.get(key)
+                if event is None:
+                    event = self._opening[key] = threading.Event()
+                    break
+            event.wait()
+
+        try:
+            start = time.time()
+            slide = self.opener(key[0])
+            latency = time.time() - start
+        except Exception:
+            with self._lock:
+                self._opening.pop(key).set()
+            raise
+
+        closing = []
+        with self._lock:
+            self._count(opens=1, open_time=latency)
+            h = self._handles[key] = _Handle(slide)
+            h.refs += 1
+            self._opening.pop(key).set()
+
+            while len(self._handles) > self.max_handles:
+                _, e = self._handles.popitem(last=False)
+                e.evicted = True
+                self._stats["evictions"] += 1
+                if not e.refs:
+                    closing.append(e.slide)
+
+        logger.debug(f"Slide opened: {key[0]}; latency: {latency:.4f}; handles: {len(self._handles)}")
+        for slide in closing:
+            slide.close()
+        return h
+
+    def _count(self, **values) -> None:
+        # caller holds the lock
+        request = _request_stats.get()
+        for k, v in values.items():
+            self._stats[k] += v
+            if request is not None:
+                request[k] += v
+
+    def _release(self, h: _Handle) -> None:
+        with self._lock:
+            h.refs -= 1
+            close = h.evicted and not h.refs
+        if close:
+            h.slide.close()
+
+    @contextmanager
+    def slide(self, path: str):
+        """
+        Shared (open) handle of the slide; the handle must not be closed by the caller
+        """
+        h = self._acquire(self._key(path))
+        try:
+            yield h.slide
+        finally:
+            self._release(h)
+
+    def dimensions(self, path: str, level: int = 0) -> Tuple[int, int]:
+        with self.slide(path) as slide:
+            return tuple(slide.level_dimensions[level]) if level else tuple(slide.dimensions)
+
+    def read_region(self, path: str, location: Sequence[int], level: int, size: Sequence[int], cache: bool = True):
+        """
+        Same as ``OpenSlide.read_region`` (RGBA PIL image) using shared handle and region cache.
+        Set ``cache=False`` for large one-time reads (e.g. training ROIs) to keep them out of the cache.
+        """
+        key = self._key(path)
+        rkey = (key, tuple(int(v) for v in location), int(level), tuple(int(v) for v in size))
+
+        cache = cache and self.cache_bytes > 0
+        if cache:
+            with self._lock:
+                e = self._regions.get(rkey)
+                if e is not None:
+                    self._regions.move_to_end(rkey)
+                    self._count(hits=1)
+                    return e[0]
+                self._count(misses=1)
+
+        h = self._acquire(key)
+        try:
+            start = time.time()
+            img = h.slide.read_region(rkey[1], rkey[2], rkey[3])
+            latency = time.time() - start
+        finally:
+            self._release(h)
+
+        with self._lock:
+            self._count(reads=1, read_time=latency)
+
+            nbytes = _nbytes(img) if cache else 0
+            if cache and nbytes <= self.cache_bytes and rkey not in self._regions:
+                self._regions[rkey] = (img, nbytes)
+                self._region_bytes += nbytes
+                while self._region_bytes > self.cache_bytes:
+                    _, (_, b) = self._regions.popitem(last=False)
+                    self._region_bytes -= b
+        return img
+
+    def clear(self) -> None:
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+            self._regions.clear()
+            self._region_bytes = 0
+            for h in handles:
+                h.evicted = True
+            closing = [h.slide for h in handles if not h.refs]
+
+        for slide in closing:
+            slide.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s: Dict[str, Any] = dict(self._stats)
+            s["handles"] = len(self._handles)
+            s["cached"] = len(self._regions)
+            s["cached_bytes"] = self._region_bytes
+        return s
+
+
+def slide_pool() -> SlidePool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SlidePool(
+                max_handles=settings.MONAI_LABEL_WSI_MAX_HANDLES,
+                cache_bytes=settings.MONAI_LABEL_WSI_CACHE_MEM_MB * 1024 * 1024,
+            )
+    return _pool
+
+
+def slide_request_stats() -> Dict[str, Any]:
+    """
+    Start counting opens/reads of slides in the current context (e.g. a WSI infer request).  Work which runs in other
+    threads adds to the same stats when it runs in a copy of this context (see :func:`contextvars.copy_context`).
+
+    :return: stats of the current context (updated in place)
+    """
+    s: Dict[str, Any] = {"opens": 0, "open_time": 0.0, "reads": 0, "read_time": 0.0, "hits": 0, "misses": 0}
+    _request_stats.set(s)
+    return s
+
+
+def slide_stats(since: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Cumulative open/read counts and timings of the shared pool; relative to ``since`` (previous stats) if provided
+    """
+    s = slide_pool().stats()
+    if since:
+        for k in ("opens", "open_time", "reads", "read_time", "hits", "misses", "evictions"):
+            s[k] = s[k] - since.get(k, 0)
+    return s
@@ -0,0 +1,112 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import math
+import warnings
+from typing import Callable, Iterator, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# max number of (reps x channels x voxels) elements processed at once
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+
+def _slabs(vol_input, channel_dim: bool, chunk_size: int) -> Iterator[Tuple[slice, np.ndarray]]:
+    """
+    Yield (slice over first spatial axis, float32 block of shape (reps, channels, k, ...)) for the input.
+    Blocks are views sliced out of the input and copied (and moved to host) one at a time.
+    """
+    shape = tuple(vol_input.shape)
+    reps = shape[0]
+    channels = shape[1] if channel_dim else 1
+    spatial = shape[2:] if channel_dim else shape[1:]
+
+    per_row = reps * channels * int(np.prod(spatial[1:], dtype=np.int64))
+    step = max(1, chunk_size // max(1, per_row))
+    for i in range(0, spatial[0], step):
+        s = slice(i, min(i + step, spatial[0]))
+        block = vol_input[:, :, s] if channel_dim else vol_input[:, None, s]
+        if isinstance(block, torch.Tensor):
+            block = block.detach().cpu().numpy()
+        yield s, np.array(block, dtype=np.float32, copy=True)
+
+
+def _entropy(block: np.ndarray, threshold: float) -> np.ndarray:
+    block[block <= 0] = threshold
+    avg = np.sum(block, axis=0) / block.shape[0]
+    return -np.sum(avg * np.log(avg), axis=0)
+
+
+def _variance(block: np.ndarray, threshold: float) -> np.ndarray:
+    block[block <= 0] = threshold
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.sum(np.nanvar(block, axis=0), axis=0)
+
+
+def _map(fn: Callable, vol_input, threshold, channel_dim, chunk_size) -> np.ndarray:
+    shape = tuple(vol_input.shape)
+    result = np.empty(shape[2:] if channel_dim else shape[1:], dtype=np.float32)
+    for s, block in _slabs(vol_input, channel_dim, chunk_size):
+        result[s] = fn(block, threshold)
+    return result
+
+
+def _score(fn: Callable, vol_input, threshold, channel_dim, chunk_size) -> float:
+    total, count = 0.0, 0
+    for _, block in _slabs(vol_input, channel_dim, chunk_size):
+        values = fn(block, threshold)
+        valid = ~np.isnan(values)
+        total += float(np.sum(values[valid], dtype=np.float64))
+        count += int(np.count_nonzero(valid))
+    return total / count if count else math.nan
+
+
+def entropy_map(vol_input, threshold=0.00005, channel_dim=True, chunk_size=DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Entropy of the mean probabilities (over repetitions) summed over channels.  Computed block by block over the
+    first spatial axis, so the peak memory is bounded by ``chunk_size`` instead of the size of the input.
+
+    :param vol_input: numpy array or tensor (any device) of shape (reps, channels, spatial...)
+    :param threshold: value used for probabilities less than or equal to zero
+    :param channel_dim: input has channels dimension; otherwise shape is (reps, spatial...)
+    :param chunk_size: max number of input elements to process at once
+    :return: float32 spatial map of entropy
+    """
+    return _map(_entropy, vol_input, threshold, channel_dim, chunk_size)
+
+
+def variance_map(vol_input, threshold=0.0005, channel_dim=True, chunk_size=DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Variance (ignoring nans) over repetitions summed over channels; computed block by block (see
+    :func:`entropy_map`).
+
+    :return: float32 spatial map of variance
+    """
+    return _map(_variance, vol_input, threshold, channel_dim, chunk_size)
+
+
+def entropy_score(vol_input, threshold=0.00005, channel_dim=True, chunk_size=DEFAULT_CHUNK_SIZE) -> float:
+    """
+    Mean (ignoring nans) of :func:`entropy_map` without allocating the full map
+    """
+    return _score(_entropy, vol_input, threshold, channel_dim, chunk_size)
+
+
+def variance_score(vol_input, threshold=0.0005, channel_dim=True, chunk_size=DEFAULT_CHUNK_SIZE) -> float:
+    """
+    Mean (ignoring nans) of :func:`variance_map` without allocating the full map
+    """
+    return _score(_variance, vol_input, threshold, channel_dim, chunk_size)
@@ -9,13 +9,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import cgi
 import http.client
+import io
 import json
 import logging
 import mimetypes
 import os
 import re
+import shutil
 import ssl
 import tempfile
 from pathlib import Path
@@ -313,7 +314,7 @@ class MONAILabelClient:
 
         return local_filename
 
-    def infer(self, model, image_id, params, label_in=None, file=None, session_id=None):
+    def infer(self, model, image_id, params, label_in=None, file=None, session_id=None, output=None):
         """
         Run Infer
 
@@ -323,6 +324,8 @@ class MONAILabelClient:
         :param label_in: File path for label mask which is needed to run Inference (e.g. In case of Scribbles)
         :param file: File path for Image (use raw image instead of image_id)
         :param session_id: Session ID (use existing session id instead of image_id)
+        :param output: Output type (image|json|all|sparse); in case of sparse, label is returned as part of json
+            (see :meth:`MONAILabelUtils.decode_sparse_label`)
         :return: response_file (label mask), response_body (json result/output params)
         """
         selector = "/infer/{}?image={}".format(
@@ -331,6 +334,8 @@ class MONAILabelClient:
         )
         if session_id:
             selector += f"&session_id={MONAILabelUtils.urllib_quote_plus(session_id)}"
+        if output:
+            selector += f"&output={MONAILabelUtils.urllib_quote_plus(output)}"
 
         params = self._update_client_id(params)
         fields = {"params": json.dumps(params) if params else "{}"}
@@ -338,7 +343,7 @@ class MONAILabelClient:
         files.update({"file": file} if file and not session_id else {})
 
         status, form, files, _ = MONAILabelUtils.http_multipart(
-            "POST", self._server_url, selector, fields, files, headers=self._headers
+            "POST", self._server_url, selector, fields, files, headers=self._headers, tmpdir=self._tmpdir
         )
         if status != 200:
             raise MONAILabelClientException(
@@ -346,11 +351,11 @@ class MONAILabelClient:
                 f"Status: {status}; Response: {bytes_to_str(form)}",
             )
 
-        form = json.loads(form) if isinstance(form, str) else form
+        form = json.loads(form) if isinstance(form, (str, bytes)) else form
         params = form.get("params") if files else form
         params = json.loads(params) if isinstance(params, str) else params
 
-        image_out = MONAILabelUtils.save_result(files, self._tmpdir)
+        image_out = MONAILabelUtils.save_result(files, self._tmpdir) if files else None
         return image_out, params
 
     def wsi_infer(self, model, image_id, body=None, output="dsa", session_id=None):
@@ -538,7 +543,7 @@ class MONAILabelUtils:
         return response.status_code, response.text, None
 
     @staticmethod
-    def http_multipart(method, server_url, selector, fields, files, headers={}):
+    def http_multipart(method, server_url, selector, fields, files, headers={}, tmpdir=None):
         logging.debug(f"{method} {server_url}{selector}")
 
         content_type, body = MONAILabelUtils.encode_multipart_formdata(fields, files)
@@ -558,10 +563,10 @@ class MONAILabelUtils:
             conn = http.client.HTTPConnection(parsed.hostname, parsed.port)
 
         conn.request(method, selector, body, headers)
-        return MONAILabelUtils.send_response(conn, content_type)
+        return MONAILabelUtils.send_response(conn, content_type, tmpdir)
 
     @staticmethod
-    def send_response(conn, content_type="application/json"):
+    def send_response(conn, content_type="application/json", tmpdir=None):
         response = conn.getresponse()
         logging.debug(f"HTTP Response Code: {response.status}")
         logging.debug(f"HTTP Response Message: {response.reason}")
@@ -572,7 +577,9 @@ class MONAILabelUtils:
 
         if "multipart" in response_content_type:
             if response.status == 200:
-                form, files = MONAILabelUtils.parse_multipart(response.fp if response.fp else response, response.msg)
+                form, files = MONAILabelUtils.parse_multipart(
+                    response.fp if response.fp else response, response.msg, tmpdir
+                )
                 logging.debug(f"Response FORM: {form}")
                 logging.debug(f"Response FILES: {files.keys()}")
                 return response.status, form, files, response.headers
@@ -588,11 +595,17 @@ class MONAILabelUtils:
             data = files[name]
             result_file = os.path.join(tmpdir, name)
 
-            logging.debug(f"Saving {name} to {result_file}; Size: {len(data)}")
             dir_path = os.path.dirname(os.path.realpath(result_file))
             if not os.path.exists(dir_path):
                 os.makedirs(dir_path)
 
+            # already streamed to disk (see parse_multipart)
+            if isinstance(data, Path):
+                logging.debug(f"Moving {name} to {result_file}; Size: {data.stat().st_size}")
+                shutil.move(str(data), result_file)
+                return result_file
+
+            logging.debug(f"Saving {name} to {result_file}; Size: {len(data)}")
             with open(result_file, "wb") as f:
                 if isinstance(data, bytes):
                     f.write(data)
@@ -635,24 +648,134 @@ class MONAILabelUtils:
         return mimetypes.guess_type(filename)[0] or "application/octet-stream"
 
     @staticmethod
-    def parse_multipart(fp, headers):
-        fs = cgi.FieldStorage(
-            fp=fp,
-            environ={"REQUEST_METHOD": "POST"},
-            headers=headers,
-            keep_blank_values=True,
-        )
+    def parse_multipart(fp, headers, tmpdir=None, chunk_size=1024 * 1024):
+        """
+        Parse multipart response incrementally (chunk by chunk)
+
+        :param fp: file like object to read the response body
+        :param headers: response headers (to get the boundary)
+        :param tmpdir: if provided, file parts are written to disk (under tmpdir) while reading and returned as Path
+        :param chunk_size: size of chunk to read
+        :return: form fields (name => str) and files (filename => bytes or Path)
+        """
+        content_type = headers.get("content-type", "")
+        boundary = re.search(r'boundary="?([^";]+)"?', content_type, flags=re.IGNORECASE)
+        if not boundary:
+            raise ValueError(f"Boundary not found in Content-Type: {content_type}")
+
+        delimiter = b"\r\n--" + boundary.group(1).encode("utf-8")
         form = {}
         files = {}
-        if hasattr(fs, "list") and isinstance(fs.list, list):
-            for f in fs.list:
-                logger.debug(f"FILE-NAME: {f.filename}; NAME: {f.name}; SIZE: {len(f.value)}")
-                if f.filename:
-                    files[f.filename] = f.value
+        state = {"buf": b"\r\n", "eof": False}
+
+        def fill():
+            data = fp.read(chunk_size)
+            state["eof"] = not data
+            state["buf"] += data
+
+        def read_until(out=None):
+            # copy bytes up to next delimiter into out; returns False if delimiter is never found
+            while True:
+                buf = state["buf"]
+                idx = buf.find(delimiter)
+                if idx >= 0:
+                    if out is not None:
+                        out.write(buf[:idx])
+                    state["buf"] = buf[idx + len(delimiter) :]
+                    return True
+                if state["eof"]:
+                    return False
+
+                safe = len(buf) - len(delimiter) + 1
+                if safe > 0:
+                    if out is not None:
+                        out.write(buf[:safe])
+                    state["buf"] = buf[safe:]
+                fill()
+
+        if not read_until():  # preamble
+            return form, files
+
+        while True:
+            while len(state["buf"]) < 2 and not state["eof"]:
+                fill()
+            if state["buf"].startswith(b"--") or not state["buf"]:
+                break
+
+            while b"\r\n\r\n" not in state["buf"]:
+                if state["eof"]:
+                    raise ValueError("Incomplete multipart headers")
+                fill()
+            head, state["buf"] = state["buf"].split(b"\r\n\r\n", 1)
+
+            disposition = ""
+            for line in head.decode("utf-8").split("\r\n"):
+                if line.lower().startswith("content-disposition:"):
+                    disposition = line.split(":", 1)[1]
+            name = re.search(r'\bname="([^"]*)"', disposition)
+            filename = re.search(r'filename="([^"]*)"', disposition)
+
+            if filename and filename.group(1) and tmpdir:
+                os.makedirs(tmpdir, exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=tmpdir, suffix=".part", delete=False) as out:
+                    found = read_until(out)
+                files[filename.group(1)] = Path(out.name)
+            else:
+                with io.BytesIO() as out:
+                    found = read_until(out)
+                    value = out.getvalue()
+                if filename and filename.group(1):
+                    files[filename.group(1)] = value
                 else:
-                    form[f.name] = f.value
+                    form[name.group(1) if name else ""] = value.decode("utf-8")
+
+            if not found:
+                raise ValueError("Incomplete multipart body")
+            logger.debug(f"Multipart: {disposition.strip()}")
         return form, files
 
+    @staticmethod
+    def decode_sparse_label(sparse, prev=None):
+        """
+        Decode sparse label (output=sparse) into dense numpy array
+
+        :param sparse: sparse label from infer result (``label_sparse``)
+        :param prev: previous label (numpy array) in case the sparse label is a delta against it
+        :return: label as numpy array
+        """
+        import base64
+        import zlib
+
+        import numpy as np
+
+        dtype = np.dtype(sparse["dtype"])
+        shape = tuple(sparse["shape"])
+        if sparse["delta"]:
+            if prev is None or tuple(prev.shape) != shape:
+                raise ValueError("Previous label (with same shape) is required to apply delta")
+            label = np.array(prev, dtype=dtype, copy=True)
+        else:
+            label = np.zeros(shape, dtype=dtype)
+
+        if not sparse["bbox"]:
+            return label
+
+        box = tuple(slice(b[0], b[1]) for b in sparse["bbox"])
+        crop_shape = tuple(b[1] - b[0] for b in sparse["bbox"])
+        payload = zlib.decompress(base64.b64decode(sparse["data"]))
+
+        if sparse["encoding"] == "bitpack":
+            bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=int(np.prod(crop_shape)))
+            crop = np.where(bits.astype(bool), np.array(sparse["value"], dtype=dtype), np.zeros((), dtype=dtype))
+        else:
+            runs = len(payload) // (dtype.itemsize + 4)
+            values = np.frombuffer(payload, dtype=dtype, count=runs)
+            lengths = np.frombuffer(payload, dtype=np.uint32, offset=runs * dtype.itemsize)
+            crop = np.repeat(values, lengths)
+
+        label[box] = crop.reshape(crop_shape)
+        return label
+
     @staticmethod
     def urllib_quote_plus(s):
         return quote_plus(s)
@@ -96,6 +96,7 @@ class SegmentationNuclei(TaskConfig):
             config={
                 "label_colors": self.label_colors,
                 "max_workers": max(1, multiprocessing.cpu_count() // 2),
+                "tissue_filter": True,
             },
         )
         return task
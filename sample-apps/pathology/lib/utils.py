@@ -20,7 +20,6 @@ from math import ceil
 
 import cv2
 import numpy as np
-import openslide
 import scipy
 from PIL import Image
 from tqdm import tqdm
@@ -29,6 +28,7 @@ from monailabel.datastore.dsa import DSADatastore
 from monailabel.datastore.local import LocalDatastore
 from monailabel.interfaces.datastore import Datastore
 from monailabel.utils.others.generic import get_basename, get_basename_no_ext, is_openslide_supported
+from monailabel.utils.others.slide_cache import slide_pool
 
 logger = logging.getLogger(__name__)
 
@@ -210,8 +210,7 @@ def split_dsa_dataset(datastore, d, output_dir, groups, tile_size, max_region=(1
             resp = dsa.gc.get(f"/item/{item_id}/tiles/region", parameters=parameters, jsonResp=False)
             img = Image.open(BytesIO(resp.content)).convert("RGB")
         else:
-            slide = openslide.OpenSlide(datastore.get_image_uri(item_id))
-            img = slide.read_region((x, y), 0, (w, h)).convert("RGB")
+            img = slide_pool().read_region(image_uri, (x, y), 0, (w, h), cache=False).convert("RGB")
 
         dataset_json.extend(_to_dataset(item_id, x, y, w, h, img, tile_size, polygons, groups, output_dir))
 
@@ -255,8 +254,7 @@ def split_local_dataset(datastore, d, output_dir, groups, tile_size, max_region=
 
     x, y, w, h = _to_roi(points, max_region, polygons, item_id)
     if is_openslide_supported(d["image"]):
-        slide = openslide.OpenSlide(d["image"])
-        img = slide.read_region((x, y), 0, (w, h)).convert("RGB")
+        img = slide_pool().read_region(d["image"], (x, y), 0, (w, h), cache=False).convert("RGB")
     else:
         img = Image.open(d["image"]).convert("RGB")
         w = img.size[0]
@@ -0,0 +1,68 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+import torch
+from monai.inferers import SimpleInferer
+
+from monailabel.interfaces.tasks.infer_v2 import InferType
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+from monailabel.tasks.scoring.epistemic_v2 import EpistemicScoring, RunningStats
+
+
+class DropoutInferTask(BasicInferTask):
+    def __init__(self, dropout):
+        network = torch.nn.Sequential(torch.nn.Conv3d(1, 3, 1), torch.nn.Dropout(dropout))
+        super().__init__(None, network, InferType.SEGMENTATION, None, 3, "test", train_mode=True, skip_writer=True)
+
+    def pre_transforms(self, data=None):
+        return []
+
+    def inferer(self, data=None):
+        return SimpleInferer()
+
+    def post_transforms(self, data=None):
+        return []
+
+
+class TestEpistemicScoringV2(unittest.TestCase):
+    def test_running_stats(self):
+        samples = torch.rand(7, 3, 4, 5, 6)
+        stats = RunningStats(variance=True)
+        for i in range(0, 7, 3):
+            stats.update(samples[i : i + 3])
+
+        scoring = EpistemicScoring(DropoutInferTask(0.5), use_variance=True)
+        expected = scoring.variance_volume(samples.clone())
+        self.assertTrue(np.allclose(stats.var().numpy(), np.squeeze(expected), atol=1e-5))
+        self.assertTrue(np.allclose(stats.entropy().numpy(), scoring.entropy_volume(samples.clone()), atol=1e-5))
+
+    def test_mc_dropout(self):
+        image = torch.rand(1, 8, 8, 8)
+        request = {"image": image, "device": "cpu", "logging": "error"}
+
+        # no dropout => all simulations are same as single forward
+        task = DropoutInferTask(0.0)
+        scoring = EpistemicScoring(task, mc_batch_size=2)
+        entropy = scoring.run_mc_dropout(dict(request), 5)
+
+        with torch.no_grad():
+            p = torch.softmax(task._get_network("cpu", None)(image[None]), dim=1)[0]
+        self.assertAlmostEqual(entropy, float(-(p * torch.log(p)).sum(0).mean()), places=5)
+
+        scoring = EpistemicScoring(DropoutInferTask(0.5), mc_batch_size=0)
+        self.assertTrue(np.isfinite(scoring.run_mc_dropout(dict(request), 4)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from monailabel.datastore.local import LocalDatastore
+from monailabel.datastore.sqlite import SQLiteDatastore
+from monailabel.interfaces.datastore import DefaultLabelTag
+from monailabel.tasks.activelearning.epistemic import Epistemic
+from monailabel.tasks.activelearning.index import SampleIndex
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fp:
+        fp.write(path)
+
+
+class TestSampleIndex(unittest.TestCase):
+    def _datastore(self, cls, path, n=5):
+        for i in range(n):
+            _touch(os.path.join(path, f"image{i}.nii.gz"))
+        ds = cls(path)
+        for i in range(n):
+            ds.update_image_info(f"image{i}", {"epistemic_entropy": float(i)})
+        return ds
+
+    def _run(self, cls):
+        with tempfile.TemporaryDirectory() as path:
+            ds = self._datastore(cls, path)
+            index = SampleIndex("epistemic", "epistemic_entropy", reset=100)
+
+            # highest score first; served images are not handed out again until all are served
+            self.assertEqual([index.next(ds, now=1000)["id"] for _ in range(3)], ["image4", "image3", "image2"])
+            self.assertEqual(len(index), 5)
+
+            # incremental: new score, labeled image
+            revision = ds.changes()[0]
+            ds.update_image_info("image0", {"epistemic_entropy": 10.0})
+            label = os.path.join(path, "labels", DefaultLabelTag.FINAL, "image1.nii.gz")
+            _touch(label)
+            ds.save_label("image1", label, DefaultLabelTag.FINAL, {})
+            self.assertEqual(set(ds.changes(revision)[1]), {"image0", "image1"})
+
+            self.assertEqual(index.next(ds, now=1001)["id"], "image0")
+            self.assertEqual(len(index), 4)
+
+            # all served => least recently served; after reset => based on score again
+            sample = index.next(ds, now=1002)
+            self.assertEqual((sample["id"], sample["ts"]), ("image4", 2))
+            self.assertEqual(index.next(ds, now=1100)["id"], "image3")
+            self.assertEqual(index.next(ds, now=1200)["id"], "image0")
+
+    def test_json(self):
+        self._run(LocalDatastore)
+
+    def test_sqlite(self):
+        self._run(SQLiteDatastore)
+
+    def test_labeled(self):
+        with tempfile.TemporaryDirectory() as path:
+            ds = self._datastore(SQLiteDatastore, path)
+            index = SampleIndex("epistemic", "epistemic_entropy", reset=100)
+            index.next(ds, label_tag=DefaultLabelTag.ORIGINAL, now=1000)
+
+            # only final labels count (same as datastore); whatever the requested label_tag is
+            for tag, image_id in ((DefaultLabelTag.ORIGINAL, "image3"), (DefaultLabelTag.FINAL, "image2")):
+                label = os.path.join(path, "labels", tag, f"{image_id}.nii.gz")
+                _touch(label)
+                ds.save_label(image_id, label, tag, {})
+            index.next(ds, label_tag=DefaultLabelTag.ORIGINAL, now=1001)
+            self.assertEqual(len(index), 4)
+            self.assertEqual(len(index), len(ds.get_unlabeled_images(DefaultLabelTag.ORIGINAL)))
+
+    def test_top_k(self):
+        with tempfile.TemporaryDirectory() as path:
+            ds = self._datastore(LocalDatastore, path)
+            index = SampleIndex("epistemic", "epistemic_entropy", reset=100, k=2)
+
+            # least recently served among top-2 scores
+            self.assertEqual([index.next(ds, now=1000 + i)["id"] for i in range(4)], ["image4", "image3"] * 2)
+
+    def test_concurrent(self):
+        with tempfile.TemporaryDirectory() as path:
+            ds = self._datastore(LocalDatastore, path, 16)
+            strategy = Epistemic()
+            with ThreadPoolExecutor(4) as e:
+                results = list(e.map(lambda _: strategy({"strategy": "epistemic"}, ds), range(16)))
+
+            ids = [r["id"] for r in results]
+            self.assertEqual(len(set(ids)), 16)
+            self.assertEqual(sorted(r["epistemic_entropy"]["score"] for r in results), [float(i) for i in range(16)])
+
+
+if __name__ == "__main__":
+    unittest.main()
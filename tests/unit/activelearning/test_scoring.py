@@ -0,0 +1,163 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+import nibabel as nib
+import numpy as np
+
+from monailabel.datastore.local import LocalDatastore
+from monailabel.interfaces.datastore import DefaultLabelTag
+from monailabel.tasks.scoring.dice import Dice, class_scores, confusion_matrix
+from monailabel.tasks.scoring.sum import Sum
+from monailabel.utils.async_tasks.utils import PROGRESS_MARKER, TaskProgress, _parse_progress
+
+
+def _save(path, array):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    nib.save(nib.Nifti1Image(array.astype(np.uint8), np.eye(4)), path)
+
+
+class TestIncrementalScoring(unittest.TestCase):
+    def test_dice(self):
+        with tempfile.TemporaryDirectory() as path:
+            label = np.zeros((8, 8, 4))
+            label[2:6, 2:6] = 1
+            for i in range(3):
+                _save(os.path.join(path, f"image{i}.nii.gz"), label)
+                _save(os.path.join(path, "labels", DefaultLabelTag.FINAL, f"image{i}.nii.gz"), label)
+                _save(os.path.join(path, "labels", DefaultLabelTag.ORIGINAL, f"image{i}.nii.gz"), label)
+            _save(os.path.join(path, "image3.nii.gz"), label)
+            ds = LocalDatastore(path)
+
+            request = {"method": "dice", "max_workers": 2}
+            summary = Dice()(request, ds)
+            self.assertEqual(summary["total"], 4)
+            self.assertEqual(summary["executed"], 3)
+            self.assertEqual(summary["skipped"], 1)
+            self.assertEqual(ds.get_image_info("image0")["dice"], 1.0)
+
+            # nothing changed
+            summary = Dice()(request, ds)
+            self.assertEqual(summary["executed"], 0)
+            self.assertEqual(summary["skipped"], 4)
+
+            # only the image with modified label is re-scored
+            changed = label.copy()
+            changed[2:6, 2:4] = 0
+            label_file = os.path.join(path, "labels", DefaultLabelTag.ORIGINAL, "image1.nii.gz")
+            _save(label_file, changed)
+            os.utime(label_file, ns=(1, 1))
+            summary = Dice()(request, ds)
+            self.assertEqual(summary["executed"], 1)
+            self.assertAlmostEqual(ds.get_image_info("image1")["dice"], 2.0 * 32 / (64 + 32))
+            self.assertEqual(ds.get_image_info("image0")["dice"], 1.0)
+
+            # results are persisted
+            with open(os.path.join(path, "datastore_v2.json")) as fp:
+                objects = json.load(fp)["objects"]
+            self.assertIn("dice_fingerprint", objects["image1"]["image"]["info"])
+
+            self.assertEqual(Dice()(dict(request, force=True), ds)["executed"], 3)
+
+    def test_concurrent_save(self):
+        with tempfile.TemporaryDirectory() as path:
+            label = np.zeros((8, 8, 4))
+            label[2:6, 2:6] = 1
+            for i in range(4):
+                _save(os.path.join(path, f"image{i}.nii.gz"), label)
+                _save(os.path.join(path, "labels", DefaultLabelTag.FINAL, f"image{i}.nii.gz"), label)
+                _save(os.path.join(path, "labels", DefaultLabelTag.ORIGINAL, f"image{i}.nii.gz"), label)
+            label_file = os.path.join(path, "upload", "label.nii.gz")
+            _save(label_file, label)
+
+            ds = LocalDatastore(path)
+            server = LocalDatastore(path)
+
+            class SaveLabelDice(Dice):
+                def score(self, ctx, image_id):
+                    # label saved by another datastore instance (e.g. server) while scores are not yet committed
+                    if image_id == "image1":
+                        server.save_label("image0", label_file, "reviewed", {"user": "admin"})
+                    return super().score(ctx, image_id)
+
+            summary = SaveLabelDice()({"method": "dice", "max_workers": 1, "commit_size": 3}, ds)
+            self.assertEqual(summary["executed"], 4)
+
+            reloaded = LocalDatastore(path)
+            self.assertIn("reviewed", reloaded.get_labels_by_image_id("image0"))
+            self.assertEqual(reloaded.get_label_info("image0", "reviewed")["user"], "admin")
+            for i in range(4):
+                self.assertEqual(reloaded.get_image_info(f"image{i}")["dice"], 1.0)
+            self.assertIn("reviewed", ds.get_labels_by_image_id("image0"))
+
+    def test_dice_multi_class(self):
+        y = np.random.default_rng(0).integers(0, 4, (16, 16, 8))
+        y_pred = y.copy()
+        y_pred[:8] = 0
+
+        cm = confusion_matrix(y, y_pred, 4, chunk_size=100)
+        self.assertEqual(cm.sum(), y.size)
+        dice, iou = class_scores(cm)
+        for c in range(1, 4):
+            tp = np.sum((y == c) & (y_pred == c))
+            self.assertAlmostEqual(dice[c], 2.0 * tp / (np.sum(y == c) + np.sum(y_pred == c)))
+            self.assertAlmostEqual(iou[c], tp / np.sum((y == c) | (y_pred == c)))
+
+        with tempfile.TemporaryDirectory() as path:
+            _save(os.path.join(path, "image0.nii.gz"), y)
+            _save(os.path.join(path, "labels", DefaultLabelTag.FINAL, "image0.nii.gz"), y)
+            _save(os.path.join(path, "labels", DefaultLabelTag.ORIGINAL, "image0.nii.gz"), y_pred)
+            ds = LocalDatastore(path)
+
+            labels = {"spleen": 1, "liver": 2, "kidney": 3}
+            Dice(labels=labels)({"method": "dice"}, ds)
+            info = ds.get_image_info("image0")
+            self.assertEqual(set(info["dice_per_class"]), set(labels))
+            self.assertAlmostEqual(info["dice_per_class"]["liver"], dice[2])
+            self.assertAlmostEqual(info["iou_per_class"]["kidney"], iou[3])
+            self.assertAlmostEqual(info["dice"], float(np.mean(dice[1:])))
+
+    def test_sum(self):
+        with tempfile.TemporaryDirectory() as path:
+            label = np.zeros((4, 4, 2))
+            label[1, 1] = 1
+            _save(os.path.join(path, "image0.nii.gz"), label)
+            _save(os.path.join(path, "labels", DefaultLabelTag.FINAL, "image0.nii.gz"), label)
+            ds = LocalDatastore(path)
+
+            self.assertEqual(Sum()({"method": "sum"}, ds)["executed"], 1)
+            self.assertEqual(ds.get_label_info("image0", DefaultLabelTag.FINAL)["sum"], 2)
+            self.assertEqual(Sum()({"method": "sum"}, ds)["executed"], 0)
+
+    def test_progress(self):
+        progress = TaskProgress("dice", 4, interval=0)
+        with self.assertLogs("monailabel.utils.async_tasks.utils", level="INFO") as logs:
+            progress.update()
+            status = progress.update(failed=1)
+
+        self.assertEqual(status["done"], 2)
+        self.assertEqual(status["percent"], 50.0)
+        self.assertEqual(status["failed"], 1)
+        self.assertIsNotNone(status["eta"])
+        self.assertEqual(progress.update(2)["eta"], 0)
+
+        line = f"[2023-01-01 00:00:00] [INFO] (x) - {logs.records[-1].getMessage()}"
+        self.assertIn(PROGRESS_MARKER, line)
+        self.assertEqual(_parse_progress(line)["done"], 2)
+        self.assertIsNone(_parse_progress("some other line"))
+
+
+if __name__ == "__main__":
+    unittest.main()
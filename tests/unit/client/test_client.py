@@ -9,9 +9,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
+import json
+import os
+import tempfile
 import unittest
 
 from monailabel.client import MONAILabelClient
+from monailabel.client.client import MONAILabelUtils
 
 
 # TODO:: Mock HTTP Server/Response
@@ -22,6 +27,29 @@ class TestClient(unittest.TestCase):
     def tearDown(self) -> None:
         pass
 
+    def test_parse_multipart(self):
+        data = os.urandom(10000)
+        body = (
+            b"--xyz\r\n"
+            b'Content-Disposition: form-data; name="params"\r\n'
+            b"Content-Type: application/json\r\n\r\n"
+            b'{"a": 1}\r\n'
+            b"--xyz\r\n"
+            b'Content-Disposition: form-data; name="image"; filename="label.nii.gz"\r\n'
+            b"Content-Type: application/gzip\r\n\r\n" + data + b"\r\n--xyz--\r\n"
+        )
+        headers = {"content-type": "multipart/form-data; boundary=xyz"}
+
+        form, files = MONAILabelUtils.parse_multipart(io.BytesIO(body), headers, chunk_size=7)
+        self.assertEqual(json.loads(form["params"]), {"a": 1})
+        self.assertEqual(files["label.nii.gz"], data)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _, files = MONAILabelUtils.parse_multipart(io.BytesIO(body), headers, tmpdir=tmpdir, chunk_size=1024)
+            result = MONAILabelUtils.save_result(files, tmpdir)
+            with open(result, "rb") as fp:
+                self.assertEqual(fp.read(), data)
+
     def test_info(self):
         c = MONAILabelClient("http://127.0.0.1:8000/")
         c.get_server_url()
@@ -0,0 +1,77 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+import monailabel.datastore.utils.archive as archive_utils
+from monailabel.datastore.utils.archive import ZipStream
+
+
+class TestZipStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for i, name in enumerate(["a.nii.gz", "b.nii", "c.nii.gz"]):
+            path = os.path.join(self.tmp.name, name)
+            with open(path, "wb") as fp:
+                fp.write(os.urandom(1000 * (i + 1)) + b"0" * 5000)
+            self.files.append((os.path.join("image", name), path))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _verify(self, data: bytes):
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            self.assertIsNone(z.testzip())
+            for arcname, path in self.files:
+                with open(path, "rb") as fp:
+                    self.assertEqual(z.read(arcname), fp.read())
+            self.assertEqual(z.read("metadata.json"), b"{}")
+            return {i.filename: i.compress_type for i in z.infolist()}
+
+    def test_stored(self):
+        archive = ZipStream(self.files, data=[("metadata.json", b"{}")], chunk_size=1024)
+        data = b"".join(archive)
+        self.assertEqual(len(data), archive.size())
+        self.assertTrue(all(t == zipfile.ZIP_STORED for t in self._verify(data).values()))
+
+        # resume from any offset
+        for start, end in [(0, 10), (100, 4000), (len(data) - 30, None)]:
+            self.assertEqual(b"".join(archive.stream(start, end)), data[start:end])
+
+    def test_read_once(self):
+        with patch.object(archive_utils, "file_crc32", wraps=archive_utils.file_crc32) as crc:
+            data = b"".join(ZipStream(self.files, data=[("metadata.json", b"{}")]))
+            self.assertEqual(crc.call_count, 0)  # computed while streaming
+
+            # central directory only; crc of files which are not streamed is computed ahead
+            archive = ZipStream(self.files, data=[("metadata.json", b"{}")])
+            self.assertEqual(b"".join(archive.stream(len(data) - 30)), data[-30:])
+            self.assertEqual(crc.call_count, len(self.files))
+
+    def test_deflate(self):
+        archive = ZipStream(self.files, data=[("metadata.json", b"{}")], compress_level=6)
+        self.assertIsNone(archive.size())
+
+        types = self._verify(b"".join(archive))
+        self.assertEqual(types[os.path.join("image", "b.nii")], zipfile.ZIP_DEFLATED)
+        self.assertEqual(types[os.path.join("image", "a.nii.gz")], zipfile.ZIP_STORED)
+        with self.assertRaises(ValueError):
+            next(archive.stream(10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from monailabel.datastore.local import LocalDatastore
+from monailabel.datastore.sqlite import SQLiteDatastore
+from monailabel.interfaces.datastore import DefaultLabelTag
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fp:
+        fp.write(path)
+
+
+def _wait(condition, timeout=10.0):
+    start = time.time()
+    while not condition() and time.time() - start < timeout:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestLocalDatastoreEvents(unittest.TestCase):
+    def _run(self, cls):
+        with tempfile.TemporaryDirectory() as path:
+            _touch(os.path.join(path, "image0.nii.gz"))
+            ds = cls(path, event_debounce=0.05)
+            self.assertEqual(ds.list_images(), ["image0"])
+
+            # burst of events is applied as one batch
+            image = os.path.join(path, "image1.nii.gz")
+            label = os.path.join(path, "labels", DefaultLabelTag.FINAL, "image1.nii.gz")
+            _touch(image)
+            _touch(label)
+            for p in [image, label, image, os.path.join(path, "readme.txt")]:
+                ds._on_any_event(SimpleNamespace(src_path=p))
+
+            self.assertTrue(_wait(lambda: ds.list_images() == ["image0", "image1"]))
+            self.assertEqual(ds.get_labeled_images(), ["image1"])
+
+            os.unlink(image)
+            self.assertEqual(ds._reconcile_paths([image]), 1)
+            self.assertEqual(ds.list_images(), ["image0"])
+            self.assertEqual(ds.get_labeled_images(), [])
+
+            # directory events (e.g. new label tag or folder of images moved in) fall back to a full refresh
+            label = os.path.join(path, "labels", "reviewed", "image0.nii.gz")
+            _touch(label)
+            ds._on_any_event(SimpleNamespace(src_path=os.path.dirname(label), is_directory=True))
+            self.assertTrue(_wait(lambda: "reviewed" in ds.get_labels_by_image_id("image0")))
+
+            _touch(os.path.join(path, "folder", "image2.nii.gz"))
+            self.assertEqual(ds._reconcile_paths([os.path.join(path, "folder")]), -1)
+
+    def test_json(self):
+        self._run(LocalDatastore)
+
+    def test_sqlite(self):
+        self._run(SQLiteDatastore)
+
+
+class TestLocalDatastoreSaveLabel(unittest.TestCase):
+    def test_staged(self):
+        with tempfile.TemporaryDirectory() as path:
+            for i in range(3):
+                _touch(os.path.join(path, f"image{i}.nii.gz"))
+            ds = LocalDatastore(path)
+            config = os.path.join(path, "datastore_v2.json")
+
+            mtime = os.stat(config).st_mtime_ns
+            with ds.deferred_updates():
+                for i in range(3):
+                    staged = os.path.join(ds.get_label_staging_path(), f"result{i}.nii.gz")
+                    _touch(staged)
+                    ds.save_label(f"image{i}", staged, DefaultLabelTag.ORIGINAL, {"model": "m"})
+                    self.assertFalse(os.path.exists(staged))
+                self.assertEqual(os.stat(config).st_mtime_ns, mtime)
+            self.assertNotEqual(os.stat(config).st_mtime_ns, mtime)
+
+            reloaded = LocalDatastore(path)
+            for i in range(3):
+                self.assertIn(DefaultLabelTag.ORIGINAL, reloaded.get_labels_by_image_id(f"image{i}"))
+                self.assertEqual(reloaded.get_label_info(f"image{i}", DefaultLabelTag.ORIGINAL)["model"], "m")
+
+            # deferral is scoped to the calling context; other writers keep writing through
+            def save(i, tag):
+                label = os.path.join(path, f"label{i}.nii.gz")
+                _touch(label)
+                ds.save_label(f"image{i}", label, tag, {})
+
+            with ds.deferred_updates():
+                mtime = os.stat(config).st_mtime_ns
+                contextvars.copy_context().run(save, 0, "deferred")
+                self.assertEqual(os.stat(config).st_mtime_ns, mtime)
+
+                t = threading.Thread(target=save, args=(1, "other"))
+                t.start()
+                t.join()
+                self.assertIn("other", LocalDatastore(path, read_only=True).get_labels_by_image_id("image1"))
+            self.assertIn("deferred", LocalDatastore(path, read_only=True).get_labels_by_image_id("image0"))
+
+            # non-staged file is copied
+            label = os.path.join(path, "label.nii.gz")
+            _touch(label)
+            ds.save_label("image0", label, DefaultLabelTag.FINAL, {})
+            self.assertTrue(os.path.exists(label))
+            with open(ds.get_label_uri("image0", DefaultLabelTag.FINAL)) as fp:
+                self.assertEqual(fp.read(), label)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from monailabel.datastore.local import LocalDatastore
+from monailabel.datastore.sqlite import SQLiteDatastore
+from monailabel.interfaces.datastore import DefaultLabelTag
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fp:
+        fp.write(path)
+
+
+class TestSQLiteDatastore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = self.tmp.name
+        for i in range(3):
+            _touch(os.path.join(self.path, f"image{i}.nii.gz"))
+        _touch(os.path.join(self.path, "labels", "final", "image0.nii.gz"))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_reconcile(self):
+        ds = SQLiteDatastore(self.path)
+        self.assertEqual(ds.list_images(), ["image0", "image1", "image2"])
+        self.assertEqual(ds.get_labeled_images(), ["image0"])
+        self.assertEqual(ds.get_unlabeled_images(), ["image1", "image2"])
+        self.assertEqual(ds.status(), {"total": 3, "completed": 1, "label_tags": {DefaultLabelTag.FINAL: 1}})
+
+        os.unlink(os.path.join(self.path, "image0.nii.gz"))
+        ds.refresh()
+        self.assertEqual(ds.list_images(), ["image1", "image2"])
+        self.assertEqual(ds.get_labeled_images(), [])
+
+    def test_save_label(self):
+        ds = SQLiteDatastore(self.path)
+        label = os.path.join(self.path, "tmp", "label.nii.gz")
+        _touch(label)
+
+        ds.save_label("image1", label, DefaultLabelTag.FINAL, {"model": "a"})
+        self.assertEqual(ds.get_labeled_images(), ["image0", "image1"])
+        self.assertEqual(ds.get_label_info("image1", DefaultLabelTag.FINAL)["model"], "a")
+        self.assertTrue(os.path.exists(ds.get_label_uri("image1", DefaultLabelTag.FINAL)))
+
+        ds.update_label_info("image1", DefaultLabelTag.FINAL, {"score": 1})
+        ds.update_image_info("image1", {"epistemic": 0.5})
+        self.assertEqual(ds.get_label_info("image1", DefaultLabelTag.FINAL)["score"], 1)
+        self.assertEqual(ds.get_image_info("image1")["epistemic"], 0.5)
+
+        # another instance (e.g. other worker) sees the same records
+        self.assertEqual(SQLiteDatastore(self.path).get_image_info("image1")["epistemic"], 0.5)
+
+        ds.remove_label("image1", DefaultLabelTag.FINAL)
+        self.assertEqual(ds.get_labeled_images(), ["image0"])
+
+    def test_changes(self):
+        ds = SQLiteDatastore(self.path)
+        revision, _ = ds.changes()
+        ds.update_image_info("image1", {"epistemic": 0.5})
+        self.assertEqual(ds.changes(revision), (revision + 1, ["image1"]))
+        self.assertEqual(ds.changes(revision + 1), (revision + 1, []))
+
+        # reading never trims; once the journal no longer covers since, callers must rebuild
+        count = ds._query("SELECT COUNT(*) FROM changes")[0][0]
+        ds.changes(0)
+        self.assertEqual(ds._query("SELECT COUNT(*) FROM changes")[0][0], count)
+        with ds._transaction() as conn:
+            conn.execute("DELETE FROM changes WHERE rev <= ?", (revision,))
+        self.assertEqual(ds.changes(revision - 1), (revision + 1, None))
+        self.assertEqual(ds.changes(revision), (revision + 1, ["image1"]))
+
+    def test_labeled_parity(self):
+        _touch(os.path.join(self.path, "labels", "original", "image1.nii.gz"))
+        local, ds = LocalDatastore(self.path), SQLiteDatastore(self.path)
+        for args in ((), (DefaultLabelTag.FINAL,), (DefaultLabelTag.ORIGINAL,), ("original", ["spleen"])):
+            self.assertEqual(ds.get_labeled_images(*args), local.get_labeled_images(*args))
+            self.assertEqual(sorted(ds.get_unlabeled_images(*args)), sorted(local.get_unlabeled_images(*args)))
+        self.assertEqual(ds.get_labeled_images(DefaultLabelTag.ORIGINAL), ["image0"])
+
+    def test_import_export(self):
+        local = LocalDatastore(self.path)
+        local.update_image_info("image2", {"epistemic": 0.1})
+        local.set_name("my-dataset")
+
+        ds = SQLiteDatastore(self.path)
+        self.assertEqual(ds.name(), "my-dataset")
+        self.assertEqual(ds.get_image_info("image2")["epistemic"], 0.1)
+        self.assertEqual(ds.json(), local.json())
+
+        f = ds.export_json(os.path.join(self.path, "export.json"))
+        with open(f) as fp:
+            self.assertEqual(json.load(fp), json.loads(json.dumps(local.json(), default=str)))
+
+
+if __name__ == "__main__":
+    unittest.main()
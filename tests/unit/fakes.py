@@ -0,0 +1,124 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Fake slides, transforms and infer tasks shared by unit tests
+
+import threading
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from monailabel.interfaces.tasks.infer_v2 import InferType
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+
+
+class FakeSlide:
+    """
+    OpenSlide like slide (1000 x 800) which records opened slides and number of reads; region pixels encode the
+    location and level that was read
+    """
+
+    opened: list = []
+    lock = threading.Lock()
+
+    dimensions = (1000, 800)
+    level_dimensions = [(1000, 800), (250, 200)]
+    level_count = 2
+
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+        self.reads = 0
+        with FakeSlide.lock:
+            FakeSlide.opened.append(self)
+
+    def read_region(self, location, level, size):
+        assert not self.closed
+        self.reads += 1
+        return Image.new("RGBA", size, (location[0] % 256, location[1] % 256, level, 255))
+
+    def get_thumbnail(self, size):
+        return Image.new("RGB", size)
+
+    def close(self):
+        self.closed = True
+
+
+class TissueSlide(FakeSlide):
+    """
+    8192 x 4096 slide; tissue (H&E pink) in left half and glass (white with some noise) in the right half
+    """
+
+    dimensions = (8192, 4096)
+    level_dimensions = [(8192, 4096), (512, 256)]
+
+    def _image(self, size):
+        w, h = size
+        rng = np.random.default_rng(0)
+        img = np.full((h, w, 3), 240, dtype=np.uint8) + rng.integers(0, 10, (h, w, 3), dtype=np.uint8)
+        img[:, : w // 2] = (200, 100, 180)
+        return Image.fromarray(img)
+
+    def get_thumbnail(self, size):
+        return self._image((size[0], size[0] // 2))
+
+    def read_region(self, location, level, size):
+        super().read_region(location, level, size)
+        return self._image(size).convert("RGBA")
+
+
+class LoadImage:
+    """
+    Image (1 x h x w) filled with ``image`` value of the request; or sum of ``location`` for a tile (of ``size``).
+    Request can ask to ``fail`` or ``delay`` (secs) the loading.
+    """
+
+    def __call__(self, data):
+        d = dict(data)
+        if d.get("fail"):
+            raise ValueError(f"Failed to load image: {d.get('image')}")
+        time.sleep(d.get("delay", 0))
+
+        w, h = d.get("size", (8, 8))
+        value = d["image"] if "image" in d else d["location"][0] + d["location"][1]
+        d["image"] = torch.full((1, h, w), float(value))
+        return d
+
+
+class SumPred:
+    def __call__(self, data):
+        d = dict(data)
+        d["pred"] = round(float(d["pred"].sum()), 3)
+        return d
+
+
+class LinearTask(BasicInferTask):
+    """
+    Infer task of a (4 MB) linear network loaded from ``path``
+    """
+
+    def __init__(self, path):
+        super().__init__(
+            path=path,
+            network=torch.nn.Linear(1024, 1024),
+            type=InferType.SEGMENTATION,
+            labels=None,
+            dimension=2,
+            description="linear",
+        )
+
+    def pre_transforms(self, data=None):
+        return []
+
+    def post_transforms(self, data=None):
+        return []
@@ -0,0 +1,90 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import torch
+
+import monailabel.tasks.infer.registry as registry
+from monailabel.interfaces.app import MONAILabelApp
+from monailabel.interfaces.tasks.infer_v2 import InferTask, InferType
+from monailabel.tasks.infer.registry import ModelRegistry
+from monailabel.utils.others.generic import name_to_device
+from tests.unit.fakes import LinearTask
+
+
+class RemoteTask(InferTask):
+    def __init__(self):
+        super().__init__(type=InferType.SEGMENTATION, labels=None, dimension=2, description="remote")
+
+    def is_valid(self):
+        return True
+
+    def __call__(self, request):
+        return "", {}
+
+
+class TestWarmup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = registry._registry
+        self.tmp = tempfile.TemporaryDirectory()
+
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(self.tmp.name, f"model{i}.pt"))
+            torch.save(torch.nn.Linear(1024, 1024).state_dict(), paths[-1])
+
+        class App(MONAILabelApp):
+            def init_infers(self):
+                infers = {f"model{i}": LinearTask(p) for i, p in enumerate(paths)}
+                infers["remote"] = RemoteTask()
+                return infers
+
+        self.app = App(self.tmp.name, self.tmp.name, conf={})
+
+    def tearDown(self) -> None:
+        registry._registry = self.registry
+        self.tmp.cleanup()
+
+    def test_device(self):
+        registry._registry = ModelRegistry(budget={})
+        status = self.app.warmup(["model0"], forward=False)
+
+        # same device (and cache key) as the default infer request
+        device = name_to_device("cuda")
+        self.assertEqual(status["model0"]["status"], "ready")
+        self.assertEqual(list(status["model0"]["latencies"].keys()), [device])
+
+        # first request is served from the warmed up cache
+        self.app._infers["model0"]._get_network(device, None)
+        stats = registry.model_registry().stats()
+        self.assertEqual((stats["hits"], stats["loads"]), (1, 1))
+
+    def test_no_warmup(self):
+        registry._registry = ModelRegistry(budget={})
+        status = self.app.warmup(["remote"], forward=False)
+        self.assertEqual(status["remote"]["status"], "skipped")
+
+    def test_budget(self):
+        # room for one (4 MB) model only
+        device = name_to_device("cuda")
+        registry._registry = ModelRegistry(budget={device.split(":")[0]: 6, "cpu": 6})
+        status = self.app.warmup(None, forward=False)
+
+        self.assertEqual([status[m]["status"] for m in ("model0", "model1", "model2")], ["ready", "skipped", "skipped"])
+        stats = registry.model_registry().stats()
+        self.assertEqual((stats["loads"], stats["offloads"], stats["evictions"]), (1, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
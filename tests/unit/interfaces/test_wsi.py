@@ -0,0 +1,84 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import monailabel.utils.others.slide_cache as slide_cache
+from monailabel.interfaces.utils.wsi import create_infer_wsi_tasks, filter_infer_wsi_tasks, otsu_threshold
+from monailabel.utils.others.slide_cache import SlidePool
+from tests.unit.fakes import TissueSlide
+
+
+class TestTissueFilter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = slide_cache._pool
+        slide_cache._pool = SlidePool(opener=TissueSlide)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.image = os.path.join(self.tmp.name, "slide.svs")
+        with open(self.image, "w") as fp:
+            fp.write("slide")
+
+    def tearDown(self) -> None:
+        slide_cache._pool = self.pool
+        self.tmp.cleanup()
+
+    def test_otsu(self):
+        values = np.concatenate([np.full(100, 10), np.full(50, 200)]).astype(np.uint8)
+        self.assertTrue(10 <= otsu_threshold(values) < 200)
+
+    def test_filter(self):
+        request = {"tile_size": (1024, 1024)}
+        tasks = create_infer_wsi_tasks(request, self.image)
+        self.assertEqual(len(tasks), 32)
+
+        # disabled by default
+        self.assertEqual(filter_infer_wsi_tasks(request, self.image, tasks), (tasks, {}))
+
+        for level in (None, 1, -1):
+            request = {"tile_size": (1024, 1024), "tissue_filter": True, "tissue_level": level}
+            result, stats = filter_infer_wsi_tasks(request, self.image, create_infer_wsi_tasks(request, self.image))
+            self.assertEqual(len(result), 16)
+            self.assertEqual((stats["tiles"], stats["skipped"]), (32, 16))
+            self.assertTrue(all(t["location"][0] < 4096 and t["tissue"] == 1.0 for t in result))
+            self.assertEqual([t["id"] for t in result], list(range(16)))
+
+        # down-prioritise instead of skip
+        request = {"tile_size": (1024, 1024), "tissue_filter": True, "tissue_action": "last"}
+        result, stats = filter_infer_wsi_tasks(request, self.image, create_infer_wsi_tasks(request, self.image))
+        self.assertEqual((len(result), stats["empty"], stats["skipped"]), (32, 16, 0))
+        self.assertTrue(all(t["location"][0] >= 4096 for t in result[16:]))
+
+        # tile partially covering tissue
+        request = {"tissue_filter": True, "tissue_min_fraction": 0.6, "location": [3072, 0], "size": [2048, 1024]}
+        result, _ = filter_infer_wsi_tasks(request, self.image, create_infer_wsi_tasks(request, self.image))
+        self.assertEqual(result, [])
+
+    def test_overlap(self):
+        request = {"tile_size": (1024, 1024), "tile_overlap": 128}
+        tasks = create_infer_wsi_tasks(request, self.image)
+        self.assertEqual(len(tasks), 9 * 5)
+        self.assertEqual([t["location"] for t in tasks[:3]], [(0, 0), (896, 0), (1792, 0)])
+        self.assertEqual(tasks[8]["location"], (7168, 0))
+        self.assertEqual(tasks[8]["size"], (1024, 1024))
+        self.assertEqual(tasks[-1]["size"], (1024, 512))
+
+        # overlap is limited to half of the tile
+        request = {"tile_size": (1024, 1024), "tile_overlap": 4096, "location": [0, 0], "size": [2048, 1024]}
+        tasks = create_infer_wsi_tasks(request, self.image)
+        self.assertEqual([t["location"] for t in tasks], [(0, 0), (512, 0), (1024, 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from monailabel.tasks.infer.batcher import DynamicBatcher
+
+
+class TestDynamicBatcher(unittest.TestCase):
+    def test_single(self):
+        batcher = DynamicBatcher(max_batch_size=4, max_wait=0.0)
+        x = torch.ones(1, 8, 8)
+
+        out = batcher("k", x, lambda b: b * 2)
+        self.assertEqual(out.shape, x.shape)
+        self.assertTrue(torch.equal(out, x * 2))
+
+    def test_concurrent(self):
+        batcher = DynamicBatcher(max_batch_size=4, max_wait=0.5)
+        sizes = []
+
+        def forward(b):
+            sizes.append(b.shape[0])
+            return b + 1
+
+        inputs = [torch.full((1, 4, 4), float(i)) for i in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            outputs = list(executor.map(lambda x: batcher("k", x, forward), inputs))
+
+        for x, y in zip(inputs, outputs):
+            self.assertTrue(torch.equal(y, x + 1))
+        self.assertEqual(sum(sizes), 4)
+        self.assertLess(len(sizes), 4)
+        self.assertEqual(batcher.stats()["items"], 4)
+
+    def test_error(self):
+        batcher = DynamicBatcher(max_batch_size=2, max_wait=0.0)
+
+        def forward(b):
+            raise RuntimeError("failed")
+
+        with self.assertRaises(RuntimeError):
+            batcher("k", torch.zeros(1, 2, 2), forward)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import torch
+
+from monailabel.tasks.infer.bundle import BundleInferTask
+
+CONFIG = {
+    "displayable_configs": {"roi_size": [8, 8, 8], "threshold": 0.5},
+    "device": "$torch.device('cpu')",
+    "roi": "@displayable_configs#roi_size",
+    "network_def": {"_target_": "torch.nn.Identity"},
+    "preprocessing": {
+        "_target_": "Compose",
+        "transforms": [{"_target_": "EnsureChannelFirstd", "keys": "image", "channel_dim": "no_channel"}],
+    },
+    "inferer": {"_target_": "SlidingWindowInferer", "roi_size": "@roi", "sw_batch_size": 1},
+    "postprocessing": {
+        "_target_": "Compose",
+        "transforms": [
+            {"_target_": "AsDiscreted", "keys": "pred", "threshold": "@displayable_configs#threshold"},
+        ],
+    },
+}
+
+METADATA = {
+    "version": "0.1",
+    "description": "test bundle",
+    "network_data_format": {
+        "inputs": {"image": {"spatial_shape": [8, 8, 8]}},
+        "outputs": {"pred": {"channel_def": {"0": "background", "1": "spleen"}}},
+    },
+}
+
+
+class TestBundleInferTask(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "spleen_segmentation")
+        os.makedirs(os.path.join(self.path, "configs"))
+        os.makedirs(os.path.join(self.path, "models"))
+        self.config = os.path.join(self.path, "configs", "inference.json")
+        with open(self.config, "w") as fp:
+            json.dump(CONFIG, fp)
+        with open(os.path.join(self.path, "configs", "metadata.json"), "w") as fp:
+            json.dump(METADATA, fp)
+        torch.save({}, os.path.join(self.path, "models", "model.pt"))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_memoize(self):
+        task = BundleInferTask(self.path, {})
+        self.assertTrue(task.is_valid())
+
+        data = {"device": "cpu", "roi_size": [8, 8, 8], "threshold": 0.5}
+        pre = task.pre_transforms(data)
+        inferer = task.inferer(data)
+        post = task.post_transforms(data)
+        self.assertEqual(set(data["instantiate_latencies"]), {"pre_transforms", "inferer", "post_transforms"})
+
+        # same inputs => cached objects
+        data = {"device": "cpu", "roi_size": [8, 8, 8], "threshold": 0.5}
+        self.assertIs(task.pre_transforms(data)[0], pre[0])
+        self.assertIs(task.inferer(data), inferer)
+        self.assertIs(task.post_transforms(data)[0], post[0])
+        self.assertNotIn("instantiate_latencies", data)
+
+        # only objects depending on the changed config are re-created
+        data = {"device": "cpu", "roi_size": [16, 16, 16], "threshold": 0.5}
+        self.assertIs(task.pre_transforms(data)[0], pre[0])
+        self.assertIs(task.post_transforms(data)[0], post[0])
+        self.assertEqual(list(task.inferer(data).roi_size), [16, 16, 16])
+        self.assertEqual(list(data["instantiate_latencies"]), ["inferer"])
+
+        # device change
+        self.assertIsNot(task.pre_transforms({"device": "cuda"})[0], pre[0])
+
+        # compiled scripts (written on import) are not a bundle change
+        task.reload_interval = 0
+        os.makedirs(os.path.join(self.path, "scripts", "__pycache__"))
+        pyc = os.path.join(self.path, "scripts", "__pycache__", "transforms.cpython-39.pyc")
+        with open(pyc, "wb") as fp:
+            fp.write(b"")
+        ts = time.time() + 10
+        os.utime(pyc, (ts, ts))
+        self.assertIs(task.post_transforms(data)[0], post[0])
+
+        # bundle config changed on disk; checked at most once every reload_interval seconds
+        task.reload_interval = 3600
+        config = dict(CONFIG, inferer={"_target_": "SimpleInferer"})
+        with open(self.config, "w") as fp:
+            json.dump(config, fp)
+        os.utime(self.config, (ts, ts))
+        self.assertEqual(task.inferer(data).__class__.__name__, "SlidingWindowInferer")
+
+        task.reload_interval = 0
+        self.assertEqual(task.inferer(data).__class__.__name__, "SimpleInferer")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+import torch
+
+from monailabel.interfaces.tasks.infer_v2 import InferType
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+from monailabel.tasks.infer.pipeline import PipelinedInferExecutor
+from tests.unit.fakes import LoadImage, SumPred
+
+
+class StageTask(BasicInferTask):
+    def __init__(self):
+        super().__init__(
+            path=None,
+            network=torch.nn.Conv2d(1, 2, 3, padding=1),
+            type=InferType.SEGMENTATION,
+            labels=None,
+            dimension=2,
+            description="stages",
+            max_batch_size=0,
+        )
+        self.intervals = []
+        self._lock = threading.Lock()
+
+    def pre_transforms(self, data=None):
+        return [LoadImage()]
+
+    def post_transforms(self, data=None):
+        return [SumPred()]
+
+    def writer(self, data, extension=None, dtype=None):
+        return None, {"pred": data["pred"]}
+
+    def run_stage_infer(self, ctx):
+        start = time.time()
+        time.sleep(ctx["data"].get("delay", 0))
+        ctx = super().run_stage_infer(ctx)
+        with self._lock:
+            self.intervals.append(("infer", ctx["data"]["rid"], start, time.time()))
+        return ctx
+
+    def run_stage_pre(self, request, callbacks=None, pre_transforms=None):
+        start = time.time()
+        ctx = super().run_stage_pre(request, callbacks, pre_transforms)
+        with self._lock:
+            self.intervals.append(("pre", request.get("rid"), start, time.time()))
+        return ctx
+
+
+class TestPipelinedInferExecutor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.task = StageTask()
+        self.executor = PipelinedInferExecutor(max_workers=2)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def test_stages(self):
+        request = {"rid": 3, "image": 3, "device": "cpu"}
+        expected = self.task(dict(request))[1]
+
+        ctx = self.task.run_stage_pre(dict(request))
+        ctx = self.task.run_stage_infer(ctx)
+        ctx = self.task.run_stage_post(ctx)
+        _, result = self.task.run_stage_write(ctx)
+
+        self.assertEqual(result["pred"], expected["pred"])
+        self.assertEqual(set(result["latencies"].keys()), set(expected["latencies"].keys()))
+
+        _, result = self.executor.submit(self.task, dict(request)).result(timeout=30)
+        self.assertEqual(result["pred"], expected["pred"])
+
+    def test_overlap(self):
+        requests = [{"rid": i, "image": i, "device": "cpu", "delay": 0.1} for i in range(6)]
+        expected = [self.task(dict(r))[1]["pred"] for r in requests]
+        self.task.intervals.clear()
+
+        futures = [self.executor.submit(self.task, dict(r)) for r in requests]
+        results = [f.result(timeout=30)[1]["pred"] for f in futures]
+        self.assertEqual(results, expected)
+
+        # pre-transforms of a request run while the forward pass of another one is running
+        pre = [i for i in self.task.intervals if i[0] == "pre"]
+        infer = [i for i in self.task.intervals if i[0] == "infer"]
+        overlapped = any(p[1] != f[1] and p[2] < f[3] and f[2] < p[3] for p in pre for f in infer)
+        self.assertTrue(overlapped)
+
+    def test_error(self):
+        requests = [{"rid": i, "image": i, "device": "cpu", "fail": i == 1} for i in range(4)]
+        futures = [self.executor.submit(self.task, dict(r)) for r in requests]
+
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=30)
+        for i in (0, 2, 3):
+            self.assertIn("pred", futures[i].result(timeout=30)[1])
+
+        # pipeline keeps running after the failure
+        f = self.executor.submit(self.task, {"rid": 5, "image": 5, "device": "cpu"})
+        self.assertIn("pred", f.result(timeout=30)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import torch
+
+from monailabel.tasks.infer.registry import ModelRegistry, model_registry
+from tests.unit.fakes import LinearTask
+
+
+class TestModelRegistry(unittest.TestCase):
+    def test_hit_miss(self):
+        registry = ModelRegistry(budget={})
+        network = torch.nn.Linear(8, 8)
+
+        self.assertIsNone(registry.get(("a", "cpu", None), 1))
+        registry.put(("a", "cpu", None), "a", network, 1, "cpu")
+        self.assertIs(registry.get(("a", "cpu", None), 1), network)
+
+        # model file modified
+        self.assertIsNone(registry.get(("a", "cpu", None), 2))
+
+        stats = registry.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_evict(self):
+        registry = ModelRegistry(budget={"cpu": 6})
+        registry.put(("a", "cpu", None), "a", torch.nn.Linear(1024, 1024), 1, "cpu")
+        registry.put(("b", "cpu", None), "b", torch.nn.Linear(1024, 1024), 1, "cpu")
+
+        self.assertIsNone(registry.get(("a", "cpu", None), 1))
+        self.assertIsNotNone(registry.get(("b", "cpu", None), 1))
+        self.assertEqual(registry.stats()["evictions"], 1)
+
+    def test_pinned(self):
+        registry = ModelRegistry(budget={"cpu": 6})
+        network = torch.nn.Linear(1024, 1024)
+        registry.put(("a", "cpu", None), "a", network, 1, "cpu", owner="task1")
+
+        # pinned atomically by the lookup; never evicted until released
+        self.assertIs(registry.get(("a", "cpu", None), 1, owner="task2", pin=True), network)
+        registry.put(("b", "cpu", None), "b", torch.nn.Linear(1024, 1024), 1, "cpu")
+        self.assertIs(registry.get(("a", "cpu", None), 1), network)
+
+        registry.release(network)
+        registry.put(("c", "cpu", None), "c", torch.nn.Linear(1024, 1024), 1, "cpu")
+        self.assertIsNone(registry.get(("a", "cpu", None), 1))
+
+    def test_owners(self):
+        registry = ModelRegistry(budget={})
+        network = torch.nn.Linear(8, 8)
+        registry.put(("a", "cpu", None), "a", network, 1, "cpu", owner="task1")
+        self.assertIs(registry.get(("a", "cpu", None), 1, owner="task2"), network)
+
+        # dropped only when no task uses it anymore
+        registry.remove("task1")
+        self.assertIs(registry.get(("a", "cpu", None), 1), network)
+        registry.remove("task2")
+        self.assertIsNone(registry.get(("a", "cpu", None), 1))
+
+    def test_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.pt")
+            torch.save(torch.nn.Linear(1024, 1024).state_dict(), path)
+
+            task1, task2 = LinearTask(path), LinearTask(path)
+            network = task1._get_network("cpu", None)
+            self.assertIs(task2._get_network("cpu", None), network)
+
+            # network is pinned only while in use
+            with task1._network("cpu", None) as n:
+                self.assertIs(n, network)
+                self.assertEqual(model_registry()._entries[(path, "cpu", "Linear", False)].in_use, 1)
+            self.assertEqual(model_registry()._entries[(path, "cpu", "Linear", False)].in_use, 0)
+
+            task1.clear()
+            task2.clear()
+            self.assertIsNone(model_registry().get((path, "cpu", "Linear", False), os.stat(path).st_mtime))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import torch
+
+from monailabel.interfaces.tasks.infer_v2 import InferType
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+from monailabel.tasks.infer.wsi import WSIInferEngine, wsi_infer_engine
+from tests.unit.fakes import LoadImage, SumPred
+
+
+class TileTask(BasicInferTask):
+    def __init__(self):
+        super().__init__(
+            path=None,
+            network=torch.nn.Conv2d(1, 2, 3, padding=1),
+            type=InferType.SEGMENTATION,
+            labels=None,
+            dimension=2,
+            description="tiles",
+            max_batch_size=0,
+        )
+        self.created = 0
+
+    def pre_transforms(self, data=None):
+        self.created += 1
+        return [LoadImage()]
+
+    def post_transforms(self, data=None):
+        return [SumPred()]
+
+    def writer(self, data, extension=None, dtype=None):
+        return None, {"pred": data["pred"]}
+
+
+class TestWSIInferEngine(unittest.TestCase):
+    def test_engine(self):
+        task = TileTask()
+        requests = []
+        for i in range(10):
+            size = (16, 16) if i < 8 else (8, 16)  # edge tiles
+            requests.append({"id": i, "device": "cpu", "location": (i * 16, 0), "size": size})
+
+        expected = [task(dict(r))[1]["pred"] for r in requests]
+        created = task.created
+
+        engine = WSIInferEngine(task, batch_size=3, max_workers=2, device_workers=1)
+        results = engine.run(requests)
+        for e, r in zip(expected, results):
+            self.assertAlmostEqual(e, r["pred"], places=3)
+            self.assertIn("infer", r["latencies"])
+
+        # tiles of different shape are never mixed; pre-transforms are created once for the device
+        stats = engine.stats()
+        self.assertEqual(stats["tiles"], 10)
+        self.assertGreaterEqual(stats["batches"], 4)
+        self.assertLess(stats["batches"], 10)
+        self.assertEqual(task.created - created, 1)
+
+    def test_callback(self):
+        requests = [{"device": "cpu", "location": (i, 0), "size": (8, 8)} for i in range(5)]
+        seen = []
+
+        def callback(idx, res):
+            seen.append(idx)
+            return res["pred"]
+
+        results = WSIInferEngine(TileTask(), batch_size=2).run(requests, callback=callback)
+        self.assertEqual(sorted(seen), list(range(5)))
+        self.assertTrue(all(isinstance(r, float) for r in results))
+
+    def test_error(self):
+        engine = WSIInferEngine(TileTask(), batch_size=2)
+        with self.assertRaises(ValueError):
+            engine.run([{"device": "cpu", "location": (0, 0), "fail": True}])
+
+    def test_config(self):
+        task = TileTask()
+        self.assertIsNone(wsi_infer_engine(task, {"wsi_batch_size": 0}, 2))
+        engine = wsi_infer_engine(task, {"wsi_batch_size": 8, "wsi_device_workers": 2}, 2)
+        self.assertEqual((engine.batch_size, engine.device_workers), (8, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import torch
+from monai.data import MetaTensor
+
+from monailabel.config import settings
+from monailabel.transform.cache import CacheTransformDatad, TransformCache, file_identity, transforms_fingerprint
+
+
+class TestTransformCache(unittest.TestCase):
+    def test_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TransformCache(tmp, mem_budget=1024 * 1024, disk_budget=0)
+            x = MetaTensor(torch.rand(1, 8, 8), applied_operations=[{"id": "a"}])
+            cache.put("k", x, ttl=60)
+
+            y = cache.get("k")
+            self.assertTrue(torch.equal(y.as_tensor(), x.as_tensor()))
+            self.assertEqual(y.data_ptr(), cache.get("k").data_ptr())  # zero-copy
+
+            # copied on put; in-place operations on the source don't modify the cached entry
+            self.assertNotEqual(y.data_ptr(), x.data_ptr())
+            x += 1
+            self.assertFalse(torch.equal(cache.get("k").as_tensor(), x.as_tensor()))
+
+            y.applied_operations[0]["id"] = "none"
+            self.assertEqual(cache.get("k").applied_operations[0]["id"], "a")
+
+            self.assertIsNone(cache.get("unknown"))
+            stats = cache.stats()
+            self.assertEqual(stats["hits_mem"], 4)
+            self.assertEqual(stats["misses"], 1)
+
+    def test_spill(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TransformCache(tmp, mem_budget=1000, disk_budget=1024 * 1024)
+            cache.put("a", torch.rand(200), ttl=60)
+            cache.put("b", torch.rand(200), ttl=60)
+
+            self.assertEqual(cache.stats()["spills"], 1)
+            self.assertIsNotNone(cache.get("a"))
+            self.assertEqual(cache.stats()["hits_disk"], 1)
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TransformCache(tmp, mem_budget=0, disk_budget=1024 * 1024)
+            x = MetaTensor(torch.rand(1, 8, 8), meta={"filename_or_obj": "a.nii.gz"}, applied_operations=[{"id": 1}])
+            d = {"image": x, "spacing": np.array([1.0, 2.0]), "shape": (8, 8), "label": None}
+            cache.put("k", d, ttl=60, in_memory=False)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "k", TransformCache.SIDECAR)))
+
+            y = cache.get("k")
+            self.assertIsInstance(y["image"], MetaTensor)
+            self.assertTrue(torch.equal(y["image"].as_tensor(), x.as_tensor()))
+            self.assertTrue(torch.equal(y["image"].affine, x.affine))
+            self.assertEqual(y["image"].meta["filename_or_obj"], "a.nii.gz")
+            self.assertEqual(y["image"].applied_operations, [{"id": 1}])
+            self.assertTrue(np.array_equal(y["spacing"], d["spacing"]))
+            self.assertEqual(y["shape"], (8, 8))
+            self.assertIsNone(y["label"])
+
+            # copy-on-write mapping; cached entry is not modified
+            y["image"] += 1
+            self.assertTrue(torch.equal(cache.get("k")["image"].as_tensor(), x.as_tensor()))
+
+    def test_disk_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            c1 = TransformCache(tmp, mem_budget=0, disk_budget=1024 * 1024)
+            c2 = TransformCache(tmp, mem_budget=0, disk_budget=1024 * 1024)
+            x = torch.rand(16)
+            c1.put("k", x, ttl=60)
+
+            self.assertTrue(torch.equal(c2.get("k"), x))
+            self.assertTrue(torch.equal(TransformCache(tmp, 0, 1024 * 1024).get("k"), x))
+            self.assertEqual(c2.stats()["disk"]["entries"], 1)
+
+    def test_no_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TransformCache(tmp, mem_budget=1024 * 1024, disk_budget=0)
+            d = {"image": np.zeros((8, 8))}
+            cache.put("k", d, ttl=60, in_memory=False)
+            self.assertFalse(os.path.exists(os.path.join(tmp, "k")))
+
+            d["image"] += 1
+            self.assertTrue(np.array_equal(cache.get("k")["image"], np.zeros((8, 8))))
+
+    def test_default_settings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TransformCache(
+                tmp,
+                mem_budget=settings.MONAI_LABEL_TRANSFORM_CACHE_MEM_MB * 1024 * 1024,
+                disk_budget=settings.MONAI_LABEL_TRANSFORM_CACHE_DISK_MB * 1024 * 1024,
+            )
+            with patch("monailabel.transform.cache.init_cache", return_value=cache):
+                t = CacheTransformDatad(keys="image", hash_key="image_path", in_memory=False)
+
+            d = {"image_path": "image.nii.gz", "image": np.random.rand(8, 8)}
+            t(d)
+            self.assertEqual(cache.stats()["disk"]["entries"], 1)
+            self.assertTrue(np.array_equal(t.load(d)["image"], d["image"]))
+
+    def test_disk_shared_budget(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            c1 = TransformCache(tmp, mem_budget=0, disk_budget=1024 * 1024)
+            for k in ("a", "b", "c"):
+                c1.put(k, torch.rand(100), ttl=60)
+                time.sleep(0.01)
+
+            # entries written by others (or previous run) are evicted down to budget
+            c2 = TransformCache(tmp, mem_budget=0, disk_budget=1000)
+            self.assertEqual(c2.stats()["disk"]["entries"], 2)
+            self.assertEqual(c2.stats()["evictions"], 1)
+            self.assertFalse(os.path.exists(os.path.join(tmp, "a")))
+
+            c1.put("d", torch.rand(100), ttl=60)
+            self.assertIsNotNone(c2.get("d"))
+            self.assertLessEqual(c2.stats()["disk"]["bytes"], 1000)
+
+    def test_expiry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TransformCache(tmp, mem_budget=1024 * 1024, disk_budget=0)
+            cache.put("k", torch.rand(8), ttl=0)
+            time.sleep(0.01)
+            self.assertIsNone(cache.get("k"))
+
+    def test_identity(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            f = os.path.join(tmp, "image.nii.gz")
+            with open(f, "w") as fp:
+                fp.write("a")
+            i1 = file_identity(f)
+
+            with open(f, "w") as fp:
+                fp.write("ab")
+            self.assertNotEqual(i1, file_identity(f))
+
+        self.assertNotEqual(transforms_fingerprint([1, "a"]), transforms_fingerprint([1, "b"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
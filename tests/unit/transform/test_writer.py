@@ -14,6 +14,7 @@ import os
 import pathlib
 import unittest
 
+import nibabel as nib
 import nrrd
 import numpy as np
 import torch
@@ -160,6 +161,44 @@ class TestWriter(unittest.TestCase):
         file_ext = "".join(pathlib.Path(input_data["image_path"]).suffixes)
         self.assertIn(file_ext.lower(), [".nii", ".nii.gz"])
 
+    def test_fast(self):
+        label = np.random.randint(0, 3, (WIDTH, HEIGHT, 7)).astype(np.float32)
+        affine = np.diag([0.5, 0.5, 2.0, 1.0])
+        input_data = {"pred": label, "pred_meta_dict": {"affine": affine}, "image_path": "fakepath.nii.gz"}
+
+        writer = Writer(label="pred", fast=True, threads=2)
+        output_file, _ = writer(dict(input_data, result_dtype=np.uint8))
+        self.assertTrue(output_file.endswith(".nii.gz"))
+        img = nib.load(output_file)
+        self.assertTrue(np.array_equal(np.asarray(img.dataobj), label.astype(np.uint8)))
+        self.assertTrue(np.allclose(img.affine, affine))
+
+        data = dict(input_data, result_compress_level=0)
+        output_file, _ = writer(data)
+        self.assertTrue(output_file.endswith(".nii"))
+        self.assertTrue(np.array_equal(np.asarray(nib.load(output_file).dataobj), label))
+        self.assertIn("file", data["write_latencies"])
+
+        input_data["pred"] = np.random.randint(0, 2, (CHANNELS, WIDTH, HEIGHT, 3)).astype(np.float32)
+        output_file, _ = writer(dict(input_data, result_extension=".seg.nrrd", labels=["heart", "lung"]))
+        arr, header = nrrd.read(output_file)
+        self.assertTrue(np.array_equal(arr, input_data["pred"]))
+        self.assertEqual(header["encoding"], "gzip")
+        self.assertEqual((header["sizes"].tolist(), header["Segment1_Name"]), ([CHANNELS, WIDTH, HEIGHT, 3], "lung"))
+
+    def test_sparse(self):
+        label = np.random.randint(0, 3, (WIDTH, HEIGHT, 7)).astype(np.float32)
+        input_data = {"pred": label, "pred_meta_dict": {"affine": np.identity(4)}, "image_path": "fakepath.nii.gz"}
+
+        output_file, data = Writer(label="pred")(dict(input_data, result_sparse=True))
+        self.assertIsNone(output_file)
+        self.assertEqual(data["label_sparse"]["shape"], list(label.shape))
+
+        # label is still written to be saved into datastore
+        output_file, data = Writer(label="pred")(dict(input_data, result_sparse=True, save_label=True))
+        self.assertTrue(os.path.exists(output_file))
+        self.assertIn("label_sparse", data)
+
 
 class TestPolygonWriter(unittest.TestCase):
     @parameterized.expand([POLYGONWRITER_DATA])
@@ -0,0 +1,51 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import unittest
+
+from fastapi import HTTPException
+
+from monailabel.utils.async_tasks.executor import BoundedExecutor, endpoint_executor
+
+
+class TestBoundedExecutor(unittest.TestCase):
+    def test_run(self):
+        executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+        result = asyncio.run(executor.run(lambda x, y=1: x + y, 1, y=2))
+        self.assertEqual(result, 3)
+        self.assertEqual(executor.pending(), 0)
+
+    def test_saturated(self):
+        executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+        event = threading.Event()
+
+        async def run_all():
+            tasks = [asyncio.ensure_future(executor.run(event.wait, 5)) for _ in range(3)]
+            await asyncio.sleep(0.1)
+            event.set()
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = asyncio.run(run_all())
+        errors = [r for r in results if isinstance(r, HTTPException)]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].status_code, 429)
+
+    def test_endpoint_executors(self):
+        # long running wsi requests do not share (and block) the interactive infer pool
+        self.assertIs(endpoint_executor("infer"), endpoint_executor("infer"))
+        self.assertIsNot(endpoint_executor("infer"), endpoint_executor("wsi"))
+        self.assertIsNot(endpoint_executor("wsi"), endpoint_executor("datastore"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from monailabel.client.client import MONAILabelUtils
+from monailabel.utils.others.label_codec import decode_sparse_label, encode_sparse_label
+
+
+class TestLabelCodec(unittest.TestCase):
+    def setUp(self) -> None:
+        self.label = np.zeros((64, 64, 32), dtype=np.uint8)
+        self.label[10:20, 30:50, 5:15] = 1
+
+    def test_encode(self):
+        for encoding in ["auto", "rle", "bitpack"]:
+            sparse = encode_sparse_label(self.label, encoding=encoding)
+            self.assertEqual(sparse["bbox"], [[10, 20], [30, 50], [5, 15]])
+            self.assertFalse(sparse["delta"])
+            np.testing.assert_array_equal(decode_sparse_label(sparse), self.label)
+            np.testing.assert_array_equal(MONAILabelUtils.decode_sparse_label(sparse), self.label)
+
+        sparse = encode_sparse_label(np.zeros((8, 8), dtype=np.uint8))
+        self.assertIsNone(sparse["bbox"])
+        np.testing.assert_array_equal(decode_sparse_label(sparse), np.zeros((8, 8), dtype=np.uint8))
+
+    def test_delta(self):
+        label = self.label.copy()
+        label[12:14, 32:34, 6] = 0
+        label[40:42, 1:3, 20] = 2
+
+        sparse = encode_sparse_label(label, prev=self.label)
+        self.assertTrue(sparse["delta"])
+        self.assertEqual(sparse["bbox"], [[12, 42], [1, 34], [6, 21]])
+        np.testing.assert_array_equal(decode_sparse_label(sparse, prev=self.label), label)
+        np.testing.assert_array_equal(MONAILabelUtils.decode_sparse_label(sparse, prev=self.label), label)
+
+        with self.assertRaises(ValueError):
+            decode_sparse_label(sparse)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import unittest
+import xml.etree.ElementTree
+
+import numpy as np
+
+from monailabel.utils.others.pathology import (
+    AnnotationWriter,
+    create_annotation_writer,
+    create_asap_annotations_xml,
+    create_dsa_annotations_json,
+    create_geojson_annotations,
+    format_rows,
+)
+
+
+def _tile(tid):
+    return {
+        "annotation": {
+            "labels": {"Neoplastic": (255, 0, 0), "Inflammatory": (255, 255, 0)},
+            "elements": [
+                {"label": "Neoplastic", "contours": [[[tid, 0], [tid + 2, 0], [tid + 2, 2]], [[5, 5], [6, 6], [5, 7]]]},
+                {"label": "Inflammatory", "contours": [[[tid, 10], [tid + 1, 11], [tid, 12], [tid, 10]]]},
+            ],
+        },
+        "latencies": {"total": 1.0},
+    }
+
+
+META = {"name": "test", "description": "desc", "model": "model", "location": [0, 0], "size": [100, 100]}
+
+
+class TestAnnotationWriter(unittest.TestCase):
+    def test_dsa(self):
+        json_data = dict(META, annotations=[_tile(i) if i % 3 else None for i in range(6)])
+        output_file, count = create_dsa_annotations_json(json_data)
+        with open(output_file) as fp:
+            d = json.load(fp)
+        os.unlink(output_file)
+
+        self.assertEqual(count, 12)
+        self.assertEqual(len(d["elements"]), 12)
+        self.assertEqual(d["elements"][0]["points"], [[1, 0, 0], [3, 0, 0], [3, 2, 0]])
+        self.assertEqual(d["elements"][0]["lineColor"], "rgb(255,0,0)")
+        self.assertEqual(json.loads(d["description"])["count"], 12)
+
+    def test_asap(self):
+        output_file, count = create_asap_annotations_xml(dict(META, annotations=[_tile(1)]))
+        root = xml.etree.ElementTree.parse(output_file).getroot()
+        os.unlink(output_file)
+
+        annotations = list(root.iter("Annotation"))
+        self.assertEqual(count, 3)
+        self.assertEqual(len(annotations), 3)
+        self.assertEqual(annotations[0].get("Color"), "#ff0000")
+        coords = [(int(c.get("Order")), int(c.get("X")), int(c.get("Y"))) for c in annotations[2].iter("Coordinate")]
+        self.assertEqual(coords, [(0, 1, 10), (1, 2, 11), (2, 1, 12), (3, 1, 10)])
+        self.assertEqual({g.get("Name") for g in root.iter("Group")}, {"Neoplastic", "Inflammatory"})
+
+    def test_geojson(self):
+        output_file, count = create_geojson_annotations(dict(META, annotations=[_tile(1)]))
+        with open(output_file) as fp:
+            d = json.load(fp)
+        os.unlink(output_file)
+
+        self.assertEqual(d["type"], "FeatureCollection")
+        self.assertEqual(len(d["features"]), count)
+        for f in d["features"]:
+            ring = f["geometry"]["coordinates"][0]
+            self.assertEqual(ring[0], ring[-1])
+        self.assertEqual(d["features"][0]["properties"]["classification"], {"name": "Neoplastic", "color": [255, 0, 0]})
+
+    def test_format_rows(self):
+        points = np.array([[1.5, 2.0], [3.0, 4.25]])
+        self.assertEqual(list(format_rows("[{}, {}]", points[:, 0], points[:, 1])), ["[1.5, 2.0]", "[3.0, 4.25]"])
+        self.assertEqual(list(format_rows("<{}>", np.arange(0))), [])
+        self.assertRaises(TypeError, AnnotationWriter, META)
+
+    def test_streaming(self):
+        writer = create_annotation_writer("dsa", META, total=4)
+        self.assertIsNone(create_annotation_writer("json", META))
+
+        # out of order; partial snapshot is a valid document
+        writer.add(_tile(3))
+        writer.add(None)
+        self.assertEqual(writer.status(), {"tiles": 2, "total": 4, "count": 3})
+
+        partial = writer.snapshot()
+        with open(partial) as fp:
+            self.assertEqual(len(json.load(fp)["elements"]), 3)
+        os.unlink(partial)
+
+        writer.add(_tile(0))
+        writer.add(_tile(1))
+        output_file, count = writer.close({"total": 1})
+        with open(output_file) as fp:
+            d = json.load(fp)
+        os.unlink(output_file)
+        self.assertEqual((count, len(d["elements"])), (9, 9))
+        self.assertEqual(json.loads(d["description"])["latencies"], {"total": 1})
+
+        writer = create_annotation_writer("asap", META)
+        writer.abort()
+        self.assertFalse(os.path.exists(writer.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
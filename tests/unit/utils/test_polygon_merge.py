@@ -0,0 +1,88 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from monailabel.utils.others.polygon_merge import TilePolygonMerger
+
+
+def _box(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def _res(*contours):
+    elements = [{"label": "Nuclei", "contours": list(contours)}]
+    return {"annotation": {"labels": {"Nuclei": (255, 0, 0)}, "elements": elements}, "latencies": {"total": 1.0}}
+
+
+class TestTilePolygonMerger(unittest.TestCase):
+    def test_merge(self):
+        # two tiles (100 x 100) overlapping by 20 pixels and one empty tile below
+        tiles = [
+            {"id": 0, "location": (0, 0), "size": (100, 100)},
+            {"id": 1, "location": (80, 0), "size": (100, 100)},
+            {"id": 2, "location": (0, 80), "size": (180, 100)},
+        ]
+        merger = TilePolygonMerger(tiles)
+
+        exclusive = _box(10, 10, 20, 20)
+        duplicate = _box(85, 40, 95, 50)  # complete in both tiles
+        partial = _box(80, 60, 95, 70)  # complete in tile 0; clipped by the left edge of tile 1
+        res = merger.add(0, _res(exclusive, duplicate, _box(60, 10, 99, 30), _box(70, 60, 95, 70)))
+        self.assertEqual(res["annotation"]["elements"][0]["contours"], [exclusive])
+        self.assertEqual(res["latencies"], {"total": 1.0})
+
+        res = merger.add(1, _res(_box(150, 10, 160, 20), duplicate, _box(80, 10, 130, 30), partial))
+        self.assertEqual(len(res["annotation"]["elements"][0]["contours"]), 1)
+        self.assertIsNone(merger.add(2, None))
+
+        result, stats = merger.merge()
+        contours = result["annotation"]["elements"][0]["contours"]
+        self.assertEqual(result["annotation"]["labels"], {"Nuclei": (255, 0, 0)})
+
+        bounds = sorted(tuple(np.min(c, axis=0)) + tuple(np.max(c, axis=0)) for c in contours)
+        self.assertEqual(bounds, [(60, 10, 130, 30), (70, 60, 95, 70), (85, 40, 95, 50)])
+
+        self.assertEqual((stats["tiles"], stats["polygons"], stats["exclusive"], stats["seam"]), (3, 8, 2, 6))
+        self.assertEqual((stats["duplicates"], stats["partials"], stats["merged"], stats["unions"]), (1, 1, 1, 2))
+        self.assertEqual(stats["output"], 5)
+
+    def test_labels(self):
+        tiles = [{"id": 0, "location": (0, 0), "size": (100, 100)}, {"id": 1, "location": (100, 0), "size": (100, 100)}]
+        merger = TilePolygonMerger(tiles)
+
+        # same object across the seam but different labels are never merged
+        merger.add(0, _res(_box(90, 10, 99, 20)))
+        res = _res(_box(100, 10, 110, 20))
+        res["annotation"]["elements"][0]["label"] = "Other"
+        merger.add(1, res)
+
+        result, stats = merger.merge()
+        self.assertEqual(sorted(e["label"] for e in result["annotation"]["elements"]), ["Nuclei", "Other"])
+        self.assertEqual((stats["merged"], stats["output"]), (0, 2))
+
+    def test_invalid(self):
+        tiles = [{"id": 0, "location": (0, 0), "size": (100, 100)}, {"id": 1, "location": (80, 0), "size": (100, 100)}]
+        merger = TilePolygonMerger(tiles)
+
+        # degenerate (zero area) polygon near the seam is passed through as is
+        line = [[85, 10], [90, 10], [95, 10]]
+        res = merger.add(0, _res(line))
+        self.assertEqual(res["annotation"]["elements"][0]["contours"], [line])
+
+        _, stats = merger.merge()
+        self.assertEqual((stats["polygons"], stats["exclusive"], stats["invalid"], stats["output"]), (1, 1, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from monailabel.utils.others.slide_cache import SlidePool, slide_request_stats
+from tests.unit.fakes import FakeSlide
+
+
+class TestSlidePool(unittest.TestCase):
+    def setUp(self) -> None:
+        FakeSlide.opened = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for i in range(3):
+            f = os.path.join(self.tmp.name, f"slide{i}.svs")
+            with open(f, "w") as fp:
+                fp.write(f"slide{i}")
+            self.files.append(f)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_handles(self):
+        pool = SlidePool(max_handles=2, opener=FakeSlide)
+
+        with ThreadPoolExecutor(4) as e:
+            dims = list(e.map(lambda _: pool.dimensions(self.files[0]), range(16)))
+        self.assertEqual(set(dims), {(1000, 800)})
+        self.assertEqual(pool.dimensions(self.files[0], level=1), (250, 200))
+        self.assertEqual(len(FakeSlide.opened), 1)
+
+        # least recently used handle is closed; but only after it is released
+        with pool.slide(self.files[0]) as slide:
+            pool.dimensions(self.files[1])
+            pool.dimensions(self.files[2])
+            self.assertFalse(slide.closed)
+        self.assertTrue(slide.closed)
+        self.assertEqual(pool.stats()["handles"], 2)
+        self.assertEqual(pool.stats()["evictions"], 1)
+
+        # modified file is re-opened
+        with open(self.files[1], "a") as fp:
+            fp.write("modified")
+        pool.dimensions(self.files[1])
+        self.assertEqual(len(FakeSlide.opened), 4)
+
+        pool.clear()
+        self.assertTrue(all(s.closed for s in FakeSlide.opened))
+
+    def test_regions(self):
+        tile = 64 * 64 * 4
+        pool = SlidePool(max_handles=2, cache_bytes=2 * tile, opener=FakeSlide)
+
+        img = pool.read_region(self.files[0], (10, 20), 0, (64, 64))
+        self.assertEqual(img.getpixel((0, 0)), (10, 20, 0, 255))
+        self.assertIs(pool.read_region(self.files[0], (10, 20), 0, (64, 64)), img)
+        pool.read_region(self.files[0], (64, 0), 0, (64, 64))
+        pool.read_region(self.files[0], (128, 0), 0, (64, 64))
+        pool.read_region(self.files[0], (0, 0), 0, (512, 512), cache=False)
+
+        stats = pool.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["reads"]), (1, 3, 4))
+        self.assertEqual(stats["cached_bytes"], 2 * tile)
+        self.assertEqual(stats["opens"], 1)
+        self.assertGreaterEqual(stats["read_time"], 0)
+
+        # evicted (least recently used) region is read again
+        pool.read_region(self.files[0], (10, 20), 0, (64, 64))
+        self.assertEqual(FakeSlide.opened[0].reads, 5)
+
+    def test_request_stats(self):
+        pool = SlidePool(max_handles=2, opener=FakeSlide)
+
+        def request(n):
+            stats = slide_request_stats()
+            # tile workers running in a copy of the request context count towards the request
+            with ThreadPoolExecutor(2) as e:
+                for i in range(n):
+                    e.submit(contextvars.copy_context().run, pool.read_region, self.files[0], (i, 0), 0, (8, 8))
+            return dict(stats)
+
+        with ThreadPoolExecutor(2) as e:
+            results = list(e.map(lambda n: contextvars.copy_context().run(request, n), (3, 5)))
+
+        self.assertEqual([r["reads"] for r in results], [3, 5])
+        self.assertEqual(sum(r["opens"] for r in results), 1)
+        self.assertEqual(pool.stats()["reads"], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
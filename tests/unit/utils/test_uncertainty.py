@@ -0,0 +1,108 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+import time
+import tracemalloc
+import unittest
+
+import numpy as np
+import torch
+
+from monailabel.utils.others.uncertainty import entropy_map, entropy_score, variance_map, variance_score
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_entropy(vol_input):
+    vol_input = vol_input.astype(dtype="float32")
+    dims = vol_input.shape
+    reps = dims[0]
+    entropy = np.zeros(dims[2:], dtype="float32")
+    vol_input[vol_input <= 0] = 0.00005
+    for channel in range(dims[1]):
+        t_vol = np.squeeze(vol_input[:, channel])
+        t_avg = np.divide(np.sum(t_vol, axis=0), reps)
+        entropy = entropy + -np.multiply(t_avg, np.log(t_avg))
+    return entropy
+
+
+def legacy_variance(vol_input):
+    vol_input = vol_input.copy()
+    vol_input[vol_input <= 0] = 0.0005
+    return np.sum(np.nanvar(vol_input, axis=0), axis=0)
+
+
+def measure(fn, *args, **kwargs):
+    tracemalloc.start()
+    start = time.time()
+    result = fn(*args, **kwargs)
+    latency = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, latency, peak
+
+
+class TestUncertainty(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(0)
+
+    def test_entropy(self):
+        vol = self.rng.random((5, 3, 9, 7, 6), dtype=np.float32)
+        vol[vol < 0.1] = 0
+
+        expected = legacy_entropy(vol)
+        for chunk_size in (1, 100, 10**6):
+            result = entropy_map(vol, chunk_size=chunk_size)
+            self.assertEqual(result.shape, expected.shape)
+            self.assertTrue(np.allclose(result, expected, atol=1e-6))
+            self.assertAlmostEqual(entropy_score(vol, chunk_size=chunk_size), float(np.nanmean(expected)), places=5)
+
+        # input is not modified; tensors/views are accepted
+        self.assertTrue(np.any(vol == 0))
+        self.assertTrue(np.allclose(entropy_map(torch.from_numpy(vol), chunk_size=50), expected, atol=1e-6))
+        self.assertTrue(np.allclose(entropy_map(vol[:, 1:], chunk_size=50), legacy_entropy(vol[:, 1:]), atol=1e-6))
+
+        # no channels
+        result = entropy_map(vol[:, 0], channel_dim=False, chunk_size=50)
+        self.assertTrue(np.allclose(result, legacy_entropy(vol[:, :1]), atol=1e-6))
+
+    def test_variance(self):
+        vol = self.rng.random((4, 2, 8, 8), dtype=np.float32)
+        vol[0, 0, 0, 0] = np.nan
+        vol[:, 1, 1, 1] = np.nan
+
+        expected = legacy_variance(vol)
+        result = variance_map(vol, chunk_size=16)
+        self.assertTrue(np.allclose(result, expected, atol=1e-6, equal_nan=True))
+        self.assertTrue(np.isnan(result[1, 1]))
+        self.assertAlmostEqual(variance_score(vol, chunk_size=16), float(np.nanmean(expected)), places=5)
+
+    def test_benchmark(self):
+        # MONAI_LABEL_BENCHMARK_SIZE=512 for a full-size CT benchmark
+        size = int(os.environ.get("MONAI_LABEL_BENCHMARK_SIZE", 48))
+        vol = self.rng.random((10, 2, size, size, size), dtype=np.float32)
+
+        cases = (("entropy", legacy_entropy, entropy_score), ("variance", legacy_variance, variance_score))
+        for name, legacy, fn in cases:
+            expected, legacy_latency, legacy_peak = measure(legacy, vol)
+            score, latency, peak = measure(fn, vol, chunk_size=1 << 18)
+            logger.info(
+                f"{name} ({vol.shape}): legacy => {legacy_latency:.3f} sec, {legacy_peak >> 20} MB; "
+                f"chunked => {latency:.3f} sec, {peak >> 20} MB"
+            )
+            self.assertAlmostEqual(score, float(np.nanmean(expected)), places=4)
+            self.assertLess(peak, legacy_peak / 4)
+
+
+if __name__ == "__main__":
+    unittest.main()